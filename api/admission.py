@@ -0,0 +1,244 @@
+# admission.py
+"""Zugangskontrolle vor dem Modellaufruf: Rate-Limit pro Client und Lanes.
+
+Rate-Limit: Token-Bucket pro Client (IP oder session_id), im Prozess oder –
+für mehrere Worker – in der SQLite-DB aus db.py. Ein voller Bucket erlaubt
+RATE_LIMIT_BURST Anfragen am Stück, danach RATE_LIMIT_RATE pro Sekunde;
+abgelehnt wird mit 429 und Retry-After. Lokale Antworten (Preise, Cache)
+kosten dasselbe wie Modellantworten – entscheidend ist, wer wie oft fragt.
+
+Lanes (AdmissionMiddleware): Chat- und Buchungsanfragen werden getrennt
+gezählt. Die Chat-Lane hat eine feste Obergrenze gleichzeitiger Anfragen
+und antwortet darüber sofort mit 503; Buchungen haben eine eigene Lane, die
+nie abgewiesen wird, sondern höchstens kurz wartet – so bleiben Termine auch
+bei Chat-Überlast schnell. Das Abwerfen bei vollem Upstream macht das
+CompletionGate (async_completions.py).
+"""
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", 0.5))  # Anfragen pro Sekunde, 0 = aus
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", 10))
+RATE_LIMIT_KEY = os.getenv("RATE_LIMIT_KEY", "ip")  # "ip" oder "session" (Fallback IP)
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+TRUST_PROXY = os.getenv("TRUST_PROXY", "0") == "1"  # X-Forwarded-For auswerten (hinter Proxy)
+
+ADMIT_CHAT_MAX = int(os.getenv("ADMIT_CHAT_MAX", 256))
+ADMIT_BOOKING_MAX = int(os.getenv("ADMIT_BOOKING_MAX", 16))
+
+RATE_LIMIT_REPLY = (
+    "Du schreibst gerade sehr schnell – bitte warte einen Moment und versuch es dann noch einmal."
+)
+OVERLOAD_REPLY = (
+    "Gerade ist sehr viel los. Bitte versuch es in ein paar Sekunden noch einmal "
+    "oder melde dich direkt bei uns: 0157 – 880 588 48."
+)
+
+
+def retry_after_header(seconds: float) -> dict:
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
+def client_ip(headers, peer: str | None, trust_proxy: bool = TRUST_PROXY) -> str:
+    """Erste Adresse aus X-Forwarded-For (nur hinter einem Proxy), sonst die Gegenstelle."""
+    if trust_proxy:
+        forwarded = headers.get("x-forwarded-for") or headers.get("x-real-ip")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return peer or "-"
+
+
+def client_key(ip: str, session_id: str | None = None, mode: str = RATE_LIMIT_KEY) -> str:
+    if mode == "session" and session_id:
+        return f"sid:{session_id}"
+    return f"ip:{ip}"
+
+
+class TokenBucketLimiter:
+    """Token-Buckets im Prozess, als LRU begrenzt (verdrängte Clients starten voll)."""
+
+    def __init__(self, rate: float = RATE_LIMIT_RATE, burst: float = RATE_LIMIT_BURST,
+                 maxsize: int = RATE_LIMIT_MAX_KEYS):
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()  # key -> [tokens, zeitpunkt]
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+
+    def allow(self, key: str, cost: float = 1.0, now: float | None = None) -> float:
+        """0.0, wenn erlaubt (und abgebucht); sonst Sekunden bis genug Tokens da sind."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [self.burst, now]
+                self._buckets[key] = bucket
+                while len(self._buckets) > self.maxsize:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                self.allowed += 1
+                return 0.0
+            self.limited += 1
+            return (cost - bucket[0]) / self.rate
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"allowed": self.allowed, "limited": self.limited, "keys": len(self._buckets),
+                    "rate": self.rate, "burst": self.burst}
+
+
+class SQLiteTokenBucketLimiter:
+    """Dieselben Buckets in der DB – ein UPSERT pro Anfrage, gültig über alle Worker."""
+
+    PURGE_EVERY = 1000  # Anfragen; volle (= unbenutzte) Buckets werden gelöscht
+
+    def __init__(self, engine=None, rate: float = RATE_LIMIT_RATE, burst: float = RATE_LIMIT_BURST):
+        from sqlalchemy import Column, Float, MetaData, String, Table, text
+
+        if engine is None:
+            from db import engine
+        self.engine = engine
+        self.rate = rate
+        self.burst = burst
+        self.table = Table(
+            "rate_limits",
+            MetaData(),
+            Column("key", String(100), primary_key=True),
+            Column("tokens", Float, nullable=False),
+            Column("updated_at", Float, nullable=False, index=True),
+        )
+        self.table.create(bind=engine, checkfirst=True)
+        # Auffüllen, prüfen und abbuchen in einer Anweisung (atomar auch bei mehreren Prozessen)
+        self._take = text(
+            "INSERT INTO rate_limits (key, tokens, updated_at) VALUES (:key, :burst - :cost, :now) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            "tokens = MIN(:burst, tokens + MAX(0, :now - updated_at) * :rate) - :cost, updated_at = :now "
+            "WHERE MIN(:burst, tokens + MAX(0, :now - updated_at) * :rate) >= :cost "
+            "RETURNING tokens"
+        )
+        self._peek = text("SELECT tokens, updated_at FROM rate_limits WHERE key = :key")
+        self._lock = threading.Lock()
+        self._calls = 0
+        self.allowed = 0
+        self.limited = 0
+
+    def allow(self, key: str, cost: float = 1.0, now: float | None = None) -> float:
+        now = time.time() if now is None else now
+        params = {"key": key, "cost": cost, "now": now, "burst": self.burst, "rate": self.rate}
+        with self.engine.begin() as conn:
+            taken = conn.execute(self._take, params).first()
+            row = None if taken else conn.execute(self._peek, {"key": key}).first()
+        with self._lock:
+            self._calls += 1
+            purge = self._calls % self.PURGE_EVERY == 0
+            if taken:
+                self.allowed += 1
+            else:
+                self.limited += 1
+        if purge:
+            self.purge(now)
+        if taken or row is None:
+            return 0.0
+        tokens = min(self.burst, row[0] + max(0.0, now - row[1]) * self.rate)
+        return max(0.0, cost - tokens) / self.rate
+
+    def purge(self, now: float | None = None) -> int:
+        """Buckets löschen, die inzwischen sicher wieder voll wären."""
+        now = time.time() if now is None else now
+        with self.engine.begin() as conn:
+            return conn.execute(
+                self.table.delete().where(self.table.c.updated_at < now - self.burst / self.rate)
+            ).rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"allowed": self.allowed, "limited": self.limited, "rate": self.rate, "burst": self.burst}
+
+
+def limiter_from_env():
+    """Limiter laut ENV (RATE_LIMIT_RATE, RATE_LIMIT_BURST, RATE_LIMIT_SQLITE=1); None = aus."""
+    if RATE_LIMIT_RATE <= 0:
+        return None
+    if os.getenv("RATE_LIMIT_SQLITE") == "1":
+        return SQLiteTokenBucketLimiter()
+    return TokenBucketLimiter()
+
+
+class Lane:
+    """Gleichzeitige Anfragen eines Pfad-Bereichs; `shed`: sofort 503 statt warten."""
+
+    def __init__(self, name: str, max_active: int, shed: bool):
+        self.name = name
+        self.max_active = max_active
+        self.shed = shed
+        self.active = 0
+        self.rejected = 0
+        self._semaphore = None if shed else asyncio.Semaphore(max_active)
+
+    def stats(self) -> dict:
+        stats = {f"{self.name}_active": self.active, f"{self.name}_max": self.max_active}
+        if self.shed:
+            stats[f"{self.name}_rejected"] = self.rejected
+        return stats
+
+
+class AdmissionMiddleware:
+    """ASGI-Middleware: Anfragen anhand des Pfads einer Lane zuordnen."""
+
+    def __init__(self, app, chat: Lane | None = None, booking: Lane | None = None):
+        self.app = app
+        self.chat = chat or Lane("chat", ADMIT_CHAT_MAX, shed=True)
+        self.booking = booking or Lane("booking", ADMIT_BOOKING_MAX, shed=False)
+
+    def lane_for(self, path: str):
+        if path.startswith("/api/booking/appointments"):
+            return None  # Verwaltung/Export: lange Streams sollen keine Buchungsplätze belegen
+        if path.startswith("/api/booking"):
+            return self.booking
+        if path == "/api/chat" or (path.startswith("/t/") and path.endswith("/api/chat")):
+            return self.chat
+        return None
+
+    async def __call__(self, scope, receive, send):
+        lane = self.lane_for(scope["path"]) if scope["type"] == "http" else None
+        if lane is None or scope.get("method") == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        if lane.shed:
+            if lane.active >= lane.max_active:
+                lane.rejected += 1
+                await overloaded(send, 1)
+                return
+            lane.active += 1
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                lane.active -= 1
+            return
+        async with lane._semaphore:
+            lane.active += 1
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                lane.active -= 1
+
+
+async def overloaded(send, retry_after: float):
+    """Schnelle 503-Antwort direkt auf ASGI-Ebene (ohne Routing/JSON-Encoder)."""
+    body = json.dumps({"error": "Überlastet.", "reply": OVERLOAD_REPLY}, ensure_ascii=False).encode("utf-8")
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    headers += [(k.lower().encode(), v.encode()) for k, v in retry_after_header(retry_after).items()]
+    await send({"type": "http.response.start", "status": 503, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,109 @@
+# async_completions.py
+"""Async-Upstream für main.py: geteilter Connection-Pool, Parallelitätslimit,
+Single-Flight (gleiche gleichzeitige Prompts teilen sich einen Aufruf),
+Timeout pro Anfrage und Lastabwurf, wenn zu viele Aufrufe anstehen."""
+import asyncio
+import contextlib
+import os
+import time
+
+import httpx
+from openai import AsyncOpenAI
+
+LLM_MAX_INFLIGHT = int(os.getenv("LLM_MAX_INFLIGHT", 64))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 20))
+# ab so vielen laufenden + wartenden Aufrufen werden neue sofort abgewiesen (503)
+LLM_SHED_AT = int(os.getenv("LLM_SHED_AT", 2 * LLM_MAX_INFLIGHT))
+
+FALLBACK_REPLY = (
+    "Entschuldige, ich brauche gerade etwas länger als gewohnt. "
+    "Bitte versuch es gleich noch einmal oder melde dich direkt bei uns: 0157 – 880 588 48."
+)
+
+
+def make_async_client() -> AsyncOpenAI:
+    """AsyncOpenAI mit einem einzigen, für viele parallele Chats dimensionierten Pool."""
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=int(os.getenv("LLM_POOL_SIZE", LLM_MAX_INFLIGHT)),
+            max_keepalive_connections=int(os.getenv("LLM_POOL_KEEPALIVE", 32)),
+            keepalive_expiry=60,
+        ),
+        timeout=httpx.Timeout(LLM_TIMEOUT, connect=5.0),
+    )
+    return AsyncOpenAI(
+        api_key=os.environ.get("OPENAI_API_KEY"),
+        base_url=os.environ.get("OPENAI_BASE_URL") or None,  # z. B. benchmarks/mock_openai.py
+        http_client=http_client,
+        max_retries=1,
+    )
+
+
+class CompletionGate:
+    """Begrenzt gleichzeitige Upstream-Aufrufe und fasst identische zusammen."""
+
+    def __init__(self, max_inflight: int = LLM_MAX_INFLIGHT, timeout: float = LLM_TIMEOUT,
+                 shed_at: int = LLM_SHED_AT):
+        self.timeout = timeout
+        self.max_inflight = max_inflight
+        self.shed_at = shed_at
+        self.semaphore = asyncio.Semaphore(max_inflight)
+        self._inflight = {}  # key -> asyncio.Task
+        self.pending = 0  # Upstream-Aufrufe, die laufen oder auf einen Slot warten
+        self.latency = 2.0  # gleitender Mittelwert (s) einer Modellantwort, für Retry-After
+        self.coalesced = 0
+        self.timeouts = 0
+        self.shed = 0
+
+    @property
+    def active(self) -> int:
+        return len(self._inflight)
+
+    async def run(self, key: str, factory):
+        """`factory()` liefert die Coroutine; gleiche Keys warten auf denselben Task.
+
+        Wirft asyncio.TimeoutError, wenn die Antwort nicht rechtzeitig kommt.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._limited(factory))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        try:
+            # shield: ein abgelaufener Wartender bricht den geteilten Aufruf nicht ab
+            return await asyncio.wait_for(asyncio.shield(task), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        """Einen der `max_inflight` Upstream-Slots belegen (auch für Streams)."""
+        self.pending += 1
+        try:
+            async with self.semaphore:
+                start = time.monotonic()
+                yield
+                self.latency += 0.1 * (time.monotonic() - start - self.latency)
+        finally:
+            self.pending -= 1
+
+    def retry_after(self, key: str | None = None) -> float:
+        """0.0 = annehmen; sonst geschätzte Sekunden, bis wieder Platz ist (Aufruf wird abgewiesen).
+
+        Eine Frage, die schon unterwegs ist, kostet keinen weiteren Aufruf und wird nie abgewiesen.
+        """
+        if self.pending < self.shed_at or (key is not None and key in self._inflight):
+            return 0.0
+        self.shed += 1
+        return self.latency * (self.pending - self.max_inflight + 1) / self.max_inflight
+
+    async def _limited(self, factory):
+        async with self.slot():
+            return await factory()
+
+    def stats(self) -> dict:
+        return {"inflight": self.active, "pending": self.pending, "coalesced": self.coalesced,
+                "timeouts": self.timeouts, "shed": self.shed, "latency_ms": round(self.latency * 1000, 1)}
@@ -0,0 +1,149 @@
+# benchmarks/bench_appointments.py
+"""Terminliste (booking/listing.py): OFFSET vs. Keyset bei wachsender Seitentiefe.
+
+Füllt eine temporäre SQLite-Datei mit --rows Terminen (Kunden und
+Mitarbeiter dazu) und misst die Zeit für eine Seite (--limit Zeilen) an
+mehreren Positionen: einmal mit LIMIT/OFFSET, einmal mit dem Cursor aus
+list_page. Dazu die Zahl der SQL-Abfragen pro Seite mit lazy geladenen
+Beziehungen (N+1) und mit joinedload, und der Durchsatz des Exports.
+
+Aufruf (aus api/):
+    python benchmarks/bench_appointments.py [--rows 1000000] [--limit 50]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_startup import API_DIR  # noqa: E402
+
+sys.path.insert(0, API_DIR)
+from sqlalchemy import event, insert, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from db import make_engine  # noqa: E402
+from booking.availability import PRAXEN  # noqa: E402
+from booking.listing import (AppointmentFilter, appointment_select, encode_cursor, export_record,  # noqa: E402
+                             iter_csv, iter_records, list_page)
+from booking.models import Appointment, Base, Customer, Employee  # noqa: E402
+
+SERVICES = ["B. Botox", "Lippen 1 ml", "Profhilo", "Microneedling"]
+START = datetime(2020, 1, 1, 9, 0)
+BATCH = 50_000
+
+
+def seed(engine, rows, customers=50_000):
+    rnd = random.Random(1)
+    praxen = list(PRAXEN)
+    with engine.begin() as conn:
+        conn.execute(insert(Employee), [{"name": f"Mitarbeiter {i}"} for i in range(1, 21)])
+        conn.execute(insert(Customer), [{"name": f"Kunde {i}", "email": f"kunde{i}@example.com"}
+                                        for i in range(1, customers + 1)])
+        for offset in range(0, rows, BATCH):
+            conn.execute(insert(Appointment), [
+                {"service": rnd.choice(SERVICES), "praxis": rnd.choice(praxen),
+                 "date": START + timedelta(minutes=5 * (offset + i)), "status": "gebucht",
+                 "customer_id": rnd.randint(1, customers), "employee_id": rnd.randint(1, 20), "created_at": START}
+                for i in range(min(BATCH, rows - offset))
+            ])
+
+
+def timed(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def count_queries(engine, fn):
+    count = 0
+
+    def before(*_):
+        nonlocal count
+        count += 1
+
+    event.listen(engine, "before_cursor_execute", before)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(engine)
+        start = time.perf_counter()
+        seed(engine, args.rows)
+        print(f"{args.rows} Termine, Seed {time.perf_counter() - start:.1f} s, Seite = {args.limit} Zeilen")
+        Session = sessionmaker(bind=engine)
+
+        with Session() as db:
+            ordered = select(Appointment.date, Appointment.id).order_by(Appointment.date, Appointment.id)
+            for label, flt in (("alle", AppointmentFilter()), ("Praxis", AppointmentFilter(praxis=list(PRAXEN)[0]))):
+                total = args.rows if flt.praxis is None else db.query(Appointment).filter(
+                    Appointment.praxis == flt.praxis).count()
+                print(f"  Filter {label} ({total} Zeilen):")
+                for depth in (0.0, 0.1, 0.5, 0.99):
+                    offset = int(total * depth) // args.limit * args.limit
+                    base = appointment_select(flt)
+
+                    def by_offset():
+                        db.scalars(base.offset(offset).limit(args.limit)).all()
+                        db.expunge_all()
+
+                    # Cursor = letzte Zeile der Vorseite (nicht mitgemessen)
+                    if offset:
+                        where = ordered if flt.praxis is None else ordered.where(Appointment.praxis == flt.praxis)
+                        prev = db.execute(where.offset(offset - 1).limit(1)).one()
+                        cursor = encode_cursor(prev.date, prev.id)
+                    else:
+                        cursor = None
+
+                    def by_cursor():
+                        list_page(db, flt, cursor, args.limit)
+                        db.expunge_all()
+
+                    print(f"    Position {offset:>8}: OFFSET {timed(by_offset):8.2f} ms   Keyset {timed(by_cursor):6.2f} ms")
+
+            def lazy_page():
+                rows = db.scalars(select(Appointment).order_by(Appointment.date, Appointment.id)
+                                  .limit(args.limit)).all()
+                [(a.customer.name, a.employee.name) for a in rows]
+                db.expunge_all()
+
+            def eager_page():
+                rows, _ = list_page(db, AppointmentFilter(), None, args.limit)
+                [export_record(a) for a in rows]
+                db.expunge_all()
+
+            print(f"  Abfragen pro Seite: lazy {count_queries(engine, lazy_page)} "
+                  f"({timed(lazy_page):.2f} ms), joinedload {count_queries(engine, eager_page)} "
+                  f"({timed(eager_page):.2f} ms)")
+
+        export_rows = min(args.rows, 200_000)
+        day_span = export_rows * 5 // (60 * 24)
+        flt = AppointmentFilter(date_from=START.date(), date_to=(START + timedelta(days=day_span - 1)).date())
+        start = time.perf_counter()
+        size = sum(len(chunk) for chunk in iter_csv(iter_records(Session, flt)))
+        seconds = time.perf_counter() - start
+        print(f"  CSV-Export {day_span} Tage: {size / 2 ** 20:.1f} MiB in {seconds:.1f} s "
+              f"({export_rows / seconds:.0f} Zeilen/s)")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/bench_booking.py
+"""Benchmark: Buchungslatenz bei wachsender Termin-Historie.
+
+Vergleicht die alte Prüfung (±30 min über die ganze Tabelle) mit der neuen
+(Sperre + indizierte Überlappungsprüfung je Praxis/Mitarbeiter). Läuft gegen
+eine temporäre SQLite-Datei, nicht gegen database.db.
+
+Aufruf (aus api/):  python benchmarks/bench_booking.py [zeilen ...]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from booking.availability import PRAXEN
+from booking.conflicts import find_conflict, lock_scopes, upsert_customer
+from booking.models import Appointment, Base
+
+SERVICES = ["B. Botox", "Lippen 1 ml", "Profhilo", "Microneedling"]
+BATCH = 50_000
+START = datetime(2020, 1, 1, 10, 0)
+
+
+def seed(engine, rows):
+    rnd = random.Random(1)
+    praxen = list(PRAXEN)
+    with engine.begin() as conn:
+        for offset in range(0, rows, BATCH):
+            conn.execute(insert(Appointment), [
+                {
+                    "service": rnd.choice(SERVICES),
+                    "praxis": rnd.choice(praxen),
+                    "date": START + timedelta(minutes=15 * (offset + i)),
+                    "status": "gebucht",
+                    "employee_id": rnd.randint(1, 20),
+                    "created_at": START,
+                }
+                for i in range(min(BATCH, rows - offset))
+            ])
+
+
+def legacy_book(db, when):
+    conflict = (
+        db.query(Appointment)
+        .filter(Appointment.date.between(when - timedelta(minutes=30), when + timedelta(minutes=30)))
+        .first()
+    )
+    db.rollback()
+    return conflict
+
+
+def new_book(db, when):
+    lock_scopes(db, "mannheim", 7)
+    customer = upsert_customer(db, "Bench", "bench@example.com", None)
+    conflict = find_conflict(db, "mannheim", 7, when, "B. Botox")
+    if not conflict:
+        db.add(Appointment(service="B. Botox", praxis="mannheim", date=when,
+                           customer_id=customer.id, employee_id=7))
+        db.flush()
+    db.rollback()  # Tabelle bleibt gleich groß
+    return conflict
+
+
+def measure(fn, Session, rows, n=200):
+    rnd = random.Random(2)
+    span = rows * 15 + 60 * 24 * 60
+    times = []
+    for _ in range(n):
+        when = START + timedelta(minutes=rnd.randrange(0, span, 15))
+        with Session() as db:
+            t = time.perf_counter()
+            fn(db, when)
+            times.append((time.perf_counter() - t) * 1000)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.95)]
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{tmp}/bench.db")
+            Base.metadata.create_all(engine)
+            t = time.perf_counter()
+            seed(engine, rows)
+            seeded = time.perf_counter() - t
+            Session = sessionmaker(bind=engine)
+            old = measure(legacy_book, Session, rows)
+            new = measure(new_book, Session, rows)
+            print(
+                f"{rows:>9} Termine (Seed {seeded:5.1f}s): "
+                f"alt p50 {old[0]:7.2f} ms / p95 {old[1]:7.2f} ms  |  "
+                f"neu p50 {new[0]:6.2f} ms / p95 {new[1]:6.2f} ms"
+            )
+            engine.dispose()
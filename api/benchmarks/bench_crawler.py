@@ -0,0 +1,105 @@
+# benchmarks/bench_crawler.py
+"""Benchmark: save_all_pages.py gegen eine lokale Test-Website (http.server).
+
+Der Server liefert eine sitemap.xml, verlinkte Seiten mit ETag und simulierte
+Netzlatenz. Gemessen werden Seiten/s für
+  - seriell mit requests.get (bisheriges scrape_page),
+  - Crawler kalt (alles neu),
+  - Crawler warm (alles 304),
+  - Crawler warm mit 10 % geänderten Seiten.
+
+Aufruf (aus api/):  python benchmarks/bench_crawler.py [seiten] [latenz_ms] [workers]
+"""
+import contextlib
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+import save_all_pages  # noqa: E402
+
+PAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+LATENCY = (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+WORKERS = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+
+revision = {}  # seite -> Stand, zum Simulieren von Änderungen
+
+
+def page_html(n):
+    links = "".join(f'<a href="/seite/{(n * 7 + i) % PAGES}/">weiter</a>' for i in range(1, 4))
+    body = " ".join(f"Absatz {n} Hyaluron Botox Beratung {i}." for i in range(40))
+    return (f"<html><body><nav>Menü</nav><h1>Seite {n} v{revision.get(n, 0)}</h1>"
+            f"<p>{body}</p>{links}<script>var x=1;</script></body></html>").encode("utf-8")
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-Alive, damit der Pool etwas bringt
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=b"", content_type="text/html; charset=utf-8", etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        time.sleep(LATENCY)
+        if self.path == "/sitemap.xml":
+            locs = "".join(f"<url><loc>http://{self.headers['Host']}/seite/{n}/</loc></url>" for n in range(PAGES))
+            body = f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{locs}</urlset>'
+            return self._reply(200, body.encode(), "application/xml")
+        parts = self.path.strip("/").split("/") if self.path != "/" else ["seite", "0"]
+        if len(parts) == 2 and parts[0] == "seite" and parts[1].isdigit() and int(parts[1]) < PAGES:
+            body = page_html(int(parts[1]))
+            etag = '"%s"' % hashlib.md5(body).hexdigest()
+            if self.headers.get("If-None-Match") == etag:
+                return self._reply(304, etag=etag)
+            return self._reply(200, body, etag=etag)
+        self._reply(404, b"nicht gefunden")
+
+
+def report(label, pages, seconds):
+    print(f"{label:>26}: {pages:5d} Seiten in {seconds:6.2f} s  →  {pages / seconds:7.1f} Seiten/s")
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    urls = [f"{base}/seite/{n}/" for n in range(PAGES)]
+    store = os.path.join(tempfile.mkdtemp(prefix="crawler-bench-"), "pages.jsonl")
+    print(f"{PAGES} Seiten, {LATENCY * 1000:.0f} ms Latenz, {WORKERS} Worker\n")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        t = time.perf_counter()
+        for url in urls[: min(PAGES, 50)]:
+            save_all_pages.scrape_page(url)
+        serial = time.perf_counter() - t
+    report("seriell (requests.get)", min(PAGES, 50), serial)
+
+    for label in ("Crawler kalt", "Crawler warm (304)", "Crawler warm, 10 % neu"):
+        if label.endswith("neu"):
+            for n in range(0, PAGES, 10):
+                revision[n] = revision.get(n, 0) + 1
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = save_all_pages.crawl([f"{base}/"], store, workers=WORKERS, max_pages=PAGES + 1)
+        report(label, stats["pages"], stats["seconds"])
+        print(f"{'':>28}neu {stats['fetched']}, unverändert {stats['unchanged']}, Fehler {stats['error']}")
+
+    out = store.replace(".jsonl", ".txt")
+    print(f"\nexport_text: {save_all_pages.export_text(store, out)} Seiten → {out}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/bench_dataset.py
+"""Durchsatz und Speicher von dataset.py bei großen Dateien.
+
+Erzeugt eine synthetische JSONL-Datei mit N Zeilen (eindeutige Fragen, ca.
+20 % Beinahe-Dubletten mit anderer Schreibweise, 1 % kaputte Zeilen) und
+ruft `python dataset.py --no-config` als eigenen Prozess auf – einmal ohne
+Pool und einmal mit --workers. Gemessen: Zeilen/s und maximaler RSS (auch
+der Pool-Prozesse). Bei konstantem Speicher bleibt der RSS bei 4 × N gleich.
+
+Aufruf (aus api/):
+    python benchmarks/bench_dataset.py [--lines 100000] [--workers 4]
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_startup import API_DIR  # noqa: E402
+
+TOPICS = ["Botox", "Hyaluron", "Profhilo", "Microneedling", "BioRePeel", "Fadenlifting", "Lipolyse", "Jawline",
+          "Tränenrinne", "Lippen", "Nasenkorrektur", "Wangen", "Kinn", "Hylase", "Fettwegspritze"]
+ASKS = ["Wie lange hält {t} bei Menschen mit {n} Jahren?", "Darf ich nach {t} am Tag {n} Sport machen?",
+        "Wie viele Sitzungen {t} brauche ich für Ergebnis {n}?", "Kann ich {t} und Behandlung {n} kombinieren?"]
+SYSTEM = "Du bist die freundliche Assistentin von Liquid Aesthetik."
+
+
+def variant(question: str, rng) -> str:
+    """Beinahe-Dublette: Groß-/Kleinschreibung, Satzzeichen, ein Tippfehler."""
+    q = question.lower() if rng.random() < 0.5 else question.upper()
+    q = q.rstrip("?") + rng.choice(["", " ?", "??", "!"])
+    i = rng.randrange(5, len(q) - 2)
+    return q[:i] + q[i + 1] + q[i] + q[i + 2:]
+
+
+def synthesize(path: str, lines: int, seed: int = 1):
+    rng = random.Random(seed)
+    recent = []
+    with open(path, "w", encoding="utf-8") as f:
+        for n in range(lines):
+            roll = rng.random()
+            if roll < 0.01:
+                f.write('{"messages": [{"role": "user"\n')
+                continue
+            if roll < 0.21 and recent:
+                question = variant(rng.choice(recent), rng)
+            else:
+                question = rng.choice(ASKS).format(t=rng.choice(TOPICS), n=n)
+                recent = (recent + [question])[-100:]
+            answer = f"Das hängt von deiner Ausgangssituation ab ({n}). Wir beraten dich gern persönlich."
+            f.write(json.dumps({"messages": [{"role": "system", "content": SYSTEM},
+                                             {"role": "user", "content": question},
+                                             {"role": "assistant", "content": answer}]},
+                               ensure_ascii=False) + "\n")
+
+
+def run(source: str, out_dir: str, workers: int, capacity: int):
+    out = os.path.join(out_dir, "out.jsonl")
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c",
+         "import sys, json, resource, dataset; s = dataset.main(sys.argv[1:]);"
+         "print('STATS', json.dumps({'lines': s['lines'], 'rejected': s['rejected'],"
+         " 'self_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,"
+         " 'children_kb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss}))",
+         "--no-config", "--curated", source, "--out", out, "--workers", str(workers), "--capacity", str(capacity)],
+        cwd=API_DIR, capture_output=True, text=True, check=True,
+    )
+    seconds = time.perf_counter() - start
+    stats = json.loads(next(line[6:] for line in proc.stdout.splitlines() if line.startswith("STATS ")))
+    rss = max(stats["self_kb"], stats["children_kb"]) / 1024
+    print(f"  workers={workers:<2} {stats['lines']:>9} Zeilen  {stats['lines'] / seconds:>9.0f} Zeilen/s  "
+          f"max RSS {rss:6.1f} MiB  aussortiert {stats['rejected']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for lines in (args.lines, 4 * args.lines):
+            source = os.path.join(tmp, "synthetic.jsonl")
+            synthesize(source, lines)
+            print(f"{lines} Zeilen ({os.path.getsize(source) / 2 ** 20:.0f} MiB):")
+            for workers in sorted({1, args.workers}):
+                run(source, tmp, workers, capacity=4 * args.lines)
+    print(f"(CPU-Kerne: {os.cpu_count()}, RSS-Basis: Interpreter + numpy, "
+          f"{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB im Benchmark selbst)")
+
+
+if __name__ == "__main__":
+    main()
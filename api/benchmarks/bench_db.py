@@ -0,0 +1,152 @@
+# benchmarks/bench_db.py
+"""Gleichzeitige Buchungen und Slot-Abfragen gegen SQLite: Standard vs. db.py-Profil.
+
+Mehrere Prozesse (wie uvicorn --workers) buchen gleichzeitig mit dem Ablauf
+aus booking/routes.py (Sperre, Kunde, Konfliktprüfung, Termin, Outbox,
+Commit), weitere Prozesse lesen parallel Slots (busy_intervals). Einmal mit
+SQLite-Standard (Rollback-Journal, synchronous=FULL – das alte db.py), einmal
+mit den Pragmas aus db.SQLITE_PRAGMAS (WAL, synchronous=NORMAL, busy_timeout,
+mmap/cache) und der query_only-Lese-Engine.
+
+Gemessen: Commits/s, Latenz je Buchung (p50/p99), Lesezugriffe/s und
+Lese-p99, Fehler ("database is locked").
+
+Aufruf (aus api/):
+    python benchmarks/bench_db.py [--writers 4] [--readers 2] [--seconds 5] [--seed-rows 20000]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_startup import API_DIR  # noqa: E402
+from bench_load import percentile  # noqa: E402
+
+sys.path.insert(0, API_DIR)
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from db import SQLITE_PRAGMAS, make_engine  # noqa: E402
+from booking.availability import PRAXEN, busy_intervals  # noqa: E402
+from booking.conflicts import find_conflict, lock_scopes, upsert_customer  # noqa: E402
+from booking.models import Appointment, Base  # noqa: E402
+from booking.outbox import enqueue_email  # noqa: E402
+
+SERVICES = ["B. Botox", "Lippen 1 ml", "Profhilo", "Microneedling"]
+START = datetime(2026, 1, 5, 9, 0)
+PROFILES = {"standard": None, "db.py": SQLITE_PRAGMAS}
+
+
+def seed(url, rows):
+    engine = make_engine(url, pragmas=None)
+    Base.metadata.create_all(engine)
+    rnd = random.Random(1)
+    with engine.begin() as conn:
+        conn.execute(insert(Appointment), [
+            {"service": rnd.choice(SERVICES), "praxis": rnd.choice(list(PRAXEN)),
+             "date": START + timedelta(minutes=15 * rnd.randrange(365 * 96)), "status": "gebucht",
+             "employee_id": rnd.randint(1, 20), "created_at": START}
+            for _ in range(rows)
+        ])
+    engine.dispose()
+
+
+def writer(url, pragmas, seconds, worker, results):
+    Session = sessionmaker(bind=make_engine(url, pragmas=pragmas), autoflush=False)
+    rnd = random.Random(worker)
+    praxen = list(PRAXEN)
+    latencies, conflicts, errors = [], 0, 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        praxis, employee = rnd.choice(praxen), rnd.randint(1, 20)
+        when = START + timedelta(minutes=15 * rnd.randrange(365 * 96))
+        email = f"kunde{rnd.randrange(5000)}@example.com"
+        start = time.perf_counter()
+        with Session() as db:
+            try:
+                lock_scopes(db, praxis, employee)
+                customer = upsert_customer(db, "Bench", email, None)
+                if find_conflict(db, praxis, employee, when, "B. Botox"):
+                    db.rollback()
+                    conflicts += 1
+                    continue
+                db.add(Appointment(service="B. Botox", praxis=praxis, date=when,
+                                   customer_id=customer.id, employee_id=employee))
+                enqueue_email(db, email, "Terminbestätigung", "…")
+                db.commit()
+            except OperationalError:
+                db.rollback()
+                errors += 1
+                continue
+        latencies.append(time.perf_counter() - start)
+    results.put(("write", latencies, conflicts, errors))
+
+
+def reader(url, pragmas, seconds, worker, results):
+    Session = sessionmaker(bind=make_engine(url, pragmas=pragmas, read_only=pragmas is not None))
+    rnd = random.Random(1000 + worker)
+    praxen = list(PRAXEN)
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        day = START + timedelta(days=rnd.randrange(365))
+        start = time.perf_counter()
+        with Session() as db:
+            try:
+                busy_intervals(db, rnd.choice(praxen), day, day + timedelta(days=7))
+            except OperationalError:
+                errors += 1
+                continue
+        latencies.append(time.perf_counter() - start)
+    results.put(("read", latencies, 0, errors))
+
+
+def run(profile, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{tmp}/bench.db"
+        seed(url, args.seed_rows)
+        pragmas = PROFILES[profile]
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=writer, args=(url, pragmas, args.seconds, i, results))
+                 for i in range(args.writers)]
+        procs += [multiprocessing.Process(target=reader, args=(url, pragmas, args.seconds, i, results))
+                  for i in range(args.readers)]
+        for p in procs:
+            p.start()
+        collected = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+    writes = [x for kind, lat, _, _ in collected if kind == "write" for x in lat]
+    reads = [x for kind, lat, _, _ in collected if kind == "read" for x in lat]
+    conflicts = sum(c for kind, _, c, _ in collected if kind == "write")
+    write_errors = sum(e for kind, _, _, e in collected if kind == "write")
+    read_errors = sum(e for kind, _, _, e in collected if kind == "read")
+    ms = lambda values, q: percentile(values, q) * 1000 if values else float("nan")  # noqa: E731
+    print(f"  {profile:9} {len(writes) / args.seconds:7.0f} Commits/s  p50 {ms(writes, 50):6.1f} ms  "
+          f"p99 {ms(writes, 99):7.1f} ms  Fehler {write_errors:<3} Konflikte {conflicts:<3} | "
+          f"{len(reads) / args.seconds:7.0f} Lesen/s  p99 {ms(reads, 99):6.1f} ms  Fehler {read_errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--seed-rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{args.writers} Schreib-, {args.readers} Leseprozesse, {args.seconds:g} s, "
+          f"{args.seed_rows} Termine vorab (CPU-Kerne: {os.cpu_count()})")
+    for profile in PROFILES:
+        run(profile, args)
+
+
+if __name__ == "__main__":
+    main()
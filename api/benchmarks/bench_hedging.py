@@ -0,0 +1,145 @@
+# benchmarks/bench_hedging.py
+"""Hedging und Circuit-Breaker (resilience.py) gegen den lokalen OpenAI-Mock.
+
+Szenario "spikes": MOCK_SPIKE_RATE der Aufrufe an das Modell hängen
+--spike-ms lang, das Fallback-Modell ist gesund. Gemessen werden p50/p95/p99
+je einmal ohne Hedging (LLM_HEDGE_PERCENTILE=0) und mit, dazu welches Modell
+geantwortet hat und wie viele Aufrufe zusätzlich an den Upstream gingen.
+
+Szenario "outage": das Modell liefert nur noch 500er. Gezählt wird, wie
+viele Aufrufe es noch erreichen, bis der Breaker offen ist, und ob es nach
+dem Cooldown (Fehler wieder aus) zurückkommt.
+
+Aufruf (aus api/):
+    python benchmarks/bench_hedging.py [--requests 300] [--concurrency 8]
+        [--spike-rate 0.05] [--spike-ms 2000] [--stream]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_startup import API_DIR  # noqa: E402
+from bench_load import percentile  # noqa: E402
+from mock_openai import MockOpenAIServer, MockSettings  # noqa: E402
+
+sys.path.insert(0, API_DIR)
+from resilience import AsyncResilientClient  # noqa: E402
+
+MODEL = "ft:gpt-4o-mini-2024-07-18:bench::hedge"
+FALLBACK = "gpt-4o-mini"
+MESSAGES = [{"role": "user", "content": "Was kostet eine Beratung?"}]
+
+
+def make_client(mock):
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(api_key="mock", base_url=mock.base_url)
+
+
+async def call(resilient, stream):
+    if not stream:
+        _, model = await resilient.create(MODEL, MESSAGES)
+        return model
+    upstream, model = await resilient.stream(MODEL, MESSAGES)
+    async for _ in upstream:  # bis zum Ende lesen wie main.py
+        pass
+    return model
+
+
+async def run(resilient, requests, concurrency, stream):
+    latencies, answered, errors = [], {}, 0
+    queue = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in queue:
+            start = time.perf_counter()
+            try:
+                model = await call(resilient, stream)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            answered[model] = answered.get(model, 0) + 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, answered, errors
+
+
+def upstream_calls(mock):
+    return {m: c.get("requests", 0) for m, c in mock.stats()["models"].items()}
+
+
+async def spikes(mock, args):
+    print(f"== spikes: {args.spike_rate:.0%} der Aufrufe an {MODEL} +{args.spike_ms:.0f} ms ==")
+    mock.settings.update({"spike_rate": args.spike_rate, "spike_ms": args.spike_ms, "error_rate": 0.0})
+    for label, percentile_setting in (("ohne Hedging", 0), (f"Hedging p{args.percentile:g}", args.percentile)):
+        client = make_client(mock)
+        resilient = AsyncResilientClient(client, fallback_model=FALLBACK, deadline=30,
+                                         hedge_percentile=percentile_setting)
+        # Aufwärmen: Latenzfenster füllen, ohne Ausreißer
+        mock.settings.update({"spike_rate": 0.0})
+        await run(resilient, 40, args.concurrency, args.stream)
+        mock.settings.update({"spike_rate": args.spike_rate})
+        before = upstream_calls(mock)
+        latencies, answered, errors = await run(resilient, args.requests, args.concurrency, args.stream)
+        after = upstream_calls(mock)
+        extra = sum(after.values()) - sum(before.values()) - args.requests
+        ms = lambda q: f"{percentile(latencies, q) * 1000:7.0f}"  # noqa: E731
+        delay = resilient.hedge_delay(MODEL, "first_token" if args.stream else "complete")
+        print(f"  {label:14} p50 {ms(50)} ms  p95 {ms(95)} ms  p99 {ms(99)} ms  max {max(latencies) * 1000:6.0f} ms"
+              f"  Fehler {errors}  Antworten {answered}  Mehraufrufe {extra} ({extra / args.requests:.1%})"
+              f"  Schwelle {'-' if delay is None else f'{delay:.3f} s'}")
+        await client.close()
+    mock.settings.update({"spike_rate": 0.0})
+
+
+async def outage(mock, args):
+    print(f"== outage: {MODEL} liefert nur 500er, Cooldown {args.cooldown:g} s ==")
+    client = make_client(mock)
+    resilient = AsyncResilientClient(client, fallback_model=FALLBACK, deadline=30)
+    for breaker in (resilient.breaker(MODEL), resilient.breaker(FALLBACK)):
+        breaker.cooldown = args.cooldown
+    mock.settings.update({"error_rate": 1.0})
+    before = upstream_calls(mock).get(MODEL, 0)
+    latencies, answered, errors = await run(resilient, args.requests, args.concurrency, args.stream)
+    reached = upstream_calls(mock).get(MODEL, 0) - before
+    print(f"  {args.requests} Anfragen: Fehler {errors}, Antworten {answered}, "
+          f"davon erreichten {reached} das Modell, Breaker {resilient.breaker(MODEL).state}, "
+          f"p50 {percentile(latencies, 50) * 1000:.0f} ms")
+
+    mock.settings.update({"error_rate": 0.0})
+    await asyncio.sleep(args.cooldown)
+    latencies, answered, errors = await run(resilient, 50, args.concurrency, args.stream)
+    print(f"  nach Cooldown: Fehler {errors}, Antworten {answered}, Breaker {resilient.breaker(MODEL).state}")
+    await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--spike-rate", type=float, default=0.05)
+    parser.add_argument("--spike-ms", type=float, default=2000)
+    parser.add_argument("--percentile", type=float, default=95)
+    parser.add_argument("--cooldown", type=float, default=1.0)
+    parser.add_argument("--stream", action="store_true")
+    args = parser.parse_args()
+
+    mock = MockOpenAIServer(settings=MockSettings(
+        latency_ms=args.latency_ms, jitter_ms=args.latency_ms / 5, tokens_per_sec=2000, reply_tokens=40,
+        fault_model=MODEL)).start()
+    httpx.get(mock.base_url + "/stats").raise_for_status()
+    asyncio.run(spikes(mock, args))
+    asyncio.run(outage(mock, args))
+    mock.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+# benchmarks/bench_load.py
+"""Lasttest: chat.py (Vercel-Handler), main.py (FastAPI) und Terminbuchung.
+
+Startet den OpenAI-Mock (mock_openai.py) und die Server als eigene Prozesse
+in einem Temp-Verzeichnis (eigene database.db, kein Outbox-Worker) und
+feuert je Ziel und Parallelität eine feste Zahl Anfragen ab (geschlossene
+Schleife: N Clients, jeder schickt nach der Antwort die nächste). Chat-
+Nachrichten sind eindeutig, Cache und Single-Flight greifen also nicht;
+Buchungen bekommen eigene Zeitfenster, es gibt keine 409. "mixed" lässt
+Chat mit der jeweiligen Parallelität und gleichzeitig zwei Buchungs-Clients
+laufen – zeigt, ob Buchungen unter Chat-Last schnell bleiben.
+
+Gemessen: Durchsatz, Latenz p50/p95/p99, mit --stream zusätzlich die Zeit
+bis zum ersten Byte, und die Zahl der Upstream-Aufrufe laut Mock. Mit
+`--json DATEI` wird eine Zeile pro Lauf angehängt (inkl. Git-Commit); steht
+dort schon ein Lauf, werden die Abweichungen dazu ausgegeben.
+
+Aufruf (aus api/):
+    python benchmarks/bench_load.py [--targets handler,fastapi,booking]
+        [--concurrency 1,8,32] [--requests 200] [--stream] [--json load.jsonl]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_startup import API_DIR, git_commit  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+TARGETS = ("handler", "fastapi", "booking", "mixed")
+BOOKING_START = datetime(2031, 1, 6, 8, 0)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, q):
+    """Nächster Rang auf der sortierten Liste (ausreichend für Latenzen)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def serve_handler(port):
+    """Kindprozess: chat.py wie auf Vercel, nur lokal in einem ThreadingHTTPServer."""
+    from http.server import ThreadingHTTPServer
+
+    sys.path.insert(0, API_DIR)
+    from chat import handler
+
+    class QuietHandler(handler):
+        disable_nagle_algorithm = True  # wie hinter dem Vercel-Proxy: kein Delayed-ACK-Artefakt
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 512  # Backlog gilt beim listen() im Konstruktor
+
+    Server(("127.0.0.1", port), QuietHandler).serve_forever()
+
+
+class Processes:
+    """Mock und Server als Unterprozesse; räumt Prozesse und Temp-Verzeichnis auf."""
+
+    def __init__(self, mock_args):
+        self.workdir = tempfile.mkdtemp(prefix="load-bench-")
+        self.procs = []
+        self.mock_port = free_port()
+        self.mock_url = f"http://127.0.0.1:{self.mock_port}/v1"
+        self._start([sys.executable, os.path.join(BENCH_DIR, "mock_openai.py"),
+                     "--port", str(self.mock_port), *mock_args], f"{self.mock_url}/stats")
+        self.env = {
+            **os.environ,
+            "OPENAI_BASE_URL": self.mock_url,
+            "OPENAI_API_KEY": "mock",
+            "OUTBOX_WORKER": "0",
+            "RATE_LIMIT_RATE": os.environ.get("RATE_LIMIT_RATE", "0"),  # alle Anfragen kommen von einer IP
+            "PYTHONPATH": API_DIR,
+        }
+
+    def _start(self, cmd, ready_url, env=None):
+        proc = subprocess.Popen(cmd, cwd=self.workdir, env=env, stdout=subprocess.DEVNULL)
+        self.procs.append(proc)
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            if proc.poll() is not None:
+                raise RuntimeError(f"{cmd[1]} beendet (Code {proc.returncode})")
+            try:
+                httpx.get(ready_url, timeout=1)
+                return proc
+            except httpx.TransportError:
+                time.sleep(0.1)
+        raise RuntimeError(f"{ready_url} nicht erreichbar")
+
+    def start_target(self, target) -> str:
+        port = free_port()
+        base = f"http://127.0.0.1:{port}"
+        if target == "handler":
+            self._start([sys.executable, os.path.abspath(__file__), "--serve-handler", str(port)],
+                        base, self.env)
+        else:
+            self._start([sys.executable, "-m", "uvicorn", "main:app", "--app-dir", API_DIR,
+                         "--port", str(port), "--log-level", "warning"], base, self.env)
+        return base
+
+    def mock_calls(self) -> int:
+        return httpx.get(f"{self.mock_url}/stats").json()["requests"]
+
+    def close(self):
+        for proc in self.procs:
+            proc.terminate()
+        for proc in self.procs:
+            try:
+                proc.wait(5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class Payloads:
+    """Eindeutige Anfragen je Ziel – über alle Läufe hochgezählt."""
+
+    def __init__(self):
+        self.n = 0
+
+    def __call__(self, target):
+        self.n += 1
+        if target == "booking":
+            return "/api/booking/book", {
+                "service": "Lippen 1 ml",
+                "praxis": ("wiesbaden", "mannheim", "dortmund")[self.n % 3],
+                "date": (BOOKING_START + timedelta(hours=2 * self.n)).isoformat(),
+                "customer": {"name": f"Last Test {self.n}", "email": f"last{self.n}@lasttest.de"},
+            }
+        return "/api/chat", {"message": f"Erzähl mir bitte etwas über eure Philosophie (Anfrage {self.n})"}
+
+
+async def run_level(base, target, concurrency, total, payloads, stream):
+    latencies, first_bytes, errors, rejected = [], [], 0, 0
+    remaining = total
+    headers = {"Accept": "text/event-stream"} if stream and target != "booking" else {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal remaining, errors, rejected
+            while remaining > 0:
+                remaining -= 1
+                path, body = payloads(target)
+                start = time.perf_counter()
+                try:
+                    async with client.stream("POST", path, json=body, headers=headers) as response:
+                        first = None
+                        async for _ in response.aiter_raw():
+                            if first is None:
+                                first = time.perf_counter() - start
+                        status = response.status_code
+                        retry_after = float(response.headers.get("retry-after") or 1)
+                except httpx.HTTPError:
+                    status = None
+                if status in (429, 503):
+                    rejected += 1  # Rate-Limit / Lastabwurf – gewollt, kein Fehler
+                    await asyncio.sleep(retry_after)  # wie ein höflicher Client
+                    continue
+                if status != 200:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+                first_bytes.append(first or latencies[-1])
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        duration = time.perf_counter() - start
+
+    ms = lambda v: round(v * 1000, 2) if v is not None else None  # noqa: E731
+    result = {
+        "target": target,
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "rejected": rejected,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(latencies) / duration, 2),
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+    }
+    if headers:
+        result["ttfb_p50_ms"] = ms(percentile(first_bytes, 50))
+        result["ttfb_p95_ms"] = ms(percentile(first_bytes, 95))
+    return result
+
+
+def previous_run(path):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line for line in f if line.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+def print_result(result, before=None):
+    line = (f"{result['target']:>8} c={result['concurrency']:<3} {result['throughput_rps']:8.1f} req/s  "
+            f"p50 {result['p50_ms']:8.1f}  p95 {result['p95_ms']:8.1f}  p99 {result['p99_ms']:8.1f} ms")
+    if "ttfb_p50_ms" in result:
+        line += f"  TTFB p50 {result['ttfb_p50_ms']:.1f} ms"
+    if result["errors"]:
+        line += f"  ⚠️ {result['errors']} Fehler"
+    if result.get("rejected"):
+        line += f"  {result['rejected']} abgewiesen (429/503)"
+    if result.get("upstream_calls") is not None and result["target"] != "booking":
+        line += f"  upstream {result['upstream_calls']}"
+    if before:
+        d_rps = (result["throughput_rps"] / before["throughput_rps"] - 1) * 100 if before["throughput_rps"] else 0
+        d_p95 = (result["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] else 0
+        line += f"  | vs. vorher: {d_rps:+.0f} % req/s, {d_p95:+.0f} % p95"
+    print(line)
+
+
+async def main(args):
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        raise SystemExit(f"Unbekannte Ziele: {', '.join(sorted(unknown))}")
+    levels = [int(c) for c in args.concurrency.split(",")]
+    mock_args = [f"--{name.replace('_', '-')}={value}" for name, value in (
+        ("latency_ms", args.latency_ms), ("jitter_ms", args.jitter_ms),
+        ("tokens_per_sec", args.tokens_per_sec), ("reply_tokens", args.reply_tokens),
+    )]
+    before = previous_run(args.json)
+    baseline = {(r["target"], r["concurrency"]): r for r in (before or {}).get("results", [])}
+    if before:
+        print(f"Vergleich mit Commit {before.get('commit')} ({args.json})")
+
+    record = {
+        "commit": git_commit(),
+        "time": time.time(),
+        "stream": args.stream,
+        "mock": dict(zip(("latency_ms", "jitter_ms", "tokens_per_sec", "reply_tokens"),
+                         (args.latency_ms, args.jitter_ms, args.tokens_per_sec, args.reply_tokens))),
+        "results": [],
+    }
+    payloads = Payloads()
+    procs = Processes(mock_args)
+    try:
+        bases = {}
+        for target in targets:
+            kind = "handler" if target == "handler" else "fastapi"
+            if kind not in bases:
+                bases[kind] = procs.start_target(kind)
+            base = bases[kind]
+            # Aufwärmen: Lazy-Imports, OpenAI-Client, Tenant-Aufbau
+            await run_level(base, target, 2, 4, payloads, args.stream)
+            for concurrency in levels:
+                calls = procs.mock_calls()
+                total = max(args.requests, 4 * concurrency)
+                if target == "mixed":
+                    results = await asyncio.gather(
+                        run_level(base, "chat", concurrency, total, payloads, args.stream),
+                        run_level(base, "booking", 2, max(20, total // 8), payloads, False),
+                    )
+                    for result, name in zip(results, ("mixed-chat", "mixed-booking")):
+                        result["target"] = name
+                else:
+                    results = [await run_level(base, target, concurrency, total, payloads, args.stream)]
+                results[0]["upstream_calls"] = procs.mock_calls() - calls
+                for result in results:
+                    record["results"].append(result)
+                    print_result(result, baseline.get((result["target"], concurrency)))
+    finally:
+        procs.close()
+
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--serve-handler":
+        serve_handler(int(sys.argv[2]))
+        raise SystemExit
+    parser = argparse.ArgumentParser(description="Lasttest gegen lokalen OpenAI-Mock")
+    parser.add_argument("--targets", default=",".join(TARGETS))
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=200, help="Anfragen je Ziel und Stufe (mind. 4 × Parallelität)")
+    parser.add_argument("--stream", action="store_true", help="Chat-Antworten als SSE anfordern")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--tokens-per-sec", type=float, default=1000)
+    parser.add_argument("--reply-tokens", type=int, default=40)
+    parser.add_argument("--json", help="Ergebnis als JSON-Zeile anhängen und mit dem letzten Lauf vergleichen")
+    asyncio.run(main(parser.parse_args()))
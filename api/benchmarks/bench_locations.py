@@ -0,0 +1,60 @@
+# benchmarks/bench_locations.py
+"""Micro-Benchmark: alte PRAXEN-Schleife vs. vorkompilierter LocationMatcher.
+
+Aufruf (aus api/):  python benchmarks/bench_locations.py [anzahl_praxen ...]
+"""
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from locations import LocationMatcher
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "config.json")
+
+MESSAGES = [
+    "was kostet botox in mannheim?",
+    "habt ihr auch termine in dortmund oder wiesbaden",
+    "wie sind die öffnungszeiten",
+    "ich wohne in der nähe von 68167",
+    "gibt es eine praxis in mannhiem",
+]
+
+
+def legacy_select(praxen, user_message):
+    """Bisherige Erkennung aus do_POST."""
+    for key, praxis in praxen.items():
+        if key in user_message or praxis["name"].lower() in user_message:
+            return key
+    return None
+
+
+def synthetic_praxen(n):
+    rnd = random.Random(42)
+    praxen = {}
+    for i in range(n):
+        city = "".join(rnd.choice("abcdefghiklmnoprstuw") for _ in range(rnd.randint(6, 11)))
+        praxen[city] = {
+            "name": f"Liquid Aesthetik {city.capitalize()}",
+            "adresse": f"Hauptstraße {i}, {10000 + i} {city.capitalize()}",
+        }
+    return praxen
+
+
+def run(label, praxen, aliases=None, number=2000):
+    matcher = LocationMatcher(praxen, aliases)
+    msgs = [m.lower() for m in MESSAGES]
+    legacy = timeit.timeit(lambda: [legacy_select(praxen, m) for m in msgs], number=number)
+    compiled = timeit.timeit(lambda: [matcher.best(m) for m in msgs], number=number)
+    per = number * len(msgs)
+    print(f"{label:>14}: Schleife {legacy / per * 1e6:7.2f} µs  |  Matcher {compiled / per * 1e6:7.2f} µs  pro Nachricht")
+
+
+if __name__ == "__main__":
+    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    run("config.json", config["praxen"], config.get("standort_aliase"))
+    for n in [int(a) for a in sys.argv[1:]] or [100, 500, 2000]:
+        run(f"{n} Praxen", synthetic_praxen(n), number=200)
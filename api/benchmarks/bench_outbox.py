@@ -0,0 +1,76 @@
+# benchmarks/bench_outbox.py
+"""Benchmark: E-Mails pro Sekunde – Outbox-Worker mit einer SMTP-Sitzung vs.
+eine neue Verbindung pro Mail (bisheriges send_email).
+
+Braucht einen lokalen SMTP-Ersatz:  pip install aiosmtpd
+Aufruf (aus api/):  python benchmarks/bench_outbox.py [anzahl]
+"""
+import os
+import smtplib
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from aiosmtpd.controller import Controller
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from booking.email_utils import SMTPSession, build_message
+from booking.models import Base, EmailOutbox
+from booking.outbox import OutboxWorker, enqueue_email
+
+
+class CountingHandler:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+def connect_per_mail(host, port, n):
+    for i in range(n):
+        msg = build_message(f"kunde{i}@example.com", "Terminbestätigung", "Hallo!", "bench@localhost")
+        with smtplib.SMTP(host, port) as server:
+            server.sendmail("bench@localhost", [msg["To"]], msg.as_string())
+
+
+def outbox(host, port, n):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/outbox.db")
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            for i in range(n):
+                enqueue_email(db, f"kunde{i}@example.com", "Terminbestätigung", "Hallo!")
+            db.commit()
+        smtp = SMTPSession(host=host, port=port, user=None, password=None,
+                           starttls=False, sender="bench@localhost")
+        worker = OutboxWorker(Session, smtp=smtp, batch_size=100)
+        t = time.perf_counter()
+        worker.drain()
+        elapsed = time.perf_counter() - t
+        smtp.close()
+        with Session() as db:
+            sent = db.query(func.count(EmailOutbox.id)).filter(EmailOutbox.status == "sent").scalar()
+        engine.dispose()
+        return elapsed, sent
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    handler = CountingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=8025)
+    controller.start()
+    try:
+        t = time.perf_counter()
+        connect_per_mail("127.0.0.1", 8025, n)
+        old = time.perf_counter() - t
+        new, sent = outbox("127.0.0.1", 8025, n)
+        print(f"Verbindung pro Mail: {n / old:8.0f} Mails/s")
+        print(f"Outbox + Sitzung:    {n / new:8.0f} Mails/s  ({sent}/{n} als 'sent' markiert)")
+        print(f"SMTP-Ersatz hat {handler.received} Mails erhalten")
+    finally:
+        controller.stop()
@@ -0,0 +1,109 @@
+# benchmarks/bench_reminders.py
+"""Benchmark: Erinnerungslauf (booking/reminders.py) mit vielen fälligen Terminen.
+
+Füllt eine temporäre SQLite-Datei mit --due Terminen in den nächsten 24 h und
+--other Terminen außerhalb des Fensters, dann:
+1. zwei Blöcke beanspruchen (abgebrochener Lauf), danach ein voller Lauf –
+   gemessen: Termine/s bis alles in der Outbox liegt;
+2. ein zweiter Lauf (muss 0 liefern);
+3. Outbox über eine SMTP-Sitzung an einen lokalen SMTP-Ersatz leeren –
+   gemessen: Mails/s, und ob jeder Termin genau eine Mail bekommen hat.
+
+Braucht einen lokalen SMTP-Ersatz:  pip install aiosmtpd
+Aufruf (aus api/):  python benchmarks/bench_reminders.py [--due 20000] [--other 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from aiosmtpd.controller import Controller
+from sqlalchemy import func, insert
+from sqlalchemy.orm import sessionmaker
+
+from db import make_engine
+from booking.availability import PRAXEN
+from booking.email_utils import SMTPSession
+from booking.models import Appointment, Base, Customer, EmailOutbox
+from booking.outbox import OutboxWorker
+from booking.reminders import ReminderJob
+
+SERVICES = ["B. Botox", "Lippen 1 ml", "Profhilo", "Microneedling"]
+
+
+class CountingHandler:
+    def __init__(self):
+        self.recipients = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.recipients.extend(envelope.rcpt_tos)
+        return "250 OK"
+
+
+def seed(engine, now, due, other):
+    rnd = random.Random(1)
+    praxen = list(PRAXEN)
+    with engine.begin() as conn:
+        conn.execute(insert(Customer), [{"name": f"Kunde {i}", "email": f"kunde{i}@example.com"}
+                                        for i in range(1, due + 1)])
+        rows = [{"service": rnd.choice(SERVICES), "praxis": rnd.choice(praxen), "customer_id": i,
+                 "date": now + timedelta(seconds=rnd.randrange(60, 24 * 3600)), "status": "gebucht"}
+                for i in range(1, due + 1)]
+        rows += [{"service": rnd.choice(SERVICES), "praxis": rnd.choice(praxen), "customer_id": rnd.randint(1, due),
+                  "date": now + timedelta(days=rnd.choice([-1, 1]) * rnd.uniform(1.1, 365)), "status": "gebucht"}
+                 for _ in range(other)]
+        conn.execute(insert(Appointment), rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--due", type=int, default=20_000)
+    parser.add_argument("--other", type=int, default=100_000)
+    parser.add_argument("--chunk", type=int, default=1000)
+    parser.add_argument("--outbox-batch", type=int, default=500)
+    args = parser.parse_args()
+
+    handler = CountingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=8025)
+    controller.start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = make_engine(f"sqlite:///{tmp}/reminders.db")
+            Base.metadata.create_all(engine)
+            now = datetime.now()
+            seed(engine, now, args.due, args.other)
+            Session = sessionmaker(bind=engine)
+            job = ReminderJob(Session, hours=24, chunk=args.chunk)
+
+            t = time.perf_counter()
+            partial = job.run_chunk(now) + job.run_chunk(now)
+            rest = job.run(now)
+            enqueue = time.perf_counter() - t
+            again = job.run(now)
+            print(f"Erinnerungen: {partial} (abgebrochen) + {rest} = {partial + rest}/{args.due} fällig, "
+                  f"{(partial + rest) / enqueue:8.0f} Termine/s, zweiter Lauf {again}")
+
+            smtp = SMTPSession(host="127.0.0.1", port=8025, user=None, password=None,
+                               starttls=False, sender="bench@localhost")
+            worker = OutboxWorker(Session, smtp=smtp, batch_size=args.outbox_batch)
+            t = time.perf_counter()
+            drained = worker.drain()
+            send = time.perf_counter() - t
+            smtp.close()
+            with Session() as db:
+                sent = db.query(func.count(EmailOutbox.id)).filter(EmailOutbox.status == "sent").scalar()
+                reminded = db.query(func.count(Appointment.id)).filter(Appointment.reminded_at.isnot(None)).scalar()
+            engine.dispose()
+        print(f"Versand:      {drained} Mails in {send:.1f} s ({drained / send:6.0f} Mails/s), {sent} als 'sent'")
+        print(f"Termine mit reminded_at {reminded}, SMTP-Ersatz: {len(handler.recipients)} Mails an "
+              f"{len(set(handler.recipients))} verschiedene Empfänger")
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/bench_responses.py
+"""Micro-Benchmark der Antwort-Schicht (responses.py) an typischen Payloads.
+
+Je Payload: Kodieren mit json.dumps (bisher in chat.py bzw. FastAPIs
+JSONResponse) vs. responses.dumps (orjson, falls installiert), dazu Größe und
+Zeit für gzip (und br, falls brotli installiert ist) ab COMPRESS_MIN_BYTES.
+
+Payloads: Chat-Antwort, Health-Route, Slots einer Woche (wie /slots nach
+jsonable_encoder), Terminliste mit 500 Einträgen.
+
+Aufruf (aus api/):  python benchmarks/bench_responses.py [--seconds 0.5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_startup import API_DIR  # noqa: E402
+
+sys.path.insert(0, API_DIR)
+import responses  # noqa: E402
+
+REPLY = ("Für Botox an der Stirn liegt der Preis bei 149 €. Die Wirkung setzt nach 3–5 Tagen ein und hält "
+         "etwa 3–4 Monate. Für eine persönliche Beratung oder einen Termin melde dich gern bei uns.")
+
+
+def payloads():
+    start = datetime(2026, 11, 2, 10, 0)
+    slots = {
+        "praxis": "mannheim", "service": "B. Botox", "duration_minutes": 30,
+        "days": [{"date": (start + timedelta(days=d)).date().isoformat(),
+                  "slots": [(start + timedelta(days=d, minutes=15 * i)).isoformat() for i in range(32)]}
+                 for d in range(7)],
+    }
+    health = {
+        "status": "ok",
+        "cache": {"hits": 1234, "misses": 567, "size": 890, "hit_rate": 0.685},
+        "upstream": {"inflight": 3, "max_inflight": 64, "shed": 12, "queued": 0},
+        "models": {m: {"state": "closed", "failures": 0, "p95_first_token": 0.812, "answers": 4567}
+                   for m in ("ft:gpt-4o-mini-2024-07-18:bareen::CW6GdbsO", "gpt-4o-mini")},
+        "sessions": {"active": 321, "max": 10000, "evicted": 4},
+        "policy": {"mode": "shadow", "checked": 9876, "agree": 9801},
+    }
+    listing = {
+        "items": [{"id": 100_000 + i, "service": "Lippen 1 ml", "praxis": "wiesbaden",
+                   "date": (start + timedelta(minutes=15 * i)).isoformat(), "status": "gebucht",
+                   "employee_id": i % 20, "employee_name": f"Mitarbeiterin {i % 20}",
+                   "customer_name": f"Kundin Müller {i}", "customer_email": f"kundin{i}@example.com",
+                   "customer_phone": "0157 – 880 588 48", "created_at": start.isoformat()}
+                  for i in range(500)],
+        "next_cursor": "MjAyNi0xMS0wN1QxMDowMDowMHwxMDA1MDA",
+    }
+    return {"chat": {"reply": REPLY, "source": "model"}, "health": health, "slots (7 Tage)": slots,
+            "Terminliste (500)": listing}
+
+
+def rate(fn, seconds):
+    n, start = 0, time.perf_counter()
+    while True:
+        for _ in range(20):
+            fn()
+        n += 20
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return elapsed / n * 1e6  # µs pro Aufruf
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=0.5)
+    args = parser.parse_args()
+
+    encodings = ["gzip"] + (["br"] if responses.brotli is not None else [])
+    print(f"orjson: {'ja' if responses.orjson is not None else 'nein (Fallback json)'}, "
+          f"brotli: {'ja' if responses.brotli is not None else 'nein'}, "
+          f"Kompression ab {responses.COMPRESS_MIN_BYTES} Bytes")
+    for name, body in payloads().items():
+        old = rate(lambda: json.dumps(body, ensure_ascii=False).encode("utf-8"), args.seconds)
+        new = rate(lambda: responses.dumps(body), args.seconds)
+        raw = responses.dumps(body)
+        line = f"{name:18} {len(raw):7} B  json {old:8.1f} µs  dumps {new:7.1f} µs ({old / new:4.1f}×)"
+        if len(raw) >= responses.COMPRESS_MIN_BYTES:
+            for encoding in encodings:
+                packed = responses.compress(raw, encoding)
+                took = rate(lambda: responses.compress(raw, encoding), args.seconds)
+                line += f"  {encoding} {len(packed):6} B ({len(packed) / len(raw):4.0%}) {took:6.1f} µs"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_retrieval.py
+"""Benchmark: Retrieval-Index mit synthetischen Seiten.
+
+Misst Vollaufbau, inkrementellen Aufbau (eine Seite geändert), Laden und
+Suchzeit (p50/p95) pro Anfrage.
+
+Aufruf (aus api/):  python benchmarks/bench_retrieval.py [anzahl_seiten]
+"""
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from retrieval import build_index, load_index
+
+WORDS = (
+    "hyaluron botox lippen faeden lifting wiesbaden mannheim dortmund termin praxis "
+    "beratung preis behandlung haut falten volumen kinn wangen nase augen microneedling "
+    "profhilo peeling kontakt anfahrt parken oeffnungszeiten nachbehandlung wirkung dauer "
+    "risiko schwellung ergebnis natuerlich frisch ml spritze kanuele betaeubung creme"
+).split()
+
+
+def synthetic_sources(pages: int, lines_per_page: int = 40, seed: int = 7) -> dict:
+    rnd = random.Random(seed)
+    # plus seltene Wörter, damit das Vokabular realistisch wächst
+    vocab = WORDS + [f"wort{i}" for i in range(pages * 5)]
+    return {
+        f"https://example.test/seite/{p}": "\n".join(
+            " ".join(rnd.choice(vocab) for _ in range(rnd.randint(6, 18)))
+            for _ in range(lines_per_page)
+        )
+        for p in range(pages)
+    }
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main(pages: int):
+    index_dir = tempfile.mkdtemp(prefix="retrieval-bench-")
+    try:
+        sources = synthetic_sources(pages)
+
+        t = time.perf_counter()
+        stats = build_index(sources, index_dir)
+        full = time.perf_counter() - t
+
+        sources[next(iter(sources))] += "\nneue zeile zur tiefgarage"
+        t = time.perf_counter()
+        build_index(sources, index_dir)
+        incremental = time.perf_counter() - t
+
+        t = time.perf_counter()
+        index = load_index(index_dir)
+        index.retrieve("warmup")
+        load = time.perf_counter() - t
+
+        rnd = random.Random(1)
+        queries = [" ".join(rnd.sample(WORDS, rnd.randint(2, 6))) for _ in range(500)]
+        timings = []
+        for q in queries:
+            t = time.perf_counter()
+            index.retrieve(q, 3)
+            timings.append((time.perf_counter() - t) * 1000)
+
+        print(f"{pages} Seiten → {stats['docs']} Abschnitte, {stats['terms']} Wörter")
+        print(f"  Vollaufbau      {full:7.2f} s")
+        print(f"  Inkrementell    {incremental:7.2f} s (1 Seite geändert)")
+        print(f"  Laden + 1. Suche {load * 1000:6.1f} ms")
+        print(f"  Suche p50 {statistics.median(timings):.3f} ms  p95 {percentile(timings, 0.95):.3f} ms")
+    finally:
+        shutil.rmtree(index_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    for n in [int(a) for a in sys.argv[1:]] or [200, 5000]:
+        main(n)
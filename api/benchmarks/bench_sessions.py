@@ -0,0 +1,79 @@
+# benchmarks/bench_sessions.py
+"""Benchmark: Speicher und Zeit des Session-Stores.
+
+Legt N aktive Sitzungen mit je R Runden an (typische Frage-/Antwortlängen)
+und misst Speicher per tracemalloc, Zeit pro append/history und – mit
+SQLite – den Durchsatz der zweiten Stufe.
+
+Aufruf (aus api/):  python benchmarks/bench_sessions.py [sitzungen] [runden]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from sessions import SessionStore, SQLiteSessionStore  # noqa: E402
+
+QUESTIONS = [
+    "Was kostet eine Lippenbehandlung mit 1 ml?",
+    "Habt ihr auch Termine in Mannheim am Samstag?",
+    "Wie lange hält Botox ungefähr?",
+    "und in Dortmund?",
+    "Tut die Behandlung weh?",
+]
+ANSWER = (
+    "Eine Lippenbehandlung mit 1 ml kostet bei uns 249 €. Die Wirkung hält in der Regel "
+    "sechs bis zwölf Monate. Für eine persönliche Beratung oder einen Termin melde dich gern "
+    "direkt bei uns – wir nehmen uns Zeit für deine Fragen."
+)
+
+
+def fill(store, sessions, rounds, rnd):
+    ids = [f"sess{i:08d}" for i in range(sessions)]
+    t = time.perf_counter()
+    for r in range(rounds):
+        for sid in ids:
+            # eigene String-Objekte je Runde, wie bei echten Anfragen
+            store.append(sid, f"{rnd.choice(QUESTIONS)} ({r})", f"{ANSWER} [{sid}]", "mannheim" if r % 2 else None)
+    return ids, (time.perf_counter() - t) / (sessions * rounds)
+
+
+def main(sessions, rounds):
+    rnd = random.Random(3)
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    store = SessionStore(maxsize=sessions)
+    ids, append = fill(store, sessions, rounds, rnd)
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    t = time.perf_counter()
+    for sid in ids[:2000]:
+        store.history(sid)
+    history = (time.perf_counter() - t) / min(2000, len(ids))
+
+    print(f"{sessions} Sitzungen × {rounds} Runden (im Prozess)")
+    print(f"  Speicher gesamt     {used / 2**20:7.1f} MiB  ({used / sessions / 1024:.2f} KiB pro Sitzung)")
+    print(f"  append              {append * 1e6:7.1f} µs")
+    print(f"  history             {history * 1e6:7.1f} µs")
+    print(f"  {store.stats()}")
+
+    from sqlalchemy import create_engine
+
+    path = os.path.join(tempfile.mkdtemp(prefix="sessions-bench-"), "sessions.db")
+    sqlite = SessionStore(maxsize=sessions, store=SQLiteSessionStore(create_engine(f"sqlite:///{path}")))
+    n = min(sessions, 1000)
+    ids, append = fill(sqlite, n, 2, rnd)
+    sqlite._data.clear()  # zweite Stufe erzwingen
+    t = time.perf_counter()
+    for sid in ids:
+        sqlite.history(sid)
+    cold = (time.perf_counter() - t) / n
+    print(f"mit SQLite ({n} Sitzungen): append {append * 1e3:.2f} ms, history aus DB {cold * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000, int(sys.argv[2]) if len(sys.argv) > 2 else 5)
@@ -0,0 +1,72 @@
+# benchmarks/bench_startup.py
+"""Kaltstart-Benchmark für die Vercel-Funktion (api/chat.py).
+
+Startet je Lauf einen frischen Interpreter mit `python -X importtime` und
+wertet die kumulierte Importzeit von `chat` aus, dazu die Wall-Clock-Zeit bis
+zum fertigen Import. Mit `--json DATEI` wird eine Zeile pro Aufruf angehängt
+(inkl. Git-Commit), um Kaltstarts über Commits zu verfolgen.
+
+Aufruf (aus api/):  python benchmarks/bench_startup.py [--runs 10] [--json startup.jsonl]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+API_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def run_once(module: str, env: dict):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=API_DIR, env=env, capture_output=True, text=True,
+    )
+    wall = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    # Format: "import time: self [us] | cumulative | imported package"
+    for line in reversed(proc.stderr.splitlines()):
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000, wall
+    raise RuntimeError(f"{module} nicht in der importtime-Ausgabe")
+
+
+def measure(module: str, runs: int, **env_overrides):
+    env = {**os.environ, **env_overrides}
+    results = [run_once(module, env) for _ in range(runs)]
+    return (
+        statistics.median(r[0] for r in results),
+        statistics.median(r[1] for r in results),
+    )
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=API_DIR, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="chat")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--json", help="Ergebnis als JSON-Zeile anhängen")
+    args = parser.parse_args()
+
+    record = {"commit": git_commit(), "module": args.module, "time": time.time()}
+    for label, overrides in [("snapshot", {"CONFIG_SNAPSHOT": "1"}), ("ohne_snapshot", {"CONFIG_SNAPSHOT": "0"})]:
+        imp, wall = measure(args.module, args.runs, **overrides)
+        record[label] = {"import_ms": round(imp, 2), "wall_ms": round(wall, 2)}
+        print(f"{label:>14}: import {imp:7.2f} ms  |  Prozess gesamt {wall:7.2f} ms  (Median aus {args.runs})")
+
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
@@ -0,0 +1,78 @@
+# benchmarks/bench_tenants.py
+"""Benchmark: viele Mandanten in einem Prozess.
+
+Legt N Mandanten nach dem Muster von config.json an und misst
+Ladezeit (kalt), Lookup (warm) und Speicher mit begrenztem LRU.
+
+Aufruf (aus api/):  python benchmarks/bench_tenants.py [mandanten] [lru_groesse]
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from config_snapshot import ConfigProvider  # noqa: E402
+from tenants import Tenant, TenantRegistry  # noqa: E402
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "config.json")
+
+
+def write_tenants(directory, n, base):
+    for i in range(n):
+        config = dict(base)
+        config["tenant"] = {"name": f"Praxis {i}", "hosts": [f"chat.praxis{i}.de"]}
+        config["praxen"] = {
+            f"{key}{i}": {**praxis, "name": f"{praxis['name']} {i}"} for key, praxis in base["praxen"].items()
+        }
+        with open(os.path.join(directory, f"praxis{i}.json"), "w", encoding="utf-8") as f:
+            json.dump(config, f, ensure_ascii=False)
+
+
+def main(n, lru):
+    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    directory = tempfile.mkdtemp(prefix="tenants-bench-")
+    try:
+        write_tenants(directory, n, base)
+        tracemalloc.start()
+        default = ConfigProvider(
+            CONFIG_PATH,
+            lambda config, version, _: Tenant("liquid", config, version, "System", {"name": "Liquid"}, "gpt-4o-mini"),
+            snapshot_path=None,
+        )
+        t = time.perf_counter()
+        registry = TenantRegistry(default, directory, maxsize=lru)
+        scan = time.perf_counter() - t
+
+        t = time.perf_counter()
+        for i in range(n):
+            registry.resolve(f"chat.praxis{i}.de")
+        cold = (time.perf_counter() - t) / n
+
+        hot = [f"chat.praxis{i}.de" for i in range(min(lru, n))]
+        for host in hot:
+            registry.resolve(host)
+        t = time.perf_counter()
+        for _ in range(20):
+            for host in hot:
+                registry.resolve(host)
+        warm = (time.perf_counter() - t) / (20 * len(hot))
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"{n} Mandanten, LRU {lru}")
+        print(f"  Host-Scan beim Start  {scan * 1000:7.1f} ms")
+        print(f"  Mandant laden (kalt)  {cold * 1000:7.2f} ms")
+        print(f"  Lookup (warm)         {warm * 1e6:7.2f} µs")
+        print(f"  Speicher              {current / 2**20:7.1f} MiB (Spitze {peak / 2**20:.1f} MiB)")
+        print(f"  {registry.stats()}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200, int(sys.argv[2]) if len(sys.argv) > 2 else 32)
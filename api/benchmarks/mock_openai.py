@@ -0,0 +1,207 @@
+# benchmarks/mock_openai.py
+"""Lokaler Ersatz für die OpenAI-API (nur /v1/chat/completions).
+
+Antwortet nach einer einstellbaren Wartezeit (Zeit bis zum ersten Token)
+mit einem Text fester Länge, als JSON oder – bei `"stream": true` – als
+SSE-Chunks im Tempo MOCK_TOKENS_PER_SEC, inkl. Usage-Chunk am Ende. Damit
+lassen sich chat.py und main.py ohne API-Kosten unter Last setzen:
+
+    python benchmarks/mock_openai.py --port 8900
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1 OPENAI_API_KEY=mock uvicorn main:app
+
+Einstellungen per ENV oder Argument: MOCK_LATENCY_MS (300), MOCK_JITTER_MS (50),
+MOCK_TOKENS_PER_SEC (60), MOCK_REPLY_TOKENS (60), MOCK_ERROR_RATE (0.0).
+Ausreißer: MOCK_SPIKE_RATE (0.0) der Aufrufe warten zusätzlich MOCK_SPIKE_MS
+(3000). Fehler und Ausreißer treffen nur Modelle, die mit MOCK_FAULT_MODEL
+beginnen (leer = alle) – so lässt sich das Fallback-Modell gesund halten.
+GET /stats liefert die Zahl der Aufrufe (auch je Modell), POST /settings
+ändert Einstellungen im laufenden Betrieb (z. B. {"error_rate": 1.0}).
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = (
+    "Gern helfe ich dir weiter . Für eine persönliche Beratung kannst du jederzeit "
+    "einen Termin in einer unserer Praxen vereinbaren , wir nehmen uns Zeit für deine Fragen"
+).split()
+
+
+class MockSettings:
+    def __init__(self, latency_ms=None, jitter_ms=None, tokens_per_sec=None, reply_tokens=None, error_rate=None,
+                 spike_rate=None, spike_ms=None, fault_model=None):
+        env = os.environ.get
+        self.latency_ms = float(latency_ms if latency_ms is not None else env("MOCK_LATENCY_MS", 300))
+        self.jitter_ms = float(jitter_ms if jitter_ms is not None else env("MOCK_JITTER_MS", 50))
+        self.tokens_per_sec = float(tokens_per_sec if tokens_per_sec is not None else env("MOCK_TOKENS_PER_SEC", 60))
+        self.reply_tokens = int(reply_tokens if reply_tokens is not None else env("MOCK_REPLY_TOKENS", 60))
+        self.error_rate = float(error_rate if error_rate is not None else env("MOCK_ERROR_RATE", 0.0))
+        self.spike_rate = float(spike_rate if spike_rate is not None else env("MOCK_SPIKE_RATE", 0.0))
+        self.spike_ms = float(spike_ms if spike_ms is not None else env("MOCK_SPIKE_MS", 3000))
+        self.fault_model = fault_model if fault_model is not None else env("MOCK_FAULT_MODEL", "")
+
+    def update(self, values: dict):
+        for name, value in values.items():
+            if name in vars(self):
+                setattr(self, name, type(getattr(self, name))(value))
+
+    def faulty(self, model: str) -> bool:
+        return model.startswith(self.fault_model)
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-Alive wie bei der echten API
+    server_version = "mock-openai"
+    disable_nagle_algorithm = True  # Header und Body getrennt geschrieben – sonst +40 ms (Delayed ACK)
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status, body):
+        raw = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        try:
+            self.wfile.write(raw)
+        except (BrokenPipeError, ConnectionResetError):  # Client hat abgebrochen (z. B. Hedge verloren)
+            self.close_connection = True
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/stats"):
+            self._json(200, self.server.stats())
+        else:
+            self._json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("content-length", "0"))) or b"{}")
+        if self.path.rstrip("/").endswith("/settings"):
+            self.server.settings.update(body)
+            self._json(200, self.server.settings.as_dict())
+            return
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._json(404, {"error": {"message": "not found"}})
+            return
+        settings = self.server.settings
+        model = body.get("model", "mock")
+        faulty = settings.faulty(model)
+        self.server.count("requests", model)
+        delay = max(0.0, settings.latency_ms + random.uniform(-1, 1) * settings.jitter_ms) / 1000
+        if faulty and settings.spike_rate and random.random() < settings.spike_rate:
+            self.server.count("spikes", model)
+            delay += settings.spike_ms / 1000
+        time.sleep(delay)
+        if faulty and settings.error_rate and random.random() < settings.error_rate:
+            self.server.count("errors", model)
+            self._json(500, {"error": {"message": "mock error", "type": "server_error"}})
+            return
+
+        prompt = sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 4
+        tokens = [WORDS[i % len(WORDS)] + " " for i in range(settings.reply_tokens)]
+        usage = {"prompt_tokens": prompt, "completion_tokens": len(tokens),
+                 "total_tokens": prompt + len(tokens)}
+        cid = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        if body.get("stream"):
+            self._stream(cid, created, model, tokens, usage, body.get("stream_options") or {})
+            return
+        time.sleep(len(tokens) / settings.tokens_per_sec)  # ganze Antwort erst nach der Generierung
+        self._json(200, {
+            "id": cid, "object": "chat.completion", "created": created, "model": model,
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": "".join(tokens).strip()}}],
+            "usage": usage,
+        })
+
+    def _stream(self, cid, created, model, tokens, usage, options):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")  # ohne Content-Length endet der Stream mit der Verbindung
+        self.end_headers()
+        self.close_connection = True
+
+        def chunk(delta, finish=None, **extra):
+            data = {"id": cid, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish}] if delta is not None else [],
+                    **extra}
+            self.wfile.write(b"data: " + json.dumps(data).encode("utf-8") + b"\n\n")
+            self.wfile.flush()
+
+        pause = 1 / self.server.settings.tokens_per_sec
+        try:
+            chunk({"role": "assistant", "content": ""})
+            for token in tokens:
+                time.sleep(pause)
+                chunk({"content": token})
+            chunk({}, "stop")
+            if options.get("include_usage"):
+                chunk(None, usage=usage)
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.server.count("aborted", model)
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512
+
+    def __init__(self, address=("127.0.0.1", 0), settings: MockSettings | None = None):
+        super().__init__(address, MockHandler)
+        self.settings = settings or MockSettings()
+        self._counts = {"requests": 0, "errors": 0, "spikes": 0, "aborted": 0}
+        self._models = {}  # modell -> {zähler: n}
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def count(self, name, model=None):
+        with self._lock:
+            self._counts[name] += 1
+            if model is not None:
+                per_model = self._models.setdefault(model, {})
+                per_model[name] = per_model.get(name, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = {m: dict(c) for m, c in self._models.items()}
+            return {**self._counts, "models": models, "settings": self.settings.as_dict()}
+
+    def start(self):
+        """Im Hintergrund-Thread starten (für den Lasttest im selben Prozess)."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lokaler OpenAI-Mock für Lasttests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float)
+    parser.add_argument("--jitter-ms", type=float)
+    parser.add_argument("--tokens-per-sec", type=float)
+    parser.add_argument("--reply-tokens", type=int)
+    parser.add_argument("--error-rate", type=float)
+    parser.add_argument("--spike-rate", type=float, help="Anteil der Aufrufe mit zusätzlicher Wartezeit")
+    parser.add_argument("--spike-ms", type=float)
+    parser.add_argument("--fault-model", help="Fehler/Ausreißer nur für Modelle mit diesem Präfix")
+    args = parser.parse_args()
+    server = MockOpenAIServer((args.host, args.port), MockSettings(
+        args.latency_ms, args.jitter_ms, args.tokens_per_sec, args.reply_tokens, args.error_rate,
+        args.spike_rate, args.spike_ms, args.fault_model))
+    print(f"🧪 OpenAI-Mock auf {server.base_url}  {server.settings.as_dict()}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,238 @@
+# booking/availability.py
+"""Freie Termin-Slots: eine Bereichsabfrage pro Praxis/Zeitraum, danach ein
+Sweep über die sortierten Termine im Speicher. Ergebnisse werden gecacht und
+beim Commit eines Termins für diese Praxis/diesen Tag verworfen."""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, time as dtime, timedelta
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from .models import Appointment
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "config.json")
+WEEKDAYS = ["mo", "di", "mi", "do", "fr", "sa", "so"]
+INACTIVE_STATUS = ("storniert",)
+SLOT_CACHE_TTL = float(os.getenv("SLOT_CACHE_TTL", 60))
+SLOT_CACHE_MAX = int(os.getenv("SLOT_CACHE_MAX", 4096))  # (praxis, tag)-Einträge
+
+
+def _load_booking_config():
+    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    return config.get("praxen", {}), config.get("buchung", {})
+
+
+PRAXEN, BUCHUNG = _load_booking_config()
+
+
+def _fold(text: str) -> str:
+    return (text or "").replace("\xad", "").strip().lower()
+
+
+_DURATIONS = {_fold(k): v for k, v in BUCHUNG.get("dauer", {}).items()}
+
+
+def service_duration(service: str) -> int:
+    """Dauer in Minuten: exakter Name, sonst längster passender Präfix ("Lippen 1 ml" → "Lippen")."""
+    name = _fold(service)
+    if name in _DURATIONS:
+        return _DURATIONS[name]
+    best = max((k for k in _DURATIONS if name.startswith(k)), key=len, default=None)
+    return _DURATIONS[best] if best else BUCHUNG.get("standard_dauer", 30)
+
+
+def max_duration() -> int:
+    """Längste konfigurierte Dauer – so weit kann ein früherer Termin hineinragen."""
+    return max([*_DURATIONS.values(), BUCHUNG.get("standard_dauer", 30)])
+
+
+def opening_hours(praxis: str, day: date) -> list:
+    """Öffnungszeiten eines Tages als Liste von (start, ende)-datetimes."""
+    zeiten = BUCHUNG.get("zeiten", {})
+    week = zeiten.get(praxis) or zeiten.get("default", {})
+    spec = week.get(WEEKDAYS[day.weekday()])
+    if not spec:
+        return []
+    out = []
+    for part in spec.split(","):
+        start, end = part.strip().split("-")
+        out.append((
+            datetime.combine(day, dtime.fromisoformat(start)),
+            datetime.combine(day, dtime.fromisoformat(end)),
+        ))
+    return out
+
+
+def busy_intervals(db: Session, praxis: str, start: datetime, end: datetime) -> list:
+    """Alle belegten Intervalle im Zeitraum – eine einzige, sortierte Bereichsabfrage.
+
+    Das Fenster beginnt eine Maximal-Dauer früher, damit Termine, die vor
+    `start` beginnen und hineinragen, mitkommen.
+    """
+    lookback = timedelta(minutes=max_duration())
+    rows = (
+        db.query(Appointment.date, Appointment.service)
+        .filter(
+            Appointment.praxis == praxis,
+            Appointment.date >= start - lookback,
+            Appointment.date < end,
+            Appointment.status.notin_(INACTIVE_STATUS),
+        )
+        .order_by(Appointment.date)
+        .all()
+    )
+    return [(d, d + timedelta(minutes=service_duration(s))) for d, s in rows]
+
+
+def sweep_free_slots(hours: list, busy: list, duration: int, step: int) -> list:
+    """Startzeiten, an denen `duration` Minuten frei sind.
+
+    `busy` muss nach Start sortiert sein; ein Zeiger wandert einmal durch die
+    Termine, statt für jeden Kandidaten neu zu suchen.
+    """
+    length = timedelta(minutes=duration)
+    grid = timedelta(minutes=step)
+    slots = []
+    i = 0
+    for open_start, open_end in hours:
+        t = open_start
+        while t + length <= open_end:
+            # Termine, die vor t enden, sind für alle weiteren Kandidaten erledigt
+            while i < len(busy) and busy[i][1] <= t:
+                i += 1
+            # nächster Termin, der mit [t, t+length) überlappt
+            j = i
+            clash = None
+            while j < len(busy) and busy[j][0] < t + length:
+                if busy[j][1] > t:
+                    clash = busy[j]
+                    break
+                j += 1
+            if clash:
+                # direkt hinter das Ende des Konflikts springen (auf dem Raster)
+                skip = clash[1] - open_start
+                t = open_start + -(-skip // grid) * grid
+                continue
+            slots.append(t)
+            t += grid
+    return slots
+
+
+class SlotCache:
+    """(praxis, tag, dauer) → Slots; wird beim Commit eines Termins invalidiert.
+
+    Schlüssel ist die aufgelöste Dauer, nicht der Service-Text – beliebige
+    Schreibweisen aus der Anfrage legen so keine neuen Einträge an. Höchstens
+    `max_days` (praxis, tag)-Einträge (LRU); beim Einfügen fliegen zuerst
+    abgelaufene, dann die am längsten unbenutzten.
+    """
+
+    def __init__(self, ttl: float = SLOT_CACHE_TTL, max_days: int = SLOT_CACHE_MAX):
+        self.ttl = ttl
+        self.max_days = max_days
+        self._data = OrderedDict()  # (praxis, tag) → {dauer: (ablauf, slots)}
+        self._lock = threading.Lock()
+
+    def get(self, praxis, day, duration):
+        with self._lock:
+            per_day = self._data.get((praxis, day))
+            entry = per_day.get(duration) if per_day else None
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del per_day[duration]
+                return None
+            self._data.move_to_end((praxis, day))
+            return entry[1]
+
+    def set(self, praxis, day, duration, slots):
+        now = time.time()
+        with self._lock:
+            key = (praxis, day)
+            per_day = self._data.get(key)
+            if per_day is None:
+                if len(self._data) >= self.max_days:
+                    self._evict(now)
+                per_day = self._data[key] = {}
+            per_day[duration] = (now + self.ttl, slots)
+            self._data.move_to_end(key)
+
+    def _evict(self, now):
+        for key in [k for k, per_day in self._data.items() if all(e[0] <= now for e in per_day.values())]:
+            del self._data[key]
+        while len(self._data) >= self.max_days:
+            self._data.popitem(last=False)
+
+    def invalidate(self, praxis, day):
+        with self._lock:
+            self._data.pop((praxis, day), None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+slot_cache = SlotCache()
+
+
+@event.listens_for(Appointment.date, "set", active_history=True)
+@event.listens_for(Appointment.praxis, "set", active_history=True)
+def _keep_old_value(target, value, oldvalue, initiator):
+    """Alten Wert auch bei abgelaufenen Attributen laden – sonst fehlt er in der History."""
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_touched_days(session, flush_context):
+    touched = session.info.setdefault("slot_days", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(obj, Appointment):
+            continue
+        if obj.date is not None:
+            touched.add((obj.praxis, obj.date.date()))
+        # verschobener Termin: der alte Tag/die alte Praxis wird ebenfalls frei
+        attrs = inspect(obj).attrs
+        old_dates = [d for d in attrs.date.history.deleted if d is not None] or [obj.date]
+        old_praxen = attrs.praxis.history.deleted or [obj.praxis]
+        for praxis in old_praxen:
+            for d in old_dates:
+                if d is not None:
+                    touched.add((praxis, d.date()))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_touched_days(session):
+    for praxis, day in session.info.pop("slot_days", ()):
+        slot_cache.invalidate(praxis, day)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_touched_days(session):
+    session.info.pop("slot_days", None)
+
+
+def free_slots(db: Session, praxis: str, start_day: date, days: int, service: str) -> list:
+    """[(tag, [slots])] für `days` Tage ab `start_day`, fehlende Tage mit einer Abfrage."""
+    step = BUCHUNG.get("raster_minuten", 15)
+    duration = service_duration(service)
+    now = datetime.now()
+    day_list = [start_day + timedelta(days=n) for n in range(days)]
+
+    result = {d: slot_cache.get(praxis, d, duration) for d in day_list}
+    missing = [d for d in day_list if result[d] is None]
+    if missing:
+        busy = busy_intervals(
+            db, praxis,
+            datetime.combine(missing[0], dtime.min),
+            datetime.combine(missing[-1] + timedelta(days=1), dtime.min),
+        )
+        for d in missing:
+            slots = sweep_free_slots(opening_hours(praxis, d), busy, duration, step)
+            slot_cache.set(praxis, d, duration, slots)
+            result[d] = slots
+
+    # Vergangene Slots erst beim Ausliefern filtern, damit der Cache gültig bleibt
+    return [(d, [s for s in result[d] if s > now]) for d in day_list]
@@ -0,0 +1,81 @@
+# booking/conflicts.py
+"""Konfliktprüfung für Buchungen: echte Intervall-Überlappung mit Dauer je
+Service, nur innerhalb derselben Praxis bzw. desselben Mitarbeiters, über die
+Indizes (praxis, date) / (employee_id, date) und unter einer Sperre in der
+laufenden Transaktion."""
+from datetime import timedelta
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .availability import INACTIVE_STATUS, max_duration, service_duration
+from .models import Appointment, BookingLock, Customer
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+def upsert_customer(db: Session, name: str, email: str, phone: str | None) -> Customer:
+    """Kunde über die (indizierte, kleingeschriebene) E-Mail finden oder anlegen."""
+    email = normalize_email(email)
+    customer = db.query(Customer).filter(Customer.email == email).first()
+    if customer:
+        return customer
+    try:
+        with db.begin_nested():
+            customer = Customer(name=name, email=email, phone=phone)
+            db.add(customer)
+    except IntegrityError:
+        # parallel angelegt – dann den vorhandenen nehmen
+        customer = db.query(Customer).filter(Customer.email == email).one()
+    return customer
+
+
+def lock_scopes(db: Session, praxis: str | None, employee_id: int | None):
+    """Sperrzeilen für Praxis/Mitarbeiter bis zum Commit belegen.
+
+    Das UPDATE nimmt in SQLite die Schreibsperre, in Postgres eine Zeilensperre –
+    eine zweite Buchung für denselben Bereich wartet, bis die erste durch ist.
+    Feste Reihenfolge, damit sich zwei Buchungen nicht gegenseitig blockieren.
+    """
+    scopes = [f"praxis:{praxis or '-'}"]
+    if employee_id is not None:
+        scopes.append(f"employee:{employee_id}")
+    for scope in sorted(scopes):
+        stmt = update(BookingLock).where(BookingLock.scope == scope).values(version=BookingLock.version + 1)
+        if db.execute(stmt).rowcount:
+            continue
+        try:
+            with db.begin_nested():
+                db.add(BookingLock(scope=scope, version=1))
+        except IntegrityError:
+            db.execute(stmt)
+
+
+def find_conflict(db: Session, praxis: str | None, employee_id: int | None, start, service: str):
+    """Erster überlappender Termin in derselben Praxis oder beim selben Mitarbeiter."""
+    end = start + timedelta(minutes=service_duration(service))
+    # Termine, die früher beginnen, können höchstens `max_duration` hineinragen
+    earliest = start - timedelta(minutes=max_duration())
+
+    scope = [Appointment.praxis == praxis]
+    if employee_id is not None:
+        scope.append(Appointment.employee_id == employee_id)
+
+    candidates = (
+        db.query(Appointment)
+        .filter(
+            or_(*scope),
+            Appointment.date > earliest,
+            Appointment.date < end,
+            Appointment.status.notin_(INACTIVE_STATUS),
+        )
+        .order_by(Appointment.date)
+        .all()
+    )
+    for appt in candidates:
+        if appt.date + timedelta(minutes=service_duration(appt.service)) > start:
+            return appt
+    return None
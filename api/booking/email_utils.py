@@ -1,5 +1,6 @@
 # booking/email_utils.py
 import smtplib
+import time
 from email.mime.text import MIMEText
 from email.utils import formataddr
 import os
@@ -8,21 +9,106 @@ SMTP_USER = os.getenv("SMTP_USER")
 SMTP_PASS = os.getenv("SMTP_PASS")
 SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
 SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") == "1"
+SMTP_SENDER = os.getenv("SMTP_SENDER") or SMTP_USER
 SENDER_NAME = "Liquid Aesthetik"
 
 
+def build_message(to: str, subject: str, body: str, sender: str | None = None) -> MIMEText:
+    msg = MIMEText(body, "plain", "utf-8")
+    msg["Subject"] = subject
+    msg["From"] = formataddr((SENDER_NAME, sender or SMTP_SENDER or ""))
+    msg["To"] = to
+    return msg
+
+
 def send_email(to: str, subject: str, body: str):
     """E-Mail senden – mit Fallback in Entwicklungsmodus"""
     if not SMTP_USER or not SMTP_PASS:
         print("[email] SMTP nicht konfiguriert – würde senden an:", to, subject)
         return
 
-    msg = MIMEText(body, "plain", "utf-8")
-    msg["Subject"] = subject
-    msg["From"] = formataddr((SENDER_NAME, SMTP_USER))
-    msg["To"] = to
+    msg = build_message(to, subject, body)
 
     with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
         server.starttls()
         server.login(SMTP_USER, SMTP_PASS)
         server.sendmail(SMTP_USER, [to], msg.as_string())
+
+
+class SMTPSession:
+    """Eine authentifizierte SMTP-Verbindung für viele Nachrichten.
+
+    Verbindet beim ersten Senden, prüft nach längerer Pause mit NOOP und
+    baut die Verbindung bei Bedarf neu auf.
+    """
+
+    IDLE_CHECK = 30  # Sekunden
+
+    def __init__(self, host=SMTP_SERVER, port=SMTP_PORT, user=SMTP_USER, password=SMTP_PASS,
+                 starttls=SMTP_STARTTLS, sender=SMTP_SENDER, timeout=30):
+        self.host, self.port = host, port
+        self.user, self.password = user, password
+        self.starttls = starttls
+        self.sender = sender or user or "noreply@localhost"
+        self.timeout = timeout
+        self._server = None
+        self._last_used = 0.0
+
+    @classmethod
+    def from_env(cls):
+        """SMTP laut ENV – ohne Zugangsdaten ein Dry-Run wie bei send_email."""
+        if not SMTP_USER or not SMTP_PASS:
+            return DryRunSMTPSession()
+        return cls()
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            server.starttls()
+        if self.user and self.password:
+            server.login(self.user, self.password)
+        self._server = server
+
+    def _alive(self):
+        try:
+            return self._server.noop()[0] == 250
+        except OSError:  # SMTPException ist ebenfalls ein OSError
+            return False
+
+    def send(self, to: str, subject: str, body: str):
+        idle = time.monotonic() - self._last_used > self.IDLE_CHECK
+        if self._server is None or (idle and not self._alive()):
+            self.close()
+            self._connect()
+        msg = build_message(to, subject, body, self.sender)
+        try:
+            self._server.sendmail(self.sender, [to], msg.as_string())
+        except OSError as exc:
+            # Nur bei verlorener Verbindung einmal neu verbinden; eine Ablehnung
+            # des Servers (SMTPDataError, SMTPRecipientsRefused …) geht an die
+            # Outbox, sonst käme die Mail womöglich doppelt an
+            if isinstance(exc, smtplib.SMTPException) and not isinstance(exc, smtplib.SMTPServerDisconnected):
+                raise
+            self.close()
+            self._connect()
+            self._server.sendmail(self.sender, [to], msg.as_string())
+        self._last_used = time.monotonic()
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+
+class DryRunSMTPSession:
+    """Entwicklungsmodus: nur loggen."""
+
+    def send(self, to: str, subject: str, body: str):
+        print("[email] SMTP nicht konfiguriert – würde senden an:", to, subject)
+
+    def close(self):
+        pass
@@ -0,0 +1,171 @@
+# booking/listing.py
+"""Terminliste für die Verwaltung: Filter, Keyset-Paginierung über (date, id)
+und Export.
+
+Statt OFFSET (die Datenbank liest alle übersprungenen Zeilen) setzt die
+nächste Seite direkt hinter dem letzten Termin der vorigen an – über den
+Index (praxis, date) bzw. (employee_id, date) bzw. (date) ist jede Seite gleich
+teuer, egal wie tief. Kunde und Mitarbeiter kommen per LEFT JOIN in derselben
+Abfrage mit (kein N+1).
+"""
+import base64
+import csv
+import io
+import json
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session, joinedload
+
+from .models import Appointment, Customer, Employee
+
+PAGE_MAX = 500
+EXPORT_BATCH = 1000
+_FORMULA_START = ("=", "+", "-", "@", "\t", "\r")
+EXPORT_FIELDS = ["id", "date", "service", "praxis", "status", "employee_id", "employee_name",
+                 "customer_name", "customer_email", "customer_phone", "created_at"]
+
+
+@dataclass(frozen=True)
+class AppointmentFilter:
+    praxis: str | None = None
+    date_from: date | None = None
+    date_to: date | None = None  # einschließlich
+    status: str | None = None
+    employee_id: int | None = None
+
+
+def encode_cursor(when: datetime, appointment_id: int) -> str:
+    raw = f"{when.isoformat()}|{appointment_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """(date, id) aus dem Cursor; ValueError bei Unsinn."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        when, appointment_id = raw.split("|")
+        return datetime.fromisoformat(when), int(appointment_id)
+    except Exception as exc:
+        raise ValueError("ungültiger Cursor") from exc
+
+
+def _filtered(stmt, flt: AppointmentFilter, after: tuple | None):
+    if flt.praxis:
+        stmt = stmt.where(Appointment.praxis == flt.praxis)
+    if flt.employee_id is not None:
+        stmt = stmt.where(Appointment.employee_id == flt.employee_id)
+    if flt.status:
+        stmt = stmt.where(Appointment.status == flt.status)
+    if flt.date_from:
+        stmt = stmt.where(Appointment.date >= datetime.combine(flt.date_from, time.min))
+    if flt.date_to:
+        stmt = stmt.where(Appointment.date < datetime.combine(flt.date_to + timedelta(days=1), time.min))
+    if after is not None:
+        when, appointment_id = after
+        # date >= x als Bereich auf dem Index, der Gleichstand über die id
+        stmt = stmt.where(Appointment.date >= when,
+                          or_(Appointment.date > when, and_(Appointment.date == when, Appointment.id > appointment_id)))
+    return stmt.order_by(Appointment.date, Appointment.id)
+
+
+def appointment_select(flt: AppointmentFilter, after: tuple | None = None):
+    """SELECT der Termine (Kunde/Mitarbeiter per joinedload), sortiert nach (date, id), ab hinter `after`."""
+    stmt = select(Appointment).options(joinedload(Appointment.customer), joinedload(Appointment.employee))
+    return _filtered(stmt, flt, after)
+
+
+def export_select(flt: AppointmentFilter, after: tuple | None = None):
+    """Wie appointment_select, aber nur Spalten (EXPORT_FIELDS) – ohne ORM-Objekte, für große Exporte."""
+    stmt = (
+        select(Appointment.id, Appointment.date, Appointment.service, Appointment.praxis, Appointment.status,
+               Appointment.employee_id, Employee.name.label("employee_name"),
+               Customer.name.label("customer_name"), Customer.email.label("customer_email"),
+               Customer.phone.label("customer_phone"), Appointment.created_at)
+        .outerjoin(Customer, Appointment.customer_id == Customer.id)
+        .outerjoin(Employee, Appointment.employee_id == Employee.id)
+    )
+    return _filtered(stmt, flt, after)
+
+
+def list_page(db: Session, flt: AppointmentFilter, cursor: str | None = None, limit: int = 50) -> tuple:
+    """(Termine, next_cursor) – next_cursor ist None auf der letzten Seite."""
+    after = decode_cursor(cursor) if cursor else None
+    limit = max(1, min(limit, PAGE_MAX))
+    rows = db.scalars(appointment_select(flt, after).limit(limit + 1)).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].date, rows[-1].id)
+
+
+def export_record(appt: Appointment) -> dict:
+    customer, employee = appt.customer, appt.employee
+    return {
+        "id": appt.id,
+        "date": appt.date.isoformat(),
+        "service": appt.service,
+        "praxis": appt.praxis,
+        "status": appt.status,
+        "employee_id": appt.employee_id,
+        "employee_name": employee.name if employee else None,
+        "customer_name": customer.name if customer else None,
+        "customer_email": customer.email if customer else None,
+        "customer_phone": customer.phone if customer else None,
+        "created_at": appt.created_at.isoformat() if appt.created_at else None,
+    }
+
+
+def iter_records(session_factory, flt: AppointmentFilter, batch: int = EXPORT_BATCH):
+    """Alle passenden Termine als dicts, seitenweise mit je einer kurzen Session.
+
+    Keine Transaktion bleibt über den ganzen Export offen (SQLite-WAL kann
+    sonst nicht checkpointen), und der Speicher hängt nur an `batch`.
+    """
+    after = None
+    while True:
+        with session_factory() as db:
+            rows = db.execute(export_select(flt, after).limit(batch)).all()
+        for row in rows:
+            record = row._asdict()
+            record["date"] = row.date.isoformat()
+            record["created_at"] = row.created_at.isoformat() if row.created_at else None
+            yield record
+        if len(rows) < batch:
+            return
+        after = (rows[-1].date, rows[-1].id)
+
+
+def iter_ndjson(records, chunk: int = EXPORT_BATCH):
+    """Eine JSON-Zeile pro Termin, in Blöcken von `chunk` Zeilen."""
+    lines = []
+    for record in records:
+        lines.append(json.dumps(record, ensure_ascii=False))
+        if len(lines) == chunk:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _csv_safe(value):
+    """Texte aus dem Buchungsformular, die Excel als Formel läse ("=HYPERLINK(…)"), mit ' entschärfen."""
+    if isinstance(value, str) and value.startswith(_FORMULA_START):
+        return "'" + value
+    return value
+
+
+def iter_csv(records, chunk: int = EXPORT_BATCH):
+    """CSV mit Kopfzeile, in Blöcken von `chunk` Zeilen (UTF-8 mit BOM für Excel, Formeln entschärft)."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, delimiter=";")
+    buffer.write("\ufeff")
+    writer.writeheader()
+    for n, record in enumerate(records, 1):
+        writer.writerow({k: _csv_safe(v) for k, v in record.items()})
+        if n % chunk == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
@@ -1,5 +1,6 @@
 # booking/models.py
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, delete, func, inspect, select, text, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import declarative_base, relationship
 from datetime import datetime
 
@@ -10,7 +11,7 @@ class Customer(Base):
     __tablename__ = "customers"
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
-    email = Column(String, nullable=False, unique=False)
+    email = Column(String, nullable=False, unique=True, index=True)  # immer kleingeschrieben
     phone = Column(String, nullable=True)
 
 
@@ -32,6 +33,92 @@ class Appointment(Base):
     customer_id = Column(Integer, ForeignKey("customers.id"))
     employee_id = Column(Integer, ForeignKey("employees.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    reminded_at = Column(DateTime, nullable=True)  # Erinnerung in die Outbox gelegt bzw. nicht nötig (UTC)
 
     customer = relationship("Customer")
     employee = relationship("Employee")
+
+    __table_args__ = (
+        Index("ix_appointments_praxis_date", "praxis", "date"),
+        Index("ix_appointments_employee_date", "employee_id", "date"),
+        Index("ix_appointments_date", "date"),  # Terminliste ohne Praxis-/Mitarbeiterfilter
+    )
+
+
+class BookingLock(Base):
+    """Eine Zeile pro Praxis/Mitarbeiter – serialisiert Buchungen im selben Bereich."""
+    __tablename__ = "booking_locks"
+    scope = Column(String, primary_key=True)  # "praxis:mannheim" / "employee:3"
+    version = Column(Integer, nullable=False, default=0)
+
+
+class EmailOutbox(Base):
+    """Ausgehende E-Mails – werden mit der Buchung committet und vom Worker versendet."""
+    __tablename__ = "email_outbox"
+    id = Column(Integer, primary_key=True)
+    recipient = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending/sending/sent/failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    claim = Column(String, nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next", "status", "next_attempt_at"),
+    )
+
+
+def merge_customer_emails(engine) -> int:
+    """Datenmigration für Kunden aus der Zeit vor der Kleinschreibung: E-Mails
+    kleinschreiben und Kunden mit gleicher E-Mail zusammenführen – Termine und
+    ggf. Telefonnummer gehen an den ältesten Kunden, die übrigen werden
+    gelöscht. Liefert die Anzahl gelöschter Dubletten; wiederholbar."""
+    key = func.lower(func.trim(Customer.email))
+    merged = 0
+    with engine.begin() as conn:
+        groups = conn.execute(
+            select(key, func.min(Customer.id)).group_by(key).having(func.count(Customer.id) > 1)
+        ).all()
+        for email, keep in groups:
+            dupes = conn.scalars(select(Customer.id).where(key == email, Customer.id != keep)).all()
+            conn.execute(update(Appointment).where(Appointment.customer_id.in_(dupes)).values(customer_id=keep))
+            phone = conn.scalar(select(Customer.phone).where(Customer.id.in_(dupes), Customer.phone.isnot(None))
+                                .order_by(Customer.id.desc()).limit(1))
+            if phone:
+                conn.execute(update(Customer).where(Customer.id == keep, Customer.phone.is_(None)).values(phone=phone))
+            conn.execute(delete(Customer).where(Customer.id.in_(dupes)))
+            merged += len(dupes)
+        conn.execute(update(Customer).where(Customer.email != key).values(email=key))
+    if merged:
+        print(f"🔧 [schema] {merged} doppelte Kunden zusammengeführt")
+    return merged
+
+
+def ensure_schema(engine):
+    """Spalten (nur nullable) und Indizes nachziehen, die create_all bei schon
+    vorhandenen Tabellen auslässt.
+
+    Unique-Indizes können an doppelten Altdaten scheitern – dann fehlt nur der
+    Index, der Start geht weiter (Daten vorher bereinigen, z. B. mit
+    merge_customer_emails)."""
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        missing = [c for c in table.columns if c.name not in existing and c.nullable]
+        if missing:
+            with engine.begin() as conn:
+                for column in missing:
+                    ddl = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {ddl}"))
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except IntegrityError as exc:
+                if not index.unique:
+                    raise
+                print(f"⚠️ [schema] {index.name} nicht angelegt (doppelte Werte):", exc.orig)
@@ -0,0 +1,157 @@
+# booking/outbox.py
+"""E-Mail-Outbox: die Buchung legt nur eine Zeile an, ein Worker versendet
+gebündelt über eine wiederverwendete SMTP-Verbindung, mit Retry/Backoff und
+Zustellstatus.
+
+Manuell leeren (aus api/):  python -m booking.outbox
+"""
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from metrics import EMAIL_SECONDS, EMAILS
+
+from .email_utils import SMTPSession
+from .models import EmailOutbox
+
+OUTBOX_BATCH = int(os.getenv("OUTBOX_BATCH", 50))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 6))
+OUTBOX_BACKOFF = float(os.getenv("OUTBOX_BACKOFF", 30))  # Sekunden, verdoppelt sich
+OUTBOX_POLL = float(os.getenv("OUTBOX_POLL", 2))
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+def enqueue_email(db: Session, to: str, subject: str, body: str) -> EmailOutbox:
+    """E-Mail in der laufenden Transaktion vormerken (wird mit ihr committet)."""
+    item = EmailOutbox(recipient=to, subject=subject, body=body)
+    db.add(item)
+    return item
+
+
+class OutboxWorker:
+    def __init__(self, session_factory, smtp=None, batch_size=OUTBOX_BATCH,
+                 max_attempts=OUTBOX_MAX_ATTEMPTS, backoff=OUTBOX_BACKOFF):
+        self.session_factory = session_factory
+        self.smtp = smtp or SMTPSession.from_env()
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _claim(self, db: Session) -> list:
+        """Fällige Zeilen atomar für diesen Lauf markieren (auch hängengebliebene)."""
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        due = or_(
+            and_(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now),
+            and_(EmailOutbox.status == "sending", EmailOutbox.claimed_at < now - CLAIM_TIMEOUT),
+        )
+        ids = select(EmailOutbox.id).where(due).order_by(EmailOutbox.id).limit(self.batch_size)
+        db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(ids.scalar_subquery()), due)
+            .values(status="sending", claim=token, claimed_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return db.query(EmailOutbox).filter(EmailOutbox.claim == token).order_by(EmailOutbox.id).all()
+
+    def run_once(self) -> int:
+        """Einen Batch versenden; liefert die Anzahl bearbeiteter Nachrichten."""
+        with self.session_factory() as db:
+            batch = self._claim(db)
+            for item in batch:
+                item.attempts += 1
+                start = time.perf_counter()
+                try:
+                    self.smtp.send(item.recipient, item.subject, item.body)
+                except Exception as e:
+                    item.last_error = str(e)[:500]
+                    if item.attempts >= self.max_attempts:
+                        item.status = "failed"
+                        print(f"❌ [outbox] {item.id} an {item.recipient} endgültig fehlgeschlagen:", e)
+                    else:
+                        item.status = "pending"
+                        delay = self.backoff * 2 ** (item.attempts - 1)
+                        item.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+                else:
+                    item.status = "sent"
+                    item.sent_at = datetime.utcnow()
+                    item.last_error = None
+                EMAIL_SECONDS.observe(time.perf_counter() - start)
+                EMAILS.inc(status="retry" if item.status == "pending" else item.status)
+                item.claim = None
+            db.commit()
+            return len(batch)
+
+    def drain(self) -> int:
+        """So lange Batches senden, bis nichts Fälliges mehr da ist."""
+        total = 0
+        while True:
+            n = self.run_once()
+            total += n
+            if n < self.batch_size:
+                return total
+
+    def _loop(self, poll):
+        while not self._stop.is_set():
+            try:
+                self.drain()
+            except Exception as e:
+                print("❌ [outbox] Worker-Fehler:", e)
+            self.wakeup.wait(poll)
+            self.wakeup.clear()
+        self.smtp.close()
+
+    def start(self, poll=OUTBOX_POLL):
+        """Worker als Daemon-Thread starten."""
+        self._thread = threading.Thread(target=self._loop, args=(poll,), name="email-outbox", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        self.wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+
+_worker = None
+
+
+def start_worker(session_factory, **kwargs) -> OutboxWorker:
+    """Prozessweiten Worker starten (z. B. beim App-Start)."""
+    global _worker
+    if _worker is None:
+        _worker = OutboxWorker(session_factory, **kwargs).start()
+    return _worker
+
+
+def stop_worker():
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
+
+
+def notify():
+    """Worker sofort wecken statt bis zum nächsten Poll zu warten."""
+    if _worker is not None:
+        _worker.wakeup.set()
+
+
+if __name__ == "__main__":
+    from db import SessionLocal
+
+    worker = OutboxWorker(SessionLocal)
+    try:
+        print(f"📬 {worker.drain()} E-Mail(s) bearbeitet")
+    finally:
+        worker.smtp.close()
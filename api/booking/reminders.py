@@ -0,0 +1,184 @@
+# booking/reminders.py
+"""Terminerinnerungen: Termine in den nächsten REMINDER_HOURS Stunden finden
+und je eine Erinnerung in die E-Mail-Outbox legen.
+
+Pro Block (REMINDER_CHUNK Termine) eine Transaktion: UPDATE … SET
+reminded_at … RETURNING id über die Bereichsabfrage auf (date) beansprucht die
+Termine, ein SELECT mit Kunde holt die Daten, ein Sammel-INSERT legt die
+E-Mails an. Bricht ein Lauf ab, ist jeder Block entweder ganz oder gar nicht
+erledigt; der nächste Lauf macht beim Rest weiter. Parallele Läufe (mehrere
+Worker) bekommen nie denselben Termin. Versendet wird wie bei Bestätigungen
+vom Outbox-Worker über eine wiederverwendete SMTP-Sitzung.
+
+Manuell (aus api/):  python -m booking.reminders [--hours 24] [--send]
+"""
+import argparse
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select, update
+
+from metrics import REMINDERS
+
+from .availability import INACTIVE_STATUS, PRAXEN
+from .models import Appointment, Customer, EmailOutbox
+from .outbox import notify
+
+REMINDER_HOURS = float(os.getenv("REMINDER_HOURS", 24))
+REMINDER_CHUNK = int(os.getenv("REMINDER_CHUNK", 1000))
+REMINDER_INTERVAL = float(os.getenv("REMINDER_INTERVAL", 900))  # Sekunden zwischen Läufen im App-Prozess
+
+SUBJECT = "Erinnerung an deinen Termin – Liquid Aesthetik"
+BODY = (
+    "Liebe/r {name},\n\n"
+    "wir freuen uns auf dich: {service} am {when} in {place}.\n"
+    "{address}"
+    "Falls du den Termin nicht wahrnehmen kannst, sag bitte kurz Bescheid{phone}.\n\n"
+    "Bis bald!\nLiquid Aesthetik"
+)
+
+
+def _praxis_parts(praxis: str | None) -> dict:
+    info = PRAXEN.get(praxis or "", {})
+    return {
+        "place": info.get("name") or praxis or "unserer Praxis",
+        "address": f"Adresse: {info['adresse']}\n" if info.get("adresse") else "",
+        "phone": f" ({info['telefon']})" if info.get("telefon") else "",
+    }
+
+
+# Praxisteile einmal vorbereiten statt pro Nachricht
+_PARTS = {None: _praxis_parts(None), **{key: _praxis_parts(key) for key in PRAXEN}}
+
+
+def render(rows) -> list:
+    """Outbox-Zeilen für (name, email, service, praxis, date)-Zeilen."""
+    return [
+        {
+            "recipient": row.email,
+            "subject": SUBJECT,
+            "body": BODY.format(name=row.name, service=row.service, when=row.date.strftime("%d.%m.%Y um %H:%M Uhr"),
+                                **_PARTS.get(row.praxis) or _praxis_parts(row.praxis)),
+        }
+        for row in rows
+    ]
+
+
+class ReminderJob:
+    def __init__(self, session_factory, hours: float = REMINDER_HOURS, chunk: int = REMINDER_CHUNK):
+        self.session_factory = session_factory
+        self.hours = hours
+        self.chunk = chunk
+
+    def _due(self, now: datetime):
+        return select(Appointment.id).where(
+            Appointment.date > now,
+            Appointment.date <= now + timedelta(hours=self.hours),
+            Appointment.reminded_at.is_(None),
+            Appointment.status.notin_(INACTIVE_STATUS),
+        ).order_by(Appointment.date).limit(self.chunk)
+
+    def run_chunk(self, now: datetime | None = None) -> int:
+        """Einen Block beanspruchen und in die Outbox legen; liefert die Anzahl."""
+        now = now or datetime.now()  # Termine stehen in Ortszeit in der DB
+        with self.session_factory() as db:
+            ids = db.scalars(
+                update(Appointment)
+                .where(Appointment.id.in_(self._due(now).scalar_subquery()), Appointment.reminded_at.is_(None))
+                .values(reminded_at=datetime.utcnow())
+                .returning(Appointment.id)
+                .execution_options(synchronize_session=False)
+            ).all()
+            if not ids:
+                db.rollback()
+                return 0
+            rows = db.execute(
+                select(Customer.name, Customer.email, Appointment.service, Appointment.praxis, Appointment.date)
+                .join(Customer, Appointment.customer_id == Customer.id)
+                .where(Appointment.id.in_(ids))
+            ).all()
+            if rows:
+                db.execute(insert(EmailOutbox), render(rows))
+            db.commit()
+        REMINDERS.inc(len(rows))
+        return len(ids)
+
+    def run(self, now: datetime | None = None) -> int:
+        """Alle fälligen Termine erledigen; liefert die Anzahl beanspruchter Termine."""
+        total = 0
+        while True:
+            n = self.run_chunk(now)
+            total += n
+            if n < self.chunk:
+                break
+        if total:
+            notify()
+        return total
+
+
+class ReminderScheduler:
+    """ReminderJob alle `interval` Sekunden im App-Prozess (Daemon-Thread)."""
+
+    def __init__(self, job: ReminderJob, interval: float = REMINDER_INTERVAL):
+        self.job = job
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                n = self.job.run()
+                if n:
+                    print(f"⏰ [reminders] {n} Erinnerung(en) in die Outbox gelegt")
+            except Exception as e:
+                print("❌ [reminders] Fehler:", e)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="reminders", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+
+_scheduler = None
+
+
+def start_scheduler(session_factory, **kwargs) -> ReminderScheduler:
+    """Prozessweiten Scheduler starten (z. B. beim App-Start)."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = ReminderScheduler(ReminderJob(session_factory), **kwargs).start()
+    return _scheduler
+
+
+def stop_scheduler():
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.stop()
+        _scheduler = None
+
+
+if __name__ == "__main__":
+    from db import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Terminerinnerungen in die Outbox legen")
+    parser.add_argument("--hours", type=float, default=REMINDER_HOURS)
+    parser.add_argument("--send", action="store_true", help="Outbox danach gleich leeren")
+    args = parser.parse_args()
+
+    print(f"⏰ {ReminderJob(SessionLocal, hours=args.hours).run()} Erinnerung(en) in die Outbox gelegt")
+    if args.send:
+        from .outbox import OutboxWorker
+
+        worker = OutboxWorker(SessionLocal)
+        try:
+            print(f"📬 {worker.drain()} E-Mail(s) bearbeitet")
+        finally:
+            worker.smtp.close()
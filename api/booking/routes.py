@@ -1,16 +1,25 @@
 # booking/routes.py
-from fastapi import APIRouter, HTTPException, Depends
+import os
+import secrets
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from datetime import timedelta
-from ..db import engine, SessionLocal
-from .models import Base, Appointment, Customer
-from .schemas import AppointmentIn, AppointmentOut
-from .email_utils import send_email
+from datetime import date, datetime, timedelta
+from typing import Literal, Optional
+from db import SessionLocal, ReadSessionLocal
+from metrics import Timings
+from .models import Appointment
+from .schemas import AppointmentIn, AppointmentOut, AppointmentListItem, AppointmentPage, SlotsOut, DaySlots
+from .listing import AppointmentFilter, PAGE_MAX, export_record, iter_csv, iter_ndjson, iter_records, list_page
+from .availability import PRAXEN, free_slots, service_duration
+from .conflicts import find_conflict, lock_scopes, upsert_customer
+from .outbox import enqueue_email, notify
+from .reminders import REMINDER_HOURS
 
 router = APIRouter()
 
-# DB initialisieren
-Base.metadata.create_all(bind=engine)
+# Terminliste/Export nur mit `Authorization: Bearer <ADMIN_TOKEN>`; ohne Token aus
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
 
 
 def get_db():
@@ -21,44 +30,73 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    """Nur-Lese-Session (query_only, eigener Pool) für Slots und Listen."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 @router.post("/book", response_model=AppointmentOut)
 def book_appointment(payload: AppointmentIn, db: Session = Depends(get_db)):
     """Terminbuchung"""
-    # Kunde suchen oder neu anlegen
-    customer = db.query(Customer).filter(Customer.email == payload.customer.email).first()
-    if not customer:
-        customer = Customer(
-            name=payload.customer.name,
-            email=payload.customer.email,
-            phone=payload.customer.phone,
-        )
-        db.add(customer)
-        db.flush()
-
-    # Zeitfenster prüfen (±30 Minuten)
-    start = payload.date - timedelta(minutes=30)
-    end = payload.date + timedelta(minutes=30)
-    conflict = (
-        db.query(Appointment)
-        .filter(Appointment.date.between(start, end))
-        .first()
+    timings = Timings("booking.book")
+    try:
+        appt, customer = _book(db, payload, timings)
+    except HTTPException:
+        timings.finish("conflict")
+        raise
+    except Exception:
+        timings.finish("error")
+        raise
+    response = AppointmentOut(
+        id=appt.id,
+        service=appt.service,
+        praxis=appt.praxis,
+        date=appt.date,
+        status=appt.status,
+        customer_name=customer.name,
+    )
+    timings.lap("respond")
+    timings.finish("booked")
+    return response
+
+
+def _book(db: Session, payload: AppointmentIn, timings: Timings):
+    praxis = payload.praxis.strip().lower() if payload.praxis else None
+
+    # Praxis/Mitarbeiter sperren, damit parallele Buchungen nacheinander prüfen
+    lock_scopes(db, praxis, payload.employee_id)
+    timings.lap("lock")
+
+    # Kunde suchen oder neu anlegen (E-Mail kleingeschrieben)
+    customer = upsert_customer(
+        db, payload.customer.name, payload.customer.email, payload.customer.phone
     )
+    timings.lap("customer")
+
+    # Überschneidung mit Terminen derselben Praxis / desselben Mitarbeiters
+    conflict = find_conflict(db, praxis, payload.employee_id, payload.date, payload.service)
+    timings.lap("conflict")
     if conflict:
+        db.rollback()
         raise HTTPException(status_code=409, detail="Zeitfenster bereits belegt")
 
     # Termin anlegen
     appt = Appointment(
         service=payload.service,
-        praxis=payload.praxis,
+        praxis=praxis,
         date=payload.date,
         customer_id=customer.id,
         employee_id=payload.employee_id,
     )
+    if payload.date - datetime.now() <= timedelta(hours=REMINDER_HOURS):
+        appt.reminded_at = datetime.utcnow()  # schon im Erinnerungsfenster – die Bestätigung genügt
     db.add(appt)
-    db.commit()
-    db.refresh(appt)
 
-    # E-Mail-Bestätigung
+    # E-Mail-Bestätigung nur vormerken – versendet wird im Outbox-Worker
     dt_str = payload.date.strftime("%d.%m.%Y %H:%M")
     subject = "Terminbestätigung – Liquid Aesthetik"
     body = (
@@ -66,13 +104,86 @@ def book_appointment(payload: AppointmentIn, db: Session = Depends(get_db)):
         f"dein Termin für {appt.service} ist bestätigt: {dt_str}"
         f" in {appt.praxis or 'unserer Praxis'}.\n\nBis bald!\nLiquid Aesthetik"
     )
-    send_email(customer.email, subject, body)
+    enqueue_email(db, customer.email, subject, body)
+    timings.lap("enqueue_email")
+    db.commit()
+    timings.lap("commit")
+    db.refresh(appt)
+    notify()
+    timings.lap("refresh")
+    return appt, customer
 
-    return AppointmentOut(
-        id=appt.id,
-        service=appt.service,
-        praxis=appt.praxis,
-        date=appt.date,
-        status=appt.status,
-        customer_name=customer.name,
+
+@router.get("/slots", response_model=SlotsOut)
+def get_slots(
+    praxis: str,
+    date: date,
+    service: str = "",
+    days: int = Query(1, ge=1, le=7),
+    db: Session = Depends(get_read_db),
+):
+    """Freie Slots für einen Tag (oder bis zu einer Woche mit `days=7`)"""
+    praxis = praxis.strip().lower()
+    if praxis not in PRAXEN:
+        raise HTTPException(status_code=404, detail="Unbekannte Praxis")
+
+    result = free_slots(db, praxis, date, days, service)
+    return SlotsOut(
+        praxis=praxis,
+        service=service,
+        duration_minutes=service_duration(service),
+        days=[DaySlots(date=d, slots=slots) for d, slots in result],
+    )
+
+
+def require_admin(authorization: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Nicht gefunden")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Nicht berechtigt", headers={"WWW-Authenticate": "Bearer"})
+
+
+def appointment_filter(
+    praxis: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    status: Optional[str] = None,
+    employee_id: Optional[int] = None,
+) -> AppointmentFilter:
+    praxis = praxis.strip().lower() if praxis else None
+    if praxis and praxis not in PRAXEN:
+        raise HTTPException(status_code=404, detail="Unbekannte Praxis")
+    return AppointmentFilter(praxis, date_from, date_to, status, employee_id)
+
+
+@router.get("/appointments", response_model=AppointmentPage, dependencies=[Depends(require_admin)])
+def list_appointments(
+    flt: AppointmentFilter = Depends(appointment_filter),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=PAGE_MAX),
+    db: Session = Depends(get_read_db),
+):
+    """Termine nach (date, id) sortiert; weiter mit `cursor=<next_cursor>`"""
+    try:
+        rows, next_cursor = list_page(db, flt, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Ungültiger Cursor")
+    return AppointmentPage(items=[AppointmentListItem(**export_record(a)) for a in rows], next_cursor=next_cursor)
+
+
+@router.get("/appointments/export", dependencies=[Depends(require_admin)])
+def export_appointments(
+    flt: AppointmentFilter = Depends(appointment_filter),
+    format: Literal["csv", "ndjson"] = "csv",
+):
+    """Alle passenden Termine als CSV (;-getrennt) oder NDJSON, gestreamt"""
+    # eigene Sessions je Block – die Dependency-Session wäre beim Streamen schon zu
+    records = iter_records(ReadSessionLocal, flt)
+    if format == "ndjson":
+        return StreamingResponse(iter_ndjson(records), media_type="application/x-ndjson")
+    return StreamingResponse(
+        iter_csv(records),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": 'attachment; filename="termine.csv"'},
     )
@@ -1,7 +1,7 @@
 # booking/schemas.py
-from pydantic import BaseModel, EmailStr, Field
-from datetime import datetime
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from datetime import date, datetime
+from typing import List, Optional
 
 
 class CustomerIn(BaseModel):
@@ -17,6 +17,12 @@ class AppointmentIn(BaseModel):
     customer: CustomerIn
     employee_id: Optional[int] = None
 
+    @field_validator("date")
+    @classmethod
+    def local_naive(cls, value: datetime) -> datetime:
+        """Termine stehen naiv in Ortszeit in der DB – "…+01:00" umrechnen statt den Offset zu verwerfen."""
+        return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+
 
 class AppointmentOut(BaseModel):
     id: int
@@ -28,3 +34,34 @@ class AppointmentOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class DaySlots(BaseModel):
+    date: date
+    slots: List[datetime]
+
+
+class SlotsOut(BaseModel):
+    praxis: str
+    service: str
+    duration_minutes: int
+    days: List[DaySlots]
+
+
+class AppointmentListItem(BaseModel):
+    id: int
+    service: str
+    praxis: Optional[str]
+    date: datetime
+    status: str
+    employee_id: Optional[int]
+    employee_name: Optional[str] = None
+    customer_name: Optional[str] = None
+    customer_email: Optional[str] = None
+    customer_phone: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class AppointmentPage(BaseModel):
+    items: List[AppointmentListItem]
+    next_cursor: Optional[str] = None  # als ?cursor= für die nächste Seite, None = Ende
@@ -1,24 +1,68 @@
 from http.server import BaseHTTPRequestHandler
-import os, json, re
+import os, sys, json
 from datetime import datetime
-from openai import OpenAI
-from dotenv import load_dotenv
 
-# 🌍 ENV laden
+# Nachbarmodule (streaming.py …) importierbar machen – Vercel startet nicht aus api/
+sys.path.insert(0, os.path.dirname(__file__))
+from streaming import wants_stream, iter_deltas, iter_sse
+from reply_cache import cache_from_env, make_key
+from prompt import log_usage
+from config_snapshot import ConfigProvider, prompt_builder_for
+from retrieval import load_index, RETRIEVAL_K
+from tenants import Tenant
+from sessions import sessions_from_env, valid_session_id
+from metrics import UPSTREAM_ERRORS, Timings
+from resilience import ResilientClient
+from policy import policy_from_env
+from responses import encode
+from admission import limiter_from_env, client_ip, client_key, retry_after_header, RATE_LIMIT_REPLY
+
+# 🌍 ENV laden (dotenv nur, wenn es lokal eine .env.local gibt)
 env_path = os.path.join(os.path.dirname(__file__), "../.env.local")
 if os.path.exists(env_path):
+    from dotenv import load_dotenv
+
     load_dotenv(dotenv_path=env_path)
 
-# 🔑 OpenAI initialisieren
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+# 🔑 OpenAI erst beim ersten Modellaufruf importieren/initialisieren (Kaltstart)
+client = None
 MODEL = os.environ.get("FINETUNED_MODEL", "ft:gpt-4o-mini-2024-07-18:bareen::CW6GdbsO")
 
-# ⚙️ Config laden
+
+def get_client():
+    global client
+    if client is None:
+        from openai import OpenAI
+
+        # OPENAI_BASE_URL=http://127.0.0.1:8900/v1 → lokaler Mock (benchmarks/mock_openai.py)
+        client = OpenAI(
+            api_key=os.environ.get("OPENAI_API_KEY"),
+            base_url=os.environ.get("OPENAI_BASE_URL") or None,
+        )
+    return client
+
+
+# 🛟 Deadline, Hedging auf LLM_FALLBACK_MODEL und Circuit-Breaker (Aufrufe in Threads)
+resilient = ResilientClient(get_client)
+
+
+# ⚙️ Config (beim Start aus config.snapshot.json, wenn vorhanden und aktuell)
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config.json")
-with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-    CONFIG = json.load(f)
 
-PRAXEN = CONFIG["praxen"]
+# 📚 Website-Index (python retrieval.py); ohne Index gibt es einfach keine Auszüge
+retrieval_index = load_index()
+
+# 🗄️ Antwort-Cache (Key: Nachricht + Praxis + Modell + Config-/Index-Version)
+reply_cache = cache_from_env()
+
+# 🧵 Gesprächsverlauf pro session_id (optional vom Frontend mitgeschickt)
+sessions = sessions_from_env()
+
+# 🛡️ Datenschutz-/Diagnosefragen lokal erkennen (POLICY_MODE: shadow | enforce | off)
+policy = policy_from_env()
+
+# 🚦 Token-Bucket pro Client (pro Instanz; RATE_LIMIT_SQLITE=1 → gemeinsam über die DB)
+limiter = limiter_from_env()
 
 # 💬 Systemrolle
 SYSTEM_PROMPT = (
@@ -50,23 +94,96 @@ SYSTEM_PROMPT = (
         "Ziel ist es, Vertrauen, Kompetenz und Natürlichkeit zu vermitteln. "
 )
 
+
+# 🏢 Allgemeine Daten, wenn keine Stadt genannt wurde
+DEFAULT_PRAXIS = {
+    "name": "Liquid Aesthetik",
+    "adresse": "Standorte: Wiesbaden, Mannheim und Dortmund",
+    "telefon": "0157 – 880 588 48",
+    "email": "info@liquid-aesthetik.de",
+    "oeffnungszeiten": "Termine nach Vereinbarung",
+    "beschreibung": "Liquid Aesthetik ist eine Praxisgruppe für ästhetische Medizin mit mehreren Standorten in Deutschland.",
+}
+
+
+def build_state(config, version, snapshot):
+    """Prompt-Blöcke, Standorterkennung und Preisindex einmal pro Config-Version."""
+    return Tenant(
+        os.environ.get("DEFAULT_TENANT", "liquid"), config, version, SYSTEM_PROMPT, DEFAULT_PRAXIS, MODEL,
+        prompt_builder=prompt_builder_for(config, version, snapshot, SYSTEM_PROMPT, DEFAULT_PRAXIS),
+        retrieval_index=retrieval_index,
+    )
+
+
+# 🔄 Änderungen an config.json gelten ohne Neustart (Prüfung alle CONFIG_RELOAD_INTERVAL s)
+config_provider = ConfigProvider(CONFIG_PATH, build_state)
+
+
 # 📬 API-Handler
+CORS_HEADERS = {"Access-Control-Allow-Origin": "*"}
+
 class handler(BaseHTTPRequestHandler):
-    def _send(self, status=200, body=None):
+    # 🔁 Keep-alive: jede Antwort (außer SSE) hat eine Content-Length
+    protocol_version = "HTTP/1.1"
+    _timings = None  # ⏱️ nur während do_POST gesetzt
+    _stream_started = False  # 200 + SSE-Header schon raus → keine zweite Antwort mehr
+
+    def _send(self, status=200, body=None, headers=None, cacheable=False):
+        status, base_headers, raw = encode(
+            body, status,
+            accept_encoding=self.headers.get("accept-encoding"),
+            if_none_match=self.headers.get("if-none-match"),
+            cacheable=cacheable,
+        )
+        if self._timings:
+            self._timings.lap("encode")
         self.send_response(status)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Access-Control-Allow-Origin", "*")
+        for name, value in {**CORS_HEADERS, **base_headers, **(headers or {})}.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if raw:
+            self.wfile.write(raw)
+        if self._timings:
+            self._timings.lap("send")
+
+    def _send_stream(self, events):
+        """SSE-Events per Chunked Transfer senden; danach Verbindung schließen."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        for name, value in CORS_HEADERS.items():
+            self.send_header(name, value)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Connection", "close")
         self.end_headers()
-        if body:
-            self.wfile.write(json.dumps(body, ensure_ascii=False).encode("utf-8"))
+        self._stream_started = True
+        for event in events:
+            self.wfile.write(f"{len(event):X}\r\n".encode("ascii") + event + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+        self.close_connection = True
+        if self._timings:
+            self._timings.lap("stream")
 
     def do_OPTIONS(self):
         self._send(200, "")
 
     def do_GET(self):
-        self._send(200, {"status": "ok", "time": datetime.now().isoformat()})
+        # Uhrzeit im Header statt im Inhalt – sonst wäre das ETag nie gleich und 304 unmöglich
+        self._send(200, {
+            "status": "ok",
+            "cache": reply_cache.stats(),
+            "config": config_provider.stats(),
+            "sessions": sessions.stats(),
+            "policy": policy.stats() if policy is not None else None,
+            "rate_limit": limiter.stats() if limiter is not None else None,
+            "models": resilient.stats(),
+        }, headers={"X-Server-Time": datetime.now().isoformat()}, cacheable=True)
 
     def do_POST(self):
+        # ⏱️ Dauer je Schritt → eine JSON-Logzeile pro Anfrage (Vercel-Logs)
+        timings = self._timings = Timings("chat.handler")
+        outcome, stream, answered_by = "error", False, None
         try:
             length = int(self.headers.get("content-length", "0"))
             raw = self.rfile.read(length)
@@ -74,44 +191,142 @@ class handler(BaseHTTPRequestHandler):
             user_message = data.get("message", "").strip().lower()
 
             if not user_message:
+                outcome = "invalid"
                 self._send(400, {"error": "Keine Nachricht erhalten."})
                 return
 
-            # 🏙 Standort erkennen
-            selected_praxis = None
-            for key, praxis in PRAXEN.items():
-                if key in user_message or praxis["name"].lower() in user_message:
-                    selected_praxis = praxis
-                    break
-
-            # Wenn keine Stadt genannt wurde → generelle Antwort
-            if not selected_praxis:
-                selected_praxis = {
-                    "name": "Liquid Aesthetik",
-                    "adresse": "Standorte: Wiesbaden, Mannheim und Dortmund",
-                    "telefon": "0157 – 880 588 48",
-                    "email": "info@liquid-aesthetik.de",
-                    "oeffnungszeiten": "Termine nach Vereinbarung",
-                    "beschreibung": "Liquid Aesthetik ist eine Praxisgruppe für ästhetische Medizin mit mehreren Standorten in Deutschland.",
-                }
-
-            # 🧠 Nachrichten an Modell senden
-            messages = [
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_message},
-                {"role": "system", "content": f"Praxisdaten: {json.dumps(selected_praxis, ensure_ascii=False)}"},
-                {"role": "system", "content": f"Weitere Praxen: {', '.join(PRAXEN.keys())}"},
-            ]
-
-            completion = client.chat.completions.create(
-                model=MODEL,
-                messages=messages,
-                temperature=0.3
-            )
+            session_id = data.get("session_id")
+            if session_id is not None and not valid_session_id(session_id):
+                outcome = "invalid"
+                self._send(400, {"error": "Ungültige session_id."})
+                return
+
+            stream = wants_stream(self.headers.get("accept"), data)
+            state = config_provider.current()
+            question = data.get("message", "").strip()
+            timings.lap("parse")
+
+            # 🚦 Rate-Limit pro Client – auf Vercel kommt die echte IP über X-Forwarded-For
+            if limiter is not None:
+                ip = client_ip(self.headers, self.client_address[0], trust_proxy=True)
+                wait = limiter.allow(client_key(ip, session_id))
+                timings.lap("admission")
+                if wait:
+                    outcome = "rate_limited"
+                    self._send(429, {"error": "Zu viele Anfragen.", "reply": RATE_LIMIT_REPLY},
+                               retry_after_header(wait))
+                    return
+            history, last_praxis = sessions.history(session_id) if session_id else ([], None)
+            timings.lap("session")
+
+            def remember(reply, praxis=None):
+                if session_id:
+                    sessions.append(session_id, question, reply, praxis)
+
+            # 🛡️ Datenschutz-/Diagnosefragen: fester Satz statt Modellaufruf (nur POLICY_MODE=enforce)
+            verdict = policy.check(user_message) if policy is not None else None
+            timings.lap("policy")
+            if verdict is not None and verdict.enforce:
+                outcome = "policy"
+                remember(verdict.reply)
+                if stream:
+                    self._send_stream(iter_sse(iter([verdict.reply]), meta={"source": "policy"}))
+                else:
+                    self._send(200, {"reply": verdict.reply, "source": "policy"})
+                return
+
+            # 💶 Eindeutige Preis-/Behandlungsfragen ohne Modell beantworten
+            local_reply = state.price_index.answer(user_message)
+            timings.lap("local")
+            if local_reply:
+                outcome = "local"
+                remember(local_reply)
+                if stream:
+                    self._send_stream(iter_sse(iter([local_reply]), meta={"source": "local"}))
+                else:
+                    self._send(200, {"reply": local_reply, "source": "local"})
+                return
+
+            # 🏙 Standort erkennen – sonst der zuletzt im Gespräch genannte
+            praxis_key = state.location_matcher.best(question) or last_praxis
+            timings.lap("praxis")
+
+            # 🗄️ Wiederholte Fragen direkt aus dem Cache beantworten
+            # (nur ohne Verlauf – mit Verlauf hängt die Antwort vom Gespräch ab)
+            cache_key = make_key(user_message, praxis_key, MODEL, state.cache_version)
+            cached = reply_cache.get(cache_key) if not history else None
+            timings.lap("cache")
+            if cached is not None:
+                outcome = "cache"
+                remember(cached, praxis_key)
+                if stream:
+                    self._send_stream(iter_sse(iter([cached]), meta={"source": "model", "cached": True}))
+                else:
+                    self._send(200, {"reply": cached, "source": "model", "cached": True})
+                return
+
+            # 📚 Nur die passendsten Website-Abschnitte mitschicken
+            passages = state.retrieval_index.retrieve(user_message, RETRIEVAL_K) if state.retrieval_index else []
+            timings.lap("retrieval")
+            messages, prompt_tokens = state.prompt_builder.build(user_message, praxis_key, passages, history)
+            timings.lap("prompt")
+
+            completed = []
+
+            def finish(reply):
+                completed.append(True)
+                # Antworten des Fallback-Modells nicht cachen (bis zum TTL schwächer)
+                if not history and answered_by == MODEL:
+                    reply_cache.set(cache_key, reply)
+                remember(reply, praxis_key)
+                if policy is not None:
+                    policy.observe(verdict, reply)
+
+            # 🌊 Optional: Antwort Token für Token als Server-Sent Events
+            if stream:
+                try:
+                    upstream, answered_by = resilient.stream(
+                        MODEL, messages, temperature=0.3, stream_options={"include_usage": True},
+                    )
+                except Exception as e:
+                    UPSTREAM_ERRORS.inc(kind="timeout" if isinstance(e, TimeoutError) else "error")
+                    raise
+                timings.lap("upstream")
+                self._send_stream(iter_sse(
+                    iter_deltas(upstream, on_usage=lambda u: log_usage(u, prompt_tokens, answered_by)),
+                    on_done=finish,
+                    meta={"source": "model"},
+                ))
+                # iter_sse meldet Upstream-Fehler selbst als error-Event – dann ohne finish()
+                outcome = "model" if completed else "error"
+                return
+
+            try:
+                completion, answered_by = resilient.create(MODEL, messages, temperature=0.3)
+            except Exception as e:
+                UPSTREAM_ERRORS.inc(kind="timeout" if isinstance(e, TimeoutError) else "error")
+                raise
+            timings.lap("upstream")
 
+            log_usage(completion.usage, prompt_tokens, answered_by)
             reply = completion.choices[0].message.content.strip()
-            self._send(200, {"reply": reply})
+            finish(reply)
+            timings.lap("session")
+            outcome = "model"
+            self._send(200, {"reply": reply, "source": "model"})
 
         except Exception as e:
-            print("❌ Fehler:", e)
-            self._send(500, {"error": str(e)})
+            if self._stream_started:
+                # Stream abgebrochen (Client weg, Schreibfehler): nur loggen, Antwort läuft schon
+                outcome = "aborted"
+                print("❌ Stream abgebrochen:", e)
+                self.close_connection = True
+            else:
+                outcome = "error"
+                print("❌ Fehler:", e)
+                self._send(500, {"error": str(e)})
+        finally:
+            self._timings = None
+            self._stream_started = False
+            total = timings.finish(outcome)
+            print(timings.log_line(outcome, total, stream=stream, model=answered_by))
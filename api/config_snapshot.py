@@ -0,0 +1,145 @@
+# config_snapshot.py
+"""Config laden, optional aus einem vorab erzeugten Snapshot, und zur
+Laufzeit neu laden (`ConfigProvider`).
+
+Der Snapshot (`config.snapshot.json`) enthält die geparste Config und die
+fertig serialisierten/gezählten Prompt-Blöcke. Er gilt nur, solange sein
+Hash zur aktuellen config.json passt – ein veralteter Snapshot wird einfach
+ignoriert.
+
+Erzeugen vor dem Deploy (aus api/):  python config_snapshot.py
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(API_DIR, "config.json")
+SNAPSHOT_PATH = os.path.join(API_DIR, "config.snapshot.json")
+CONFIG_RELOAD_INTERVAL = float(os.getenv("CONFIG_RELOAD_INTERVAL", 5))  # 0 = nie neu laden
+
+
+def prompt_key(system_prompt: str) -> str:
+    return hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:12]
+
+
+def load_config(config_path: str = CONFIG_PATH, snapshot_path: str = SNAPSHOT_PATH):
+    """(config, version, snapshot) – snapshot ist None, wenn keiner passt."""
+    with open(config_path, "rb") as f:
+        raw = f.read()
+    version = hashlib.sha256(raw).hexdigest()[:12]
+
+    snapshot = None
+    if snapshot_path and os.getenv("CONFIG_SNAPSHOT", "1") == "1" and os.path.exists(snapshot_path):
+        try:
+            with open(snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            print("⚠️ Config-Snapshot nicht lesbar:", e)
+        if snapshot and snapshot.get("version") != version:
+            print("⚠️ Config-Snapshot veraltet – wird ignoriert")
+            snapshot = None
+
+    config = snapshot["config"] if snapshot else json.loads(raw.decode("utf-8"))
+    return config, version, snapshot
+
+
+def prompt_builder_for(config, version, snapshot, system_prompt, default_praxis):
+    """PromptBuilder aus dem Snapshot, sonst frisch berechnet."""
+    from prompt import PromptBuilder
+
+    state = (snapshot or {}).get("prompts", {}).get(prompt_key(system_prompt))
+    if state:
+        return PromptBuilder.from_snapshot(state)
+    return PromptBuilder(config, system_prompt, default_praxis, version=version)
+
+
+class ConfigProvider:
+    """Aktueller, unveränderlicher Stand einer Config-Datei samt abgeleiteter Strukturen.
+
+    `factory(config, version, snapshot)` baut daraus das Objekt, das Anfragen
+    benutzen (Prompt-Blöcke, Matcher, Preisindex …). `current()` prüft höchstens
+    alle `interval` Sekunden mtime/Größe und bei Änderung den Hash; ein neuer
+    Stand wird komplett gebaut und dann mit einer einzigen Zuweisung
+    eingesetzt. Lesen braucht kein Lock – es prüft immer nur ein Thread,
+    alle anderen bekommen so lange den bisherigen Stand.
+    """
+
+    def __init__(self, path, factory, interval=CONFIG_RELOAD_INTERVAL, snapshot_path=SNAPSHOT_PATH):
+        self.path = path
+        self.factory = factory
+        self.interval = interval
+        self.snapshot_path = snapshot_path
+        self._stat = self._stat_key()
+        config, self.version, snapshot = load_config(path, snapshot_path)
+        self._current = factory(config, self.version, snapshot)
+        self.generation = 1  # zählt jeden eingesetzten Stand, für Caches anderer Schichten
+        self._next_check = time.monotonic() + interval
+        self._checking = threading.Lock()
+
+    def _stat_key(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def current(self):
+        if self.interval > 0 and time.monotonic() >= self._next_check and self._checking.acquire(blocking=False):
+            try:
+                self._reload_if_changed()
+            finally:
+                self._checking.release()
+        return self._current
+
+    def _reload_if_changed(self):
+        self._next_check = time.monotonic() + self.interval
+        stat = self._stat_key()
+        if stat is None or stat == self._stat:
+            return
+        try:
+            config, version, snapshot = load_config(self.path, self.snapshot_path)
+            if version == self.version:
+                self._stat = stat
+                return  # nur angefasst, Inhalt gleich
+            state = self.factory(config, version, snapshot)
+        except Exception as e:  # halb geschriebene Datei o. Ä. – alten Stand behalten, beim nächsten Mal erneut
+            print(f"⚠️ Config {self.path} nicht neu geladen:", e)
+            return
+        self._current, self.version, self._stat = state, version, stat
+        self.generation += 1
+        print(f"🔄 Config {os.path.basename(self.path)} neu geladen: {version} (Stand {self.generation})")
+
+    def stats(self) -> dict:
+        return {"version": self.version, "generation": self.generation, "interval": self.interval}
+
+
+def build_snapshot(snapshot_path: str = SNAPSHOT_PATH):
+    """Snapshot für die Prompts aus chat.py und main.py schreiben."""
+    os.environ["CONFIG_SNAPSHOT"] = "0"  # Builder frisch berechnen
+    os.environ.setdefault("DB_AUTO_MIGRATE", "0")
+    os.environ.setdefault("OPENAI_API_KEY", "snapshot-build")  # Client wird nur erzeugt, nie benutzt
+    sys.path.insert(0, API_DIR)
+
+    config, version, _ = load_config()
+    prompts = {}
+    import chat
+
+    prompts[prompt_key(chat.SYSTEM_PROMPT)] = chat.config_provider.current().prompt_builder.to_snapshot()
+    try:
+        import main
+
+        prompts[prompt_key(main.SYSTEM_PROMPT)] = main.tenants.default.prompt_builder.to_snapshot()
+    except Exception as e:  # z. B. FastAPI fehlt oder kein API-Key – nur chat.py
+        print("ℹ️ main.py übersprungen:", e)
+
+    with open(snapshot_path, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "config": config, "prompts": prompts}, f, ensure_ascii=False)
+    print(f"💾 Snapshot {version} mit {len(prompts)} Prompt(s) geschrieben: {snapshot_path}")
+
+
+if __name__ == "__main__":
+    build_snapshot()
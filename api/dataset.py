@@ -0,0 +1,365 @@
+# dataset.py
+"""Fine-Tuning-Datensatz bauen: aus config.json generieren, prüfen, entdoppeln, aufteilen.
+
+    python dataset.py [--curated fine_tuning_curated.jsonl] [--out fine_tuning_dataset.jsonl]
+                      [--validation 0.1] [--workers N] [--rejects rejects.jsonl]
+
+Ablauf (zeilenweise, Speicher unabhängig von der Dateigröße):
+
+1. Quellen: zuerst aus `preise`, `behandlungen` und `praxen` der config.json
+   generierte Frage/Antwort-Paare (Antworten im Format von price_answers.py),
+   danach die handgeschriebenen Zeilen aus fine_tuning_curated.jsonl.
+2. Prüfen (im Prozess-Pool, zusammen mit dem Token-Zählen): JSON, Schema
+   {"messages": [{"role", "content"}, …]} mit user- und abschließender
+   assistant-Nachricht, Tokens je Beispiel ≤ --max-tokens. Antworten mit
+   Euro-Beträgen, die nicht zu den Preisen der erkannten Behandlung in der
+   config.json passen, gelten als veraltet ("drift") und fliegen raus.
+3. Entdoppeln: MinHash über Zeichen-5-Gramme der Frage, LSH in Bändern;
+   die Band-Schlüssel landen in einem Bloom-Filter fester Größe
+   (--capacity). Zahlen in der Frage gehen in jeden Band-Schlüssel ein –
+   "2 ml" und "3 ml" sind nie Dubletten. Eine fast gleiche Frage kommt nur
+   einmal vor; die zuerst gesehene gewinnt, also die aus der Config
+   (generierte Zeilen werden selbst nie verworfen).
+4. Aufteilen: Hash der Frage entscheidet über train/validation – stabil über
+   Läufe, neue Zeilen verschieben keine alten.
+
+Ausgabe: --out (alles), daneben <name>.train.jsonl und <name>.validation.jsonl.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import time
+import zlib
+from collections import Counter, deque
+
+from price_answers import PriceIndex, fold, price_names
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(API_DIR, "config.json")
+CURATED_PATH = os.path.join(API_DIR, "fine_tuning_curated.jsonl")
+DATASET_PATH = os.path.join(API_DIR, "fine_tuning_dataset.jsonl")
+
+SYSTEM_PROMPT = "Du bist die freundliche Assistentin von Liquid Aesthetik."
+CLOSING = "Für eine persönliche Beratung oder einen Termin melde dich gern bei uns."
+ROLES = {"system", "user", "assistant"}
+MAX_TOKENS = 65536  # Grenze pro Beispiel beim Fine-Tuning
+
+NUM_PERM = 60
+BANDS = 6  # 6 Bänder à 10 Zeilen: Dublette ab etwa 84 % Jaccard-Ähnlichkeit (bei 60 % noch 4 %)
+BATCH = 500  # Zeilen pro Pool-Auftrag
+
+_WORD = re.compile(r"\w+")
+_EURO = re.compile(r"(\d+(?:[.,]\d+)?)\s*(?:€|euro\b)")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)?")
+_LIST_PREFIX = re.compile(r"^[A-Z]\.\s+")  # "B. Botox" → "Botox"
+_AMOUNT_ONLY = re.compile(r"\d+(?:[.,]\d+)?\s*ml")
+
+
+# ---------- Generieren ----------
+
+def _name(key: str) -> str:
+    return _LIST_PREFIX.sub("", key.replace("\xad", ""))
+
+
+def _example(question: str, answer: str) -> dict:
+    return {"messages": [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": question},
+        {"role": "assistant", "content": answer},
+    ]}
+
+
+def generate(config: dict):
+    """Frage/Antwort-Paare aus der Config – Antworten wie price_answers.PriceIndex.answer."""
+    preise = config.get("preise", {})
+    for key, name in price_names(preise).items():
+        if not re.search(r"[^\W\d_]{3}", _AMOUNT_ONLY.sub("", name)):
+            continue  # reine Menge ohne Behandlung davor ("2 ml") – keine sinnvolle Frage
+        answer = f"{name}: {preise[key]}.\n\n{CLOSING}"
+        for template in ("Was kostet {}?", "Wie teuer ist {}?", "Was ist der Preis für {}?"):
+            yield _example(template.format(name), answer)
+
+    for key, text in config.get("behandlungen", {}).items():
+        for name in _name(key).split("/"):
+            for template in ("Was ist {}?", "Wie wirkt {}?"):
+                yield _example(template.format(name.strip()), f"{text}\n\n{CLOSING}")
+
+    for key, praxis in config.get("praxen", {}).items():
+        city = key.capitalize()
+        name = praxis.get("name", f"Liquid Aesthetik {city}")
+        if praxis.get("adresse"):
+            yield _example(f"Wo ist eure Praxis in {city}?", f"{name} findest du hier: {praxis['adresse']}.")
+        if praxis.get("telefon") or praxis.get("email"):
+            contact = " oder ".join(filter(None, (
+                praxis.get("telefon") and f"telefonisch unter {praxis['telefon']}",
+                praxis.get("email") and f"per E-Mail an {praxis['email']}",
+            )))
+            yield _example(f"Wie erreiche ich die Praxis in {city}?", f"Du erreichst {name} {contact}.")
+        if praxis.get("oeffnungszeiten"):
+            yield _example(f"Wann hat die Praxis in {city} geöffnet?",
+                           f"{name}: {praxis['oeffnungszeiten']}.")
+
+
+def _lines(config: dict, curated_paths):
+    """(Quelle, Zeilennummer, Rohtext) – generierte Beispiele zuerst."""
+    for n, example in enumerate(generate(config), 1):
+        yield "config", n, json.dumps(example, ensure_ascii=False, separators=(",", ":"))
+    for path in curated_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for n, line in enumerate(f, 1):
+                if line.strip():
+                    yield os.path.basename(path), n, line
+
+
+# ---------- Prüfen (läuft in den Pool-Prozessen) ----------
+
+_PRICES = None  # (PriceIndex, {preis_key: {beträge}}) je Prozess
+
+
+def _init_worker(config: dict):
+    global _PRICES
+    index = PriceIndex(config)
+    amounts = {k: {a.replace(",", ".") for a in _NUMBER.findall(v)} for k, v in config.get("preise", {}).items()}
+    _PRICES = (index, amounts)
+
+
+def validate(example) -> str | None:
+    """Fehlergrund oder None."""
+    if not isinstance(example, dict) or not isinstance(example.get("messages"), list):
+        return "schema: messages fehlt"
+    messages = example["messages"]
+    for m in messages:
+        if not isinstance(m, dict) or m.get("role") not in ROLES:
+            return "schema: role"
+        if not isinstance(m.get("content"), str) or not m["content"].strip():
+            return "schema: content"
+    if not any(m["role"] == "user" for m in messages):
+        return "schema: keine user-Nachricht"
+    if messages[-1]["role"] != "assistant":
+        return "schema: letzte Nachricht nicht assistant"
+    return None
+
+
+def price_drift(question: str, answer: str) -> bool:
+    """Nennt die Antwort Euro-Beträge, die keine der erkannten Behandlungen laut Config hat?"""
+    index, amounts = _PRICES
+    named = {a.replace(",", ".") for a in _EURO.findall(fold(answer))}
+    if not named:
+        return False
+    keys = [key for kind, key in index.match(question) if kind == "preis"]
+    if not keys:
+        return False
+    allowed = set().union(*(amounts[k] for k in keys))
+    return not named <= allowed
+
+
+def minhash_bands(text: str):
+    """LSH-Schlüssel (ein int je Band) aus MinHash über Zeichen-5-Gramme, plus Zahlen der Frage."""
+    import numpy as np
+
+    words = _WORD.findall(fold(text))
+    normalized = " ".join(words)
+    shingles = {normalized[i:i + 5] for i in range(max(1, len(normalized) - 4))}
+    numbers = " ".join(w for w in words if w.isdigit()).encode()
+    x = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    # Multiply-Shift-Hashing: (a·x + b) mod 2^64, obere 32 Bit
+    signature = ((_PERM_A[:, None] * x + _PERM_B[:, None]) >> np.uint64(32)).min(axis=1)
+    rows = NUM_PERM // BANDS
+    return [int.from_bytes(hashlib.blake2b(bytes([band]) + signature[band * rows:(band + 1) * rows].tobytes()
+                                           + numbers, digest_size=8).digest(), "little")
+            for band in range(BANDS)]
+
+
+def _permutations():
+    import numpy as np
+
+    rng = np.random.default_rng(20240601)  # fest: gleiche Signaturen in allen Prozessen und Läufen
+    a = rng.integers(1, 2 ** 63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2 ** 63, NUM_PERM, dtype=np.uint64)
+    return a, b
+
+
+_PERM_A, _PERM_B = None, None
+
+
+def process_batch(batch, max_tokens: int = MAX_TOKENS):
+    """[(quelle, nr, zeile)] → [(quelle, nr, fehler|None, json, tokens, band_keys, split_hash)]."""
+    global _PERM_A, _PERM_B
+    from prompt import count_tokens
+
+    if _PERM_A is None:
+        _PERM_A, _PERM_B = _permutations()
+    results = []
+    for source, n, line in batch:
+        try:
+            example = json.loads(line)
+        except ValueError:
+            results.append((source, n, "json", line, 0, None, 0))
+            continue
+        error = validate(example)
+        if error:
+            results.append((source, n, error, line, 0, None, 0))
+            continue
+        messages = example["messages"]
+        question = " ".join(m["content"] for m in messages if m["role"] == "user")
+        answer = messages[-1]["content"]
+        # ca. 4 Tokens Verwaltung pro Nachricht + 3 für die Antwort (Chat-Format)
+        tokens = sum(count_tokens(m["content"]) + 4 for m in messages) + 3
+        if tokens > max_tokens:
+            error = f"zu lang: {tokens} Tokens"
+        elif price_drift(question, answer):
+            error = "drift: Preis passt nicht zur config.json"
+        text = json.dumps(example, ensure_ascii=False, separators=(",", ":"))
+        split = zlib.crc32(" ".join(_WORD.findall(fold(question))).encode())
+        results.append((source, n, error, text, tokens, None if error else minhash_bands(question), split))
+    return results
+
+
+# ---------- Entdoppeln ----------
+
+class BloomFilter:
+    """Feste Bit-Tabelle für `capacity` Einträge bei Fehlerrate `error_rate`."""
+
+    def __init__(self, capacity: int, error_rate: float = 1e-4):
+        self.bits = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.table = bytearray((self.bits + 7) // 8)
+
+    def add(self, key: int) -> bool:
+        """Eintragen; True, wenn er (wahrscheinlich) schon drin war."""
+        h1, h2 = key & 0xFFFFFFFF, (key >> 32) | 1
+        seen = True
+        for i in range(self.hashes):
+            bit = (h1 + i * h2) % self.bits
+            byte, mask = bit >> 3, 1 << (bit & 7)
+            if not self.table[byte] & mask:
+                seen = False
+                self.table[byte] |= mask
+        return seen
+
+
+class NearDuplicates:
+    """LSH-Bänder in einem gemeinsamen Bloom-Filter: Dublette, wenn irgendein Band schon bekannt ist."""
+
+    def __init__(self, capacity: int):
+        self.bloom = BloomFilter(capacity * BANDS)
+
+    def seen(self, band_keys) -> bool:
+        hits = [self.bloom.add(key) for key in band_keys]
+        return any(hits)
+
+
+# ---------- Pipeline ----------
+
+def _batches(items, size: int = BATCH):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _results(config: dict, lines, workers: int, max_tokens: int):
+    """Ergebnisse in Eingabereihenfolge; höchstens 2 × workers Batches gleichzeitig unterwegs."""
+    batches = _batches(lines)
+    if workers <= 1:
+        _init_worker(config)
+        for batch in batches:
+            yield from process_batch(batch, max_tokens)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config,)) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.submit(process_batch, batch, max_tokens))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _split_paths(out: str):
+    stem = out[:-len(".jsonl")] if out.endswith(".jsonl") else out
+    return f"{stem}.train.jsonl", f"{stem}.validation.jsonl"
+
+
+def build(config: dict, curated=(CURATED_PATH,), out: str = DATASET_PATH, validation: float = 0.1,
+          workers: int = 1, capacity: int = 2_000_000, max_tokens: int = MAX_TOKENS,
+          rejects: str | None = None, generated: bool = True) -> dict:
+    """Datensatz schreiben; liefert Zähler (Zeilen, Gründe, Tokens, Dauer)."""
+    start = time.perf_counter()
+    lines = _lines(config if generated else {}, curated)
+    dedupe = NearDuplicates(capacity)
+    stats = Counter()
+    reasons = Counter()
+    max_seen = 0
+    train_path, validation_path = _split_paths(out)
+    cut = int(validation * 2 ** 32)
+
+    with open(out, "w", encoding="utf-8") as all_out, \
+            open(train_path, "w", encoding="utf-8") as train_out, \
+            open(validation_path, "w", encoding="utf-8") as val_out, \
+            open(rejects or os.devnull, "w", encoding="utf-8") as reject_out:
+        for source, n, error, text, tokens, bands, split in _results(config, lines, workers, max_tokens):
+            stats["lines"] += 1
+            if error is None and dedupe.seen(bands) and source != "config":
+                error = "dublette"
+            if error:
+                reasons[error.split(":")[0]] += 1
+                reject_out.write(json.dumps({"source": source, "line": n, "reason": error,
+                                             "text": text.rstrip("\n")}, ensure_ascii=False) + "\n")
+                continue
+            stats[f"from_{'config' if source == 'config' else 'curated'}"] += 1
+            all_out.write(text + "\n")
+            if split < cut:
+                val_out.write(text + "\n")
+                stats["validation"] += 1
+                stats["validation_tokens"] += tokens
+            else:
+                train_out.write(text + "\n")
+                stats["train"] += 1
+                stats["train_tokens"] += tokens
+            max_seen = max(max_seen, tokens)
+
+    seconds = time.perf_counter() - start
+    return {**stats, "rejected": dict(reasons), "max_tokens": max_seen, "seconds": round(seconds, 3),
+            "lines_per_sec": round(stats["lines"] / seconds) if seconds else None,
+            "files": [out, train_path, validation_path]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", default=CONFIG_PATH)
+    parser.add_argument("--curated", nargs="*", default=[CURATED_PATH], help="handgeschriebene JSONL-Dateien")
+    parser.add_argument("--out", default=DATASET_PATH)
+    parser.add_argument("--validation", type=float, default=0.1, help="Anteil für validation (0–1)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--capacity", type=int, default=2_000_000, help="erwartete Zeilen (Größe des Bloom-Filters)")
+    parser.add_argument("--max-tokens", type=int, default=MAX_TOKENS)
+    parser.add_argument("--rejects", help="aussortierte Zeilen mit Grund hierhin schreiben")
+    parser.add_argument("--no-config", action="store_true", help="nichts aus der config.json generieren")
+    args = parser.parse_args(argv)
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    stats = build(config, args.curated, args.out, args.validation, args.workers, args.capacity,
+                  args.max_tokens, args.rejects, generated=not args.no_config)
+    print(f"💾 {stats.get('train', 0)} train / {stats.get('validation', 0)} validation "
+          f"({stats.get('from_config', 0)} aus der Config, {stats.get('from_curated', 0)} handgeschrieben) "
+          f"→ {stats['files'][0]}")
+    print(f"   Tokens: train {stats.get('train_tokens', 0)}, validation {stats.get('validation_tokens', 0)}, "
+          f"max/Beispiel {stats['max_tokens']}; aussortiert: {stats['rejected'] or '-'}; "
+          f"{stats['lines']} Zeilen in {stats['seconds']} s")
+    return stats
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,14 +1,93 @@
 # db.py
-from sqlalchemy import create_engine
+"""Datenbank-Engines: Schreib-Engine (`engine`/`SessionLocal`) und eine
+Lese-Engine (`read_engine`/`ReadSessionLocal`) für Slots und Listen.
+
+DATABASE_URL (Standard sqlite:///./database.db) wählt die Datenbank,
+DATABASE_READ_URL optional ein Replikat für die Lese-Engine. Bei SQLite setzt
+ein connect-Event je Verbindung die Pragmas aus SQLITE_PRAGMAS: WAL (Leser
+blockieren Schreiber nicht mehr), synchronous=NORMAL (kein fsync pro Commit,
+nur pro Checkpoint – in WAL trotzdem konsistent), busy_timeout (warten statt
+sofort "database is locked"), mmap_size und cache_size. Verbindungen der
+Lese-Engine sind zusätzlich query_only.
+"""
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 
-DATABASE_URL = "sqlite:///./database.db"
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./database.db")
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", "")
+
+# Pool je Prozess: FastAPI führt sync-Dependencies im Threadpool aus (40 Threads)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  # nur Server-Datenbanken
+
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 256 * 2**20)),
+    "cache_size": int(os.getenv("SQLITE_CACHE_KB", 64 * 1024)) * -1,  # negativ = KiB
+    "temp_store": "MEMORY",
+}
+
+echo = os.getenv("DB_ECHO") == "1"  # SQL im Log
+
+
+def _is_memory(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def make_engine(url: str = DATABASE_URL, *, read_only: bool = False, pragmas: dict | None = SQLITE_PRAGMAS,
+                **kwargs):
+    """Engine mit passendem Pool; bei SQLite die Pragmas je Verbindung (None = SQLite-Standard)."""
+    parsed = make_url(url)
+    options = {"echo": echo}
+    if parsed.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        if not _is_memory(parsed):
+            options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    else:
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT,
+                       pool_recycle=DB_POOL_RECYCLE, pool_pre_ping=True)
+    options.update(kwargs)
+    eng = create_engine(url, **options)
+
+    if parsed.get_backend_name() == "sqlite" and (pragmas or read_only):
+        statements = [f"PRAGMA {name}={value}" for name, value in (pragmas or {}).items()]
+        if read_only:
+            statements.append("PRAGMA query_only=1")
+
+        @event.listens_for(eng, "connect")
+        def _set_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for statement in statements:
+                    cursor.execute(statement)
+            finally:
+                cursor.close()
+
+    return eng
+
+
+def pool_status(eng) -> dict:
+    """Kurzstatus für GET / (QueuePool: belegt/frei/Überlauf)."""
+    pool = eng.pool
+    if not hasattr(pool, "checkedout"):
+        return {"pool": type(pool).__name__}
+    return {"pool": type(pool).__name__, "checked_out": pool.checkedout(), "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0), "size": pool.size()}
+
 
-echo = False # auf True setzen, wenn SQL im Log erscheinen soll
-engine = create_engine(
-DATABASE_URL,
-connect_args={"check_same_thread": False},
-echo=echo,
-)
+engine = make_engine(DATABASE_URL)
+# In-Memory-SQLite ist pro Engine eine eigene Datenbank – dort gibt es nur eine
+if _is_memory(make_url(DATABASE_READ_URL or DATABASE_URL)):
+    read_engine = engine
+else:
+    read_engine = make_engine(DATABASE_READ_URL or DATABASE_URL, read_only=True)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
@@ -0,0 +1,167 @@
+# locations.py
+"""Standorterkennung: einmal vorkompilierter Matcher statt Schleife über PRAXEN.
+
+Aus Schlüssel, Name, Adresse (Straße, PLZ, Ort) und `standort_aliase` der
+config.json entsteht beim Import ein Wörterbuch Begriff → Praxen. Eine
+Nachricht wird einmal in Wörter/N-Gramme zerlegt und nachgeschlagen; die
+Laufzeit hängt damit von der Nachrichtenlänge ab, nicht von der Zahl der
+Praxen. Tippfehler ("Mannhiem") fängt ein Löschungs-Index (SymSpell-Prinzip)
+mit begrenzter Editierdistanz ab.
+"""
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+_FOLD = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss", "\xad": ""})
+_WORD = re.compile(r"\w+")
+_PLZ = re.compile(r"\b(\d{5})\s+([^\d,]+)$")
+
+# Kurzformen ("MA", "DO") zählen nur großgeschrieben oder nach einer Präposition
+PREPOSITIONS = {"in", "nach", "aus", "bei", "fuer", "von", "im"}
+
+# Gewichte je Begriffsart
+WEIGHTS = {"key": 1.0, "name": 1.0, "city": 1.0, "plz": 1.0, "alias": 0.9, "street": 0.8, "short": 0.7}
+FUZZY_PENALTY = 0.15
+
+
+class LocationMatch(NamedTuple):
+    key: str
+    score: float
+    term: str
+    position: int
+
+
+def fold(text: str) -> str:
+    return text.lower().translate(_FOLD)
+
+
+def _deletes(word: str, depth: int) -> set:
+    """Alle Varianten von `word` mit bis zu `depth` gelöschten Zeichen."""
+    out = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        out |= frontier
+    return out
+
+
+def _max_distance(word: str) -> int:
+    if len(word) >= 8:
+        return 2
+    return 1 if len(word) >= 5 else 0
+
+
+def damerau_levenshtein(a: str, b: str) -> int:
+    """Editierdistanz inkl. Vertauschung benachbarter Zeichen."""
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+class LocationMatcher:
+    def __init__(self, praxen: dict, aliases: dict | None = None):
+        self.terms = {}  # Begriff → {praxis_key: art}
+        self.short = {}  # Kurzform → {praxis_key}
+        self.max_ngram = 1
+
+        for key, praxis in praxen.items():
+            self._add(key, key, "key")
+            if praxis.get("name"):
+                self._add(praxis["name"], key, "name")
+            adresse = praxis.get("adresse", "")
+            m = _PLZ.search(adresse)
+            if m:
+                self._add(m.group(1), key, "plz")
+                self._add(m.group(2).strip(), key, "city")
+            street = re.sub(r"\s*\d+\w?$", "", adresse.split(",")[0]).strip()
+            if len(street) >= 8:
+                self._add(street, key, "street")
+            for alias in (aliases or {}).get(key, []):
+                if len(alias) <= 3:
+                    self.short.setdefault(fold(alias), set()).add(key)
+                else:
+                    self._add(alias, key, "alias")
+
+        # Löschungs-Index nur für Einzelwörter (Orte, Aliase)
+        self.fuzzy = {}
+        for term in self.terms:
+            if " " in term or term.isdigit():
+                continue
+            for variant in _deletes(term, _max_distance(term)):
+                self.fuzzy.setdefault(variant, set()).add(term)
+        self._fuzzy = lru_cache(maxsize=8192)(self._fuzzy_uncached)
+
+    def _add(self, text, key, kind):
+        term = " ".join(_WORD.findall(fold(text)))
+        if not term:
+            return
+        kinds = self.terms.setdefault(term, {})
+        if WEIGHTS[kind] > WEIGHTS.get(kinds.get(key), 0):
+            kinds[key] = kind
+        self.max_ngram = max(self.max_ngram, term.count(" ") + 1)
+
+    def _fuzzy_uncached(self, token):
+        bound = _max_distance(token)
+        if not bound:
+            return None
+        candidates = set()
+        for variant in _deletes(token, bound):
+            candidates.update(self.fuzzy.get(variant, ()))
+        best = None
+        for term in candidates:
+            limit = min(bound, _max_distance(term))
+            if abs(len(term) - len(token)) > limit:
+                continue
+            dist = damerau_levenshtein(token, term)
+            if dist <= limit and (best is None or dist < best[1]):
+                best = (term, dist)
+        return best
+
+    def match(self, message: str) -> list:
+        """Alle erkannten Praxen, bestes Ergebnis zuerst."""
+        raw = _WORD.findall(message or "")
+        tokens = [fold(t) for t in raw]
+        found = {}
+
+        def hit(key, score, term, pos):
+            cur = found.get(key)
+            if cur is None or score > cur.score:
+                found[key] = LocationMatch(key, score, term, pos if cur is None else min(pos, cur.position))
+
+        matched = set()
+        for n in range(self.max_ngram, 0, -1):
+            for i in range(len(tokens) - n + 1):
+                if n == 1 and i in matched:
+                    continue
+                term = " ".join(tokens[i:i + n])
+                for key, kind in self.terms.get(term, {}).items():
+                    hit(key, WEIGHTS[kind], term, i)
+                    matched.update(range(i, i + n))
+
+        for i, token in enumerate(tokens):
+            if i in matched:
+                continue
+            keys = self.short.get(token)
+            if keys and (raw[i].isupper() or (i and tokens[i - 1] in PREPOSITIONS)):
+                for key in keys:
+                    hit(key, WEIGHTS["short"], token, i)
+                continue
+            fuzzy = self._fuzzy(token) if not token.isdigit() else None
+            if fuzzy:
+                term, dist = fuzzy
+                for key, kind in self.terms[term].items():
+                    hit(key, WEIGHTS[kind] - FUZZY_PENALTY * dist, term, i)
+
+        return sorted(found.values(), key=lambda m: (-m.score, m.position))
+
+    def best(self, message: str):
+        """Schlüssel der besten Praxis oder None."""
+        matches = self.match(message)
+        return matches[0].key if matches else None
@@ -1,65 +1,396 @@
 # main.py
-import os, json
+import os, asyncio
 from datetime import datetime
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
-from openai import OpenAI
 
 from booking.routes import router as booking_router
-from booking.models import Base
-from db import engine
+from booking.models import Base, ensure_schema, merge_customer_emails
+from booking.outbox import start_worker, stop_worker
+from booking.reminders import start_scheduler, stop_scheduler
+from db import engine, read_engine, SessionLocal, pool_status
+from streaming import wants_stream, sse_event, iter_sse, aiter_deltas, aiter_sse
+from async_completions import CompletionGate, make_async_client, FALLBACK_REPLY
+from resilience import AsyncResilientClient
+from policy import policy_from_env
+from reply_cache import cache_from_env, make_key
+from prompt import log_usage
+from config_snapshot import ConfigProvider, prompt_builder_for
+from retrieval import load_index, RETRIEVAL_K
+from tenants import Tenant, TenantRegistry, TENANT_HEADER
+from sessions import sessions_from_env, valid_session_id
+from metrics import REGISTRY, UPSTREAM_ERRORS, Timings
+from responses import ResponseMiddleware, dumps
+from admission import (AdmissionMiddleware, Lane, limiter_from_env, client_ip, client_key, retry_after_header,
+                       ADMIT_CHAT_MAX, ADMIT_BOOKING_MAX, RATE_LIMIT_REPLY, OVERLOAD_REPLY)
 
 # ENV laden
 load_dotenv(".env.local")
 
-# DB-Tabellen sicherstellen
-Base.metadata.create_all(bind=engine)
+# DB-Tabellen sicherstellen – genau einmal hier, abschaltbar (DB_AUTO_MIGRATE=0),
+# wenn das Schema extern migriert wird
+if os.getenv("DB_AUTO_MIGRATE", "1") == "1":
+    Base.metadata.create_all(bind=engine)
+    merge_customer_emails(engine)  # vor ensure_schema: der Unique-Index auf customers.email braucht saubere Daten
+    ensure_schema(engine)
 
-app = FastAPI(title="Liquid Aesthetik – Chat & Booking API")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse über responses.dumps (orjson, sonst json)."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+app = FastAPI(title="Liquid Aesthetik – Chat & Booking API", default_response_class=FastJSONResponse)
+
+# Lanes: Chat über ADMIT_CHAT_MAX gleichzeitig → 503, Buchungen eigene Lane
+# (vor CORS eingehängt = liegt innen, auch 503 bekommen CORS-Header)
+chat_lane = Lane("chat", ADMIT_CHAT_MAX, shed=True)
+booking_lane = Lane("booking", ADMIT_BOOKING_MAX, shed=False)
+app.add_middleware(AdmissionMiddleware, chat=chat_lane, booking=booking_lane)
 
 # CORS
 allowed = os.getenv("APP_ALLOWED_ORIGINS", "*").split(",")
 app.add_middleware(
-CORSMiddleware,
-allow_origins=allowed,
-allow_credentials=True,
-allow_methods=["*"],
-allow_headers=["*"],
+    CORSMiddleware,
+    allow_origins=allowed,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
 )
 
-# OpenAI
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+# Ganz außen: ETag/304 für GET, gzip/br ab COMPRESS_MIN_BYTES (nicht für SSE)
+app.add_middleware(ResponseMiddleware)
+
+# OpenAI (async, ein geteilter Connection-Pool pro Worker)
+client = make_async_client()
+gate = CompletionGate()
+# Deadline, Hedging auf LLM_FALLBACK_MODEL und Circuit-Breaker je Modell
+resilient = AsyncResilientClient(client)
 MODEL = os.getenv("FINETUNED_MODEL", "gpt-4o-mini")
 
-# Praxisdaten laden
+# Praxisdaten: config.json, ohne Neustart neu geladen (ConfigProvider in tenants unten)
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config.json")
-with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-CONFIG = json.load(f)
-PRAXEN = CONFIG.get("praxen", {})
+
+# Website-Index (python retrieval.py); ohne Index gibt es keine Auszüge
+retrieval_index = load_index()
+
+# Datenschutz-/Diagnosefragen lokal erkennen (POLICY_MODE: shadow | enforce | off)
+policy = policy_from_env()
+
+# Antwort-Cache für wiederkehrende Fragen – geteilt von allen Mandanten
+# (Key enthält Mandant, Config- und Index-Version)
+reply_cache = cache_from_env()
+
+# Gesprächsverlauf pro session_id (optional vom Frontend mitgeschickt)
+sessions = sessions_from_env()
+
+# Token-Bucket pro Client (RATE_LIMIT_*; RATE_LIMIT_SQLITE=1 für mehrere Worker)
+limiter = limiter_from_env()
 
 SYSTEM_PROMPT = (
-"Du bist die freundliche, professionelle Assistentin von Liquid Aesthetik. "
-"Sprich in Du-Form, antworte warm, ruhig und kompetent. "
-"Wenn Preise, Öffnungszeiten oder Kontaktdaten bekannt sind, verwende sie direkt aus den Praxisdaten. "
-"Wenn eine Stadt genannt wird (z. B. Wiesbaden, Mannheim oder Dortmund), nutze die passenden Informationen dieser Praxis. "
-"Wenn etwas nicht in den Daten steht, sag höflich, dass du dazu leider keine Information hast. "
-"Gib niemals vertrauliche oder interne Informationen weiter. "
-"Erfinde nichts. Bei Unsicherheit: 'Dazu liegen mir leider keine verlässlichen Informationen vor.' "
-"Keine individuellen medizinischen Diagnosen. Verweise freundlich auf Beratung in der Praxis."
+    "Du bist die freundliche, professionelle Assistentin von Liquid Aesthetik. "
+    "Sprich in Du-Form, antworte warm, ruhig und kompetent. "
+    "Wenn Preise, Öffnungszeiten oder Kontaktdaten bekannt sind, verwende sie direkt aus den Praxisdaten. "
+    "Wenn eine Stadt genannt wird (z. B. Wiesbaden, Mannheim oder Dortmund), nutze die passenden Informationen dieser Praxis. "
+    "Wenn etwas nicht in den Daten steht, sag höflich, dass du dazu leider keine Information hast. "
+    "Gib niemals vertrauliche oder interne Informationen weiter. "
+    "Erfinde nichts. Bei Unsicherheit: 'Dazu liegen mir leider keine verlässlichen Informationen vor.' "
+    "Keine individuellen medizinischen Diagnosen. Verweise freundlich auf Beratung in der Praxis."
 )
 
+# Allgemeine Infos, wenn keine Stadt genannt wurde
+DEFAULT_PRAXIS = {
+    "name": "Liquid Aesthetik",
+    "adresse": "Standorte: Wiesbaden, Mannheim und Dortmund",
+    "telefon": "0157 – 880 588 48",
+    "email": "info@liquid-aesthetik.de",
+    "oeffnungszeiten": "Termine nach Vereinbarung",
+}
+
+
+def build_default_tenant(config, version, snapshot):
+    """Prompt-Blöcke, Standorterkennung und Preisindex einmal pro Config-Version."""
+    return Tenant(
+        os.getenv("DEFAULT_TENANT", "liquid"), config, version, SYSTEM_PROMPT, DEFAULT_PRAXIS, MODEL,
+        prompt_builder=prompt_builder_for(config, version, snapshot, SYSTEM_PROMPT, DEFAULT_PRAXIS),
+        retrieval_index=retrieval_index,
+    )
+
+
+# Mandanten: config.json ist der Standard, weitere Praxen kommen lazy aus api/tenants/
+tenants = TenantRegistry(ConfigProvider(CONFIG_PATH, build_default_tenant))
+
+# Zähler, die die Komponenten ohnehin führen, erst beim Abruf von /metrics lesen
+REGISTRY.collect("reply_cache", reply_cache.stats, {"hits": "counter", "store_hits": "counter", "misses": "counter"})
+REGISTRY.collect("sessions", sessions.stats, {"evicted_idle": "counter", "evicted_lru": "counter"})
+REGISTRY.collect("tenants", tenants.stats, {"loads": "counter", "evictions": "counter"})
+REGISTRY.collect("upstream", gate.stats, {"coalesced": "counter", "timeouts": "counter", "shed": "counter"})
+REGISTRY.collect("lane", lambda: {**chat_lane.stats(), **booking_lane.stats()},
+                 {"chat_rejected": "counter"})
+if limiter is not None:
+    REGISTRY.collect("rate_limit", limiter.stats, {"allowed": "counter", "limited": "counter"})
+
+
 @app.get("/")
-def root():
-return {"status": "ok", "time": datetime.now().isoformat()}
+def root(response: Response):
+    # Uhrzeit im Header statt im Inhalt – sonst wäre das ETag nie gleich und 304 unmöglich
+    response.headers["X-Server-Time"] = datetime.now().isoformat()
+    return {
+        "status": "ok",
+        "cache": reply_cache.stats(),
+        "upstream": gate.stats(),
+        "models": resilient.stats(),
+        "tenants": tenants.stats(),
+        "sessions": sessions.stats(),
+        "policy": policy.stats() if policy is not None else None,
+        "db": {"write": pool_status(engine), "read": pool_status(read_engine)},
+        "admission": {
+            **chat_lane.stats(), **booking_lane.stats(),
+            "rate_limit": limiter.stats() if limiter is not None else None,
+        },
+    }
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus-Textformat: Stufen-Histogramme, Tokens, Cache, Upstream."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.on_event("startup")
+def start_outbox():
+    # E-Mails aus der Outbox im Hintergrund versenden (OUTBOX_WORKER=0 → extern)
+    if os.getenv("OUTBOX_WORKER", "1") == "1":
+        start_worker(SessionLocal)
+    # Terminerinnerungen alle REMINDER_INTERVAL Sekunden (REMINDER_JOB=1; sonst Cron mit python -m booking.reminders)
+    if os.getenv("REMINDER_JOB", "0") == "1":
+        start_scheduler(SessionLocal)
+
+
+@app.on_event("shutdown")
+async def close_client():
+    await client.close()
+    stop_scheduler()
+    stop_worker()
+
 
 # WICHTIG: Route so benennen, dass dein Frontend (index.html) weiter funktioniert
 @app.post("/api/chat")
 async def chat(request: Request):
-data = await request.json()
-user_message = (data.get("message") or "").strip().lower()
+    timings = Timings("main.chat")
+    tenant = tenants.resolve(request.headers.get("host"), request.headers.get(TENANT_HEADER))
+    timings.lap("tenant")
+    if tenant is None:
+        return respond(timings, "invalid", {"error": "Unbekannter Mandant."}, 404)
+    return await answer(request, tenant, timings)
+
+
+@app.post("/t/{tenant_id}/api/chat")
+async def tenant_chat(tenant_id: str, request: Request):
+    timings = Timings("main.chat")
+    tenant = tenants.get(tenant_id)
+    timings.lap("tenant")
+    if tenant is None:
+        return respond(timings, "invalid", {"error": "Unbekannter Mandant."}, 404)
+    return await answer(request, tenant, timings)
+
+
+def respond(timings: Timings, outcome: str, body: dict, status_code: int = 200, headers=None):
+    """JSON-Antwort selbst kodieren, damit auch das in den Stufen auftaucht."""
+    response = FastJSONResponse(body, status_code=status_code, headers=headers)
+    timings.lap("encode")
+    timings.finish(outcome)
+    return response
+
+
+def stream_response(events, timings: Timings | None = None, outcome: str = "model"):
+    if timings is not None:
+        timings.finish(outcome)  # lokale/gecachte Antworten: alles ist schon berechnet
+    return StreamingResponse(events, media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+async def answer(request: Request, tenant: Tenant, timings: Timings):
+    data = await request.json()
+    user_message = (data.get("message") or "").strip().lower()
+    if not user_message:
+        return respond(timings, "invalid", {"error": "Keine Nachricht erhalten."}, 400)
+    session_id = data.get("session_id")
+    if session_id is not None and not valid_session_id(session_id):
+        return respond(timings, "invalid", {"error": "Ungültige session_id."}, 400)
+    stream = wants_stream(request.headers.get("accept"), data)
+    timings.lap("parse")
+
+    # Rate-Limit pro Client (IP bzw. session_id) – vor jeder weiteren Arbeit
+    if limiter is not None:
+        ip = client_ip(request.headers, request.client.host if request.client else None)
+        wait = limiter.allow(client_key(ip, session_id))
+        timings.lap("admission")
+        if wait:
+            return respond(timings, "rate_limited", {"error": "Zu viele Anfragen.", "reply": RATE_LIMIT_REPLY},
+                           429, retry_after_header(wait))
+
+    # Verlauf dieser Sitzung (Sitzungen sind je Mandant getrennt)
+    question = (data.get("message") or "").strip()
+    session_key = f"{tenant.id}:{session_id}" if session_id else None
+    history, last_praxis = sessions.history(session_key) if session_key else ([], None)
+    timings.lap("session")
+
+    def remember(reply, praxis=None):
+        if session_key:
+            sessions.append(session_key, question, reply, praxis)
+
+    # Datenschutz-/Diagnosefragen: fester Satz statt Modellaufruf (nur POLICY_MODE=enforce)
+    verdict = policy.check(user_message) if policy is not None else None
+    timings.lap("policy")
+    if verdict is not None and verdict.enforce:
+        remember(verdict.reply)
+        if stream:
+            return stream_response(iter_sse(iter([verdict.reply]), meta={"source": "policy"}), timings, "policy")
+        return respond(timings, "policy", {"reply": verdict.reply, "source": "policy"})
+
+    # Eindeutige Preis-/Behandlungsfragen ohne Modell beantworten
+    local_reply = tenant.price_index.answer(user_message)
+    timings.lap("local")
+    if local_reply:
+        remember(local_reply)
+        if stream:
+            return stream_response(iter_sse(iter([local_reply]), meta={"source": "local"}), timings, "local")
+        return respond(timings, "local", {"reply": local_reply, "source": "local"})
+
+    # Standort erkennen – sonst der zuletzt im Gespräch genannte
+    praxis_key = tenant.location_matcher.best(question) or last_praxis
+    timings.lap("praxis")
+
+    # Wiederholte Fragen direkt aus dem Cache beantworten
+    # (nur ohne Verlauf – mit Verlauf hängt die Antwort vom Gespräch ab)
+    cache_key = make_key(user_message, praxis_key, tenant.model, tenant.cache_version)
+    cached = reply_cache.get(cache_key) if not history else None
+    timings.lap("cache")
+    if cached is not None:
+        remember(cached, praxis_key)
+        if stream:
+            return stream_response(
+                iter_sse(iter([cached]), meta={"source": "model", "cached": True}), timings, "cache")
+        return respond(timings, "cache", {"reply": cached, "source": "model", "cached": True})
+
+    # Upstream voll: sofort abweisen statt minutenlang in der Warteschlange
+    # (eine Frage, die gerade schon beantwortet wird, wird nur mitgenommen)
+    flight_key = f"{cache_key}:{session_key}" if history else cache_key
+    wait = gate.retry_after(None if stream else flight_key)
+    if wait:
+        return respond(timings, "shed", {"error": "Überlastet.", "reply": OVERLOAD_REPLY},
+                       503, retry_after_header(wait))
+
+    # Nur die passendsten Website-Abschnitte mitschicken
+    passages = tenant.retrieval_index.retrieve(user_message, RETRIEVAL_K) if tenant.retrieval_index else []
+    timings.lap("retrieval")
+    messages, prompt_tokens = tenant.prompt_builder.build(user_message, praxis_key, passages, history)
+    timings.lap("prompt")
+    model = tenant.model
+
+    def finish(reply, answered_by=model):
+        # Antworten des Fallback-Modells nicht cachen – sonst bliebe die
+        # schwächere Antwort bis zum TTL, auch wenn das Modell wieder da ist
+        if not history and answered_by == model:
+            reply_cache.set(cache_key, reply)
+        remember(reply, praxis_key)
+        if policy is not None:
+            policy.observe(verdict, reply)
+
+    # Optional: Antwort als Server-Sent Events streamen
+    if stream:
+        return stream_response(stream_reply(messages, finish, prompt_tokens, model, timings))
+
+    async def complete():
+        completion, answered_by = await resilient.create(model, messages, temperature=0.3)
+        log_usage(completion.usage, prompt_tokens, answered_by)
+        reply = completion.choices[0].message.content.strip()
+        # auch nach einem Timeout des Wartenden noch cachen
+        if not history and answered_by == model:
+            reply_cache.set(cache_key, reply)
+        return reply
+
+    try:
+        # gleiche gleichzeitige Fragen teilen sich einen Upstream-Aufruf
+        # (mit Verlauf nur innerhalb derselben Sitzung)
+        reply = await gate.run(flight_key, complete)
+    except asyncio.TimeoutError:
+        timings.lap("upstream")
+        UPSTREAM_ERRORS.inc(kind="timeout")
+        print("⏱️ Timeout beim Modell")
+        return respond(timings, "fallback", {"reply": FALLBACK_REPLY, "source": "fallback"})
+    except Exception as e:
+        timings.lap("upstream")
+        UPSTREAM_ERRORS.inc(kind="error")
+        print("❌ Fehler:", e)
+        return respond(timings, "error", {"error": str(e)}, 500)
+    timings.lap("upstream")
+
+    # erst hier merken: bei geteiltem Aufruf gehört die Antwort jeder Sitzung
+    remember(reply, praxis_key)
+    if policy is not None:
+        policy.observe(verdict, reply)
+    timings.lap("session")
+    return respond(timings, "model", {"reply": reply, "source": "model"})
+
+
+async def stream_reply(messages, on_done, prompt_tokens=None, model=MODEL, timings=None):
+    """Streaming-Antwort; der Slot im Gate bleibt bis zum Ende belegt.
+
+    Mit `timings`: "upstream" bis zum Stream-Beginn, "stream" bis zum letzten Event.
+    """
+    timings = timings or Timings("main.chat")
+    outcome = "model"
+    async with gate.slot():
+        try:
+            # Deadline und Hedging gelten bis zum ersten Token
+            upstream, answered_by = await resilient.stream(
+                model, messages, temperature=0.3, stream_options={"include_usage": True},
+            )
+        except asyncio.TimeoutError:
+            gate.timeouts += 1
+            UPSTREAM_ERRORS.inc(kind="timeout")
+            timings.lap("upstream")
+            timings.finish("fallback")
+            for event in iter_sse(iter([FALLBACK_REPLY]), meta={"source": "fallback"}):
+                yield event
+            return
+        except Exception as e:
+            UPSTREAM_ERRORS.inc(kind="error")
+            timings.lap("upstream")
+            timings.finish("error")
+            print("❌ Fehler:", e)
+            yield sse_event({"error": str(e)}, event="error")
+            return
+        timings.lap("upstream")
+
+        done = False
+
+        def complete(reply):
+            nonlocal done
+            done = True
+            on_done(reply, answered_by)
+
+        try:
+            async for event in aiter_sse(
+                aiter_deltas(upstream, on_usage=lambda u: log_usage(u, prompt_tokens, answered_by)),
+                on_done=complete,
+                meta={"source": "model"},
+            ):
+                yield event
+        except GeneratorExit:
+            outcome = "aborted"  # Client hat die Verbindung geschlossen
+            raise
+        finally:
+            if not done and outcome != "aborted":
+                outcome = "error"  # aiter_sse hat den Fehler schon als Event gemeldet
+                UPSTREAM_ERRORS.inc(kind="stream")
+            timings.lap("stream")
+            timings.finish(outcome)
 
-# Standort erkennen
-selected_praxis = None
-for key, praxis in PRAXEN.items():
-app.include_router(booking_router, prefix="/api/booking", tags=["booking"])
\ No newline at end of file
+app.include_router(booking_router, prefix="/api/booking", tags=["booking"])
@@ -0,0 +1,193 @@
+# metrics.py
+"""Laufzeitmetriken ohne Zusatzpaket: Zähler, Histogramme, Prometheus-Text.
+
+Eine Anfrage misst ihre Schritte mit `Timings` (Rundenzeiten: `lap("prompt")`
+bucht die Zeit seit dem letzten lap auf die Stufe "prompt"); `finish()`
+trägt alle Stufen und die Gesamtzeit in feste Histogramm-Buckets ein.
+Pro Beobachtung kostet das ein bisect und eine Addition unter einem Lock.
+`render()` liefert das Textformat für Prometheus (GET /metrics in main.py);
+Werte, die andere Module ohnehin zählen (Cache, Gate, Sitzungen), kommen
+über `collect()` erst beim Abruf dazu.
+"""
+import bisect
+import json
+import threading
+import time
+
+# Sekunden: von Stufen im Mikrosekundenbereich bis zum langsamen Modellaufruf
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+def _num(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(n, "") for n in self.label_names), 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, self.label_names, key, value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [zähler je bucket …, +Inf, summe]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        self.observe_key(tuple(labels.get(n, "") for n in self.label_names), value)
+
+    def observe_key(self, key: tuple, value):
+        """Wie observe, Label-Werte als Tupel in der Reihenfolge von `labels` (schneller)."""
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[i] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        names = self.label_names + ("le",)
+        for key, series in items:
+            running = 0
+            for bound, n in zip(self.buckets + ("+Inf",), series):
+                running += n
+                yield f"{self.name}_bucket", names, key + (bound,), running
+            yield f"{self.name}_sum", self.label_names, key, series[-1]
+            yield f"{self.name}_count", self.label_names, key, running
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labels=()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def collect(self, prefix, stats, kinds=None):
+        """`stats()` liefert ein flaches dict; Zahlen werden beim Abruf als Gauges
+        `<prefix>_<key>` ausgegeben (in `kinds` genannte Keys z. B. als counter)."""
+        with self._lock:
+            self._collectors.append((prefix, stats, kinds or {}))
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, names, values, value in metric.samples():
+                lines.append(f"{name}{_labels(names, values)} {_num(value)}")
+        for prefix, stats, kinds in collectors:
+            try:
+                values = stats()
+            except Exception as e:  # eine kaputte Quelle soll /metrics nicht abschießen
+                print(f"⚠️ Metriken {prefix} nicht lesbar:", e)
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"{prefix}_{key}"
+                lines.append(f"# TYPE {name} {kinds.get(key, 'gauge')}")
+                lines.append(f"{name} {_num(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "request_stage_seconds", "Dauer einzelner Verarbeitungsschritte", ("endpoint", "stage"))
+REQUEST_SECONDS = REGISTRY.histogram(
+    "request_seconds", "Gesamtdauer einer Anfrage nach Ergebnis", ("endpoint", "outcome"))
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total", "Token-Verbrauch laut OpenAI-Usage", ("model", "kind"))
+UPSTREAM_ERRORS = REGISTRY.counter(
+    "upstream_errors_total", "Fehlgeschlagene Modellaufrufe", ("kind",))
+EMAILS = REGISTRY.counter(
+    "outbox_emails_total", "Vom Outbox-Worker bearbeitete E-Mails", ("status",))
+EMAIL_SECONDS = REGISTRY.histogram(
+    "outbox_send_seconds", "Dauer eines SMTP-Versands")
+REMINDERS = REGISTRY.counter(
+    "reminders_total", "In die Outbox gelegte Terminerinnerungen")
+
+
+class Timings:
+    """Rundenzeiten einer Anfrage; nicht threadsicher (eine Instanz pro Anfrage)."""
+
+    __slots__ = ("endpoint", "stages", "start", "_last")
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.stages = {}
+        self.start = self._last = time.perf_counter()
+
+    def lap(self, stage: str):
+        """Zeit seit dem letzten lap (bzw. Start) auf `stage` buchen."""
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def finish(self, outcome: str) -> float:
+        """Stufen und Gesamtzeit in die Histogramme eintragen; liefert die Gesamtzeit."""
+        total = time.perf_counter() - self.start
+        endpoint = self.endpoint
+        for stage, seconds in self.stages.items():
+            STAGE_SECONDS.observe_key((endpoint, stage), seconds)
+        REQUEST_SECONDS.observe_key((endpoint, outcome), total)
+        return total
+
+    def log_line(self, outcome: str, total: float, **fields) -> str:
+        """Eine JSON-Zeile pro Anfrage (für Vercel-Logs ohne /metrics)."""
+        return json.dumps({
+            "event": "timing",
+            "endpoint": self.endpoint,
+            "outcome": outcome,
+            "total_ms": round(total * 1000, 2),
+            "stages_ms": {k: round(v * 1000, 2) for k, v in self.stages.items()},
+            **fields,
+        }, ensure_ascii=False)
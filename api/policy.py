@@ -0,0 +1,290 @@
+# policy.py
+"""Lokaler Vorfilter für Datenschutz- und Diagnosefragen.
+
+Fragen nach Inhabern, IBAN, Gehältern, Passwörtern … bzw. nach Diagnosen und
+individueller medizinischer Beratung beantwortet das Modell laut
+SYSTEM_PROMPT ohnehin mit einem festen Satz. Dieser Filter erkennt sie vorher
+und spart den Modellaufruf:
+
+- Regeln: Stichwort-/Regex-Sets je Kategorie (auf gefaltetem Text, siehe
+  price_answers.fold). Ein Treffer ist ein Merkmal wie jedes Wort – wie viel
+  er zählt, lernt das Modell.
+- Modell: kleine lineare Klassifikation (Softmax über Wörter, Wortanfänge,
+  Wortpaare, Regeltreffer), trainiert aus fine_tuning_dataset.jsonl – Label ist, welchen
+  der festen Sätze die Beispielantwort enthält. `python policy.py` trainiert
+  (numpy) und schreibt policy_model.json (liegt im Repo); fehlt die Datei
+  oder passt sie nicht mehr zum Datensatz, bleibt der Filter aus. Zur
+  Laufzeit reicht ein Dict-Lookup pro Merkmal, numpy wird nicht gebraucht.
+
+Eine Kategorie gilt ab Wahrscheinlichkeit POLICY_THRESHOLD (0.8), je
+Kategorie überschreibbar (POLICY_THRESHOLD_PRIVACY, POLICY_THRESHOLD_DIAGNOSIS).
+POLICY_MODE: "shadow" (Standard) beantwortet nichts selbst, sondern
+protokolliert bei jeder Modellantwort, ob Filter und Modell übereinstimmen
+(policy_shadow_total{predicted,observed}); "enforce" antwortet lokal; "off".
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+
+from metrics import REGISTRY
+from price_answers import fold
+
+POLICY_MODE = os.getenv("POLICY_MODE", "shadow")  # off | shadow | enforce
+POLICY_THRESHOLD = float(os.getenv("POLICY_THRESHOLD", 0.8))
+
+DATASET_PATH = os.path.join(os.path.dirname(__file__), "fine_tuning_dataset.jsonl")
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "policy_model.json")
+
+NONE = "none"
+CLASSES = (NONE, "privacy", "diagnosis")
+
+# Dieselben Sätze wie im SYSTEM_PROMPT (chat.py)
+REPLIES = {
+    "privacy": "Aus Datenschutz- und Sicherheitsgründen darf ich dazu leider keine Angaben machen.",
+    "diagnosis": (
+        "Das kann ich dir leider nicht verbindlich beantworten. "
+        "Bitte wende dich direkt an unsere Praxis für eine persönliche Beratung."
+    ),
+}
+
+# Woran man den festen Satz in einer Antwort erkennt (gefaltet)
+_REPLY_MARKERS = {
+    "privacy": re.compile(r"datenschutz\S* und sicherheitsgruende"),
+    "diagnosis": re.compile(r"nicht verbindlich beantworten"),
+}
+
+_RULE_PATTERNS = {
+    "privacy": (
+        r"\b(iban|bic|kontonummer|bankverbindung|kontodaten|bankdaten)\b",
+        r"\b(eigentuemer\w*|inhaber\w*|besitzer\w*|gesellschafter\w*|geschaeftsfuehr\w*|wem gehoer\w*)\b",
+        r"\b(umsatz|umsaetze|gewinn\w*|gehalt|gehaelter|lohn|loehne|verdien\w*)\b",
+        r"\b(passwort|passwoerter|kennwort|zugangsdaten|zugang|login|server\w*)\b",
+        r"\bwie heiss\w* (der|die|eure?|dein\w*) (arzt|aerzt\w*|chef\w*|mitarbeiter\w*|doktor)",
+        r"\bprivate?\w* (adresse|nummer|handy\w*|telefon\w*)",
+    ),
+    "diagnosis": (
+        r"\b(diagnos\w*|symptom\w*)\b",
+        r"\b(entzuend\w*|infekt\w*|allergi\w*|ausschlag|eiter|knoten|nekrose|gefaessverschluss|embolie)\b",
+        r"\b(geschwollen|verfaerbt|taub|haengt|blaeulich|schmerzt)\b",
+        r"\b(schwanger\w*|stillzeit|stille|blutverduenn\w*|marcumar|autoimmun\w*|isotretinoin)\b",
+        r"medikament|tablette|antibiotik",  # auch in Zusammensetzungen (schmerztabletten)
+        r"\b(was habe ich|was hab ich|was ist los|ist das gefaehrlich|ist das normal bei mir)\b",
+    ),
+}
+# je Kategorie ein Regex (eine Suche statt sechs)
+RULES = {c: re.compile("|".join(f"(?:{p})" for p in patterns)) for c, patterns in _RULE_PATTERNS.items()}
+
+_WORD = re.compile(r"\w+")
+
+CHECKS = REGISTRY.counter("policy_checks_total", "Vorfilter: Entscheidungen", ("category", "action"))
+SHADOW = REGISTRY.counter(
+    "policy_shadow_total", "Vorfilter gegen Modellantwort (Schattenbetrieb)", ("predicted", "observed"))
+
+
+def features(text: str, rules: dict = RULES) -> set:
+    """Wörter, Wortanfänge (5 Zeichen), Wortpaare und "@kategorie" je Regeltreffer – gefaltet."""
+    folded = fold(text)
+    words = _WORD.findall(folded)
+    feats = set(words)
+    feats.update("~" + w[:5] for w in words if len(w) > 5)
+    feats.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    feats.update("@" + category for category, rule in rules.items() if rule.search(folded))
+    return feats
+
+
+def reply_category(reply: str) -> str:
+    """Welcher feste Satz in einer (Modell-)Antwort steckt – NONE, wenn keiner."""
+    folded = fold(reply)
+    for category, marker in _REPLY_MARKERS.items():
+        if marker.search(folded):
+            return category
+    return NONE
+
+
+def load_examples(path: str = DATASET_PATH):
+    """(Frage, Kategorie) aus dem Fine-Tuning-Datensatz (letzte user-/assistant-Nachricht)."""
+    examples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            messages = json.loads(line)["messages"]
+            question = next(m["content"] for m in reversed(messages) if m["role"] == "user")
+            answer = next(m["content"] for m in reversed(messages) if m["role"] == "assistant")
+            examples.append((question, reply_category(answer)))
+    return examples
+
+
+def dataset_version(path: str = DATASET_PATH) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+
+class LinearModel:
+    """Softmax-Klassifikation; Gewichte als {merkmal: [gewicht je klasse]}."""
+
+    def __init__(self, classes, bias, weights, version: str = ""):
+        self.classes = list(classes)
+        self.bias = list(bias)
+        self.weights = weights
+        self.version = version
+
+    def predict(self, feats) -> tuple:
+        """(Kategorie, Wahrscheinlichkeit)."""
+        hits = [w for w in map(self.weights.get, feats) if w is not None]
+        scores = [b + sum(column) for b, column in zip(self.bias, zip(*hits))] if hits else list(self.bias)
+        top = max(scores)
+        exps = [math.exp(s - top) for s in scores]
+        best = max(range(len(exps)), key=exps.__getitem__)
+        return self.classes[best], exps[best] / sum(exps)
+
+    @classmethod
+    def train(cls, examples, version: str = "", epochs: int = 400, lr: float = 2.0, l2: float = 1e-3):
+        """Batch-Gradientenabstieg mit numpy; Klassen nach Häufigkeit gewichtet."""
+        import numpy as np
+
+        vocab = {}
+        rows = [[vocab.setdefault(f, len(vocab)) for f in features(text)] for text, _ in examples]
+        labels = [CLASSES.index(label) for _, label in examples]
+        # Zusätzlich je Beispiel nur seine Regeltreffer – sonst lernt das Modell die Wörter
+        # auswendig, und ein Treffer allein (kurze, neue Frage) zählt kaum
+        rule_ids = {i for f, i in vocab.items() if f.startswith("@")}
+        for row, label in list(zip(rows, labels)):
+            hits = [i for i in row if i in rule_ids]
+            if hits:
+                rows.append(hits)
+                labels.append(label)
+        labels = np.array(labels)
+        x = np.zeros((len(rows), len(vocab)))
+        for i, row in enumerate(rows):
+            x[i, row] = 1.0
+        y = np.eye(len(CLASSES))[labels]
+        counts = np.maximum(y.sum(axis=0), 1)
+        sample_weight = (len(rows) / (len(CLASSES) * counts))[labels][:, None]
+
+        w = np.zeros((len(vocab), len(CLASSES)))
+        b = np.zeros(len(CLASSES))
+        for _ in range(epochs):
+            z = x @ w + b
+            z -= z.max(axis=1, keepdims=True)
+            p = np.exp(z)
+            p /= p.sum(axis=1, keepdims=True)
+            grad = (p - y) * sample_weight / len(rows)
+            w -= lr * (x.T @ grad + l2 * w)
+            b -= lr * grad.sum(axis=0)
+
+        weights = {f: [round(float(v), 5) for v in w[i]] for f, i in vocab.items() if abs(w[i]).max() > 1e-4}
+        return cls(CLASSES, [round(float(v), 5) for v in b], weights, version)
+
+    def save(self, path: str = MODEL_PATH):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "classes": self.classes, "bias": self.bias,
+                       "weights": self.weights}, f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["classes"], data["bias"], data["weights"], data.get("version", ""))
+
+
+class Verdict:
+    __slots__ = ("category", "confidence", "rule", "enforce")
+
+    def __init__(self, category: str, confidence: float, rule: bool, enforce: bool = False):
+        self.category = category
+        self.confidence = confidence
+        self.rule = rule
+        self.enforce = enforce  # lokal beantworten statt Modell
+
+    @property
+    def reply(self) -> str | None:
+        return REPLIES.get(self.category)
+
+
+class PolicyFilter:
+    def __init__(self, model: LinearModel, mode: str = POLICY_MODE, threshold: float = POLICY_THRESHOLD,
+                 thresholds: dict | None = None):
+        self.model = model
+        self.mode = mode
+        self.thresholds = {
+            c: float(os.getenv(f"POLICY_THRESHOLD_{c.upper()}", threshold)) for c in CLASSES if c != NONE}
+        self.thresholds.update(thresholds or {})
+        self.checks = 0
+        self.enforced = 0
+        self.agree = 0
+        self.disagree = 0
+
+    def check(self, text: str) -> Verdict:
+        feats = features(text)
+        category, confidence = self.model.predict(feats)
+        rule = "@" + category in feats
+        if category != NONE and confidence < self.thresholds[category]:
+            category = NONE
+        enforce = category != NONE and self.mode == "enforce"
+        self.checks += 1
+        if enforce:
+            self.enforced += 1
+        if category != NONE:
+            CHECKS.inc(category=category, action="answered" if enforce else self.mode)
+        return Verdict(category, confidence, rule, enforce)
+
+    def observe(self, verdict: Verdict | None, reply: str):
+        """Schattenbetrieb: Filter-Entscheidung mit der tatsächlichen Modellantwort vergleichen."""
+        if verdict is None:
+            return
+        observed = reply_category(reply)
+        SHADOW.inc(predicted=verdict.category, observed=observed)
+        if verdict.category == observed:
+            self.agree += 1
+        else:
+            self.disagree += 1
+        if verdict.category != NONE or observed != NONE:
+            print(json.dumps({
+                "event": "policy_shadow", "predicted": verdict.category, "observed": observed,
+                "agree": verdict.category == observed, "confidence": round(verdict.confidence, 3),
+                "rule": verdict.rule,
+            }))
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "model": self.model.version, "checks": self.checks,
+                "enforced": self.enforced, "agree": self.agree, "disagree": self.disagree}
+
+
+def load_model(path: str = MODEL_PATH, dataset: str = DATASET_PATH):
+    """policy_model.json, wenn vorhanden und passend zum Datensatz – sonst None
+    (Vorfilter aus). Trainiert wird nur mit `python policy.py`, nie beim Start."""
+    try:
+        model = LinearModel.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ Policy-Modell nicht lesbar ({e}) – Vorfilter aus (python policy.py)")
+        return None
+    try:
+        version = dataset_version(dataset)
+    except OSError:
+        return model  # Datensatz nicht mit ausgeliefert – nichts zu vergleichen
+    if model.version != version:
+        print(f"⚠️ Policy-Modell {model.version} passt nicht zu {os.path.basename(dataset)} ({version}) "
+              f"– Vorfilter aus (python policy.py)")
+        return None
+    return model
+
+
+def policy_from_env():
+    """Vorfilter laut POLICY_MODE; None = aus (oder kein Modell)."""
+    if POLICY_MODE not in ("shadow", "enforce"):
+        return None
+    model = load_model()
+    return PolicyFilter(model) if model is not None else None
+
+
+if __name__ == "__main__":
+    dataset = sys.argv[1] if len(sys.argv) > 1 else DATASET_PATH
+    examples = load_examples(dataset)
+    model = LinearModel.train(examples, dataset_version(dataset))
+    model.save()
+    counts = {c: sum(1 for _, label in examples if label == c) for c in CLASSES}
+    print(f"💾 Policy-Modell {model.version}: {counts}, {len(model.weights)} Merkmale → {MODEL_PATH}")
@@ -0,0 +1,185 @@
+# price_answers.py
+"""Lokale Antworten auf Preis- und Behandlungsfragen direkt aus config.json.
+
+Beim Laden wird ein Index über die Schlüssel von `preise` und `behandlungen`
+aufgebaut (plus Aliase). Nur eindeutige Treffer werden lokal beantwortet,
+alles andere geht wie bisher ans Modell.
+"""
+import difflib
+import re
+from functools import lru_cache
+
+# Alias → Wort, das in einem Preis-/Behandlungsschlüssel vorkommt
+ALIASES = {
+    "lippe": "lippen",
+    "lippenunterspritzung": "lippen",
+    "nase": "nasenkorrektur",
+    "nasen": "nasenkorrektur",
+    "augenring": "augenringe",
+    "traenensaecke": "traenenrinne",
+    "wange": "wangen",
+    "kiefer": "jawline",
+    "kieferlinie": "jawline",
+    "fettweg": "fettwegspritze",
+    "fettabsaugung": "fettwegspritze",
+    "doppelkinn": "fettwegspritze",
+    "faltenbehandlung": "botox",
+    "faden": "faeden",
+    "needling": "microneedling",
+    "peeling": "biorepeel",
+    "skinbooster": "profhilo",
+    "filler": "hyaluron",
+}
+
+_STOPWORDS = {"ohne", "stueck", "grosse", "behandlung", "nachbehandlung"}
+_FOLD = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss", "\xad": ""})
+_WORD = re.compile(r"\w+")
+_AMOUNT = re.compile(r"(\d+(?:[.,]\d+)?)\s*ml")
+_LIST_PREFIX = re.compile(r"^[A-Z]\.\s+")  # "B. Botox" → "Botox"
+
+PRICE_WORDS = {"kostet", "kosten", "preis", "preise", "teuer", "euro", "eur", "preisliste"}
+INFO_PATTERNS = re.compile(r"\b(was ist|was sind|was macht|was bringt|wie wirkt|wie funktioniert|erklaer)")
+# Beschwerden/Diagnose-Fragen gehören nie in die Preis-Schablone ("schmerzen nach botox, ist das teuer?")
+SYMPTOM_PATTERNS = re.compile(
+    r"schmerz|\b(weh|tut weh|brennt|juckt|taub|blau\w*|rot|roetung|geschwollen|schwellung|bluterguss|beule)\b"
+    r"|entzuend|infekt|allergi|ausschlag|eiter|knoten|beschwerden|symptom|diagnos|nekrose"
+    r"|\b(schwanger\w*|stille|stillzeit)\b|medikament|tablette|antibiotik"
+)
+
+# Fragen, die trotz Preis-/Behandlungswort nicht lokal beantwortet werden dürfen
+NOT_LOCAL = [
+    "schmerzen nach botox, ist das teuer?",
+    "Meine Lippe ist nach dem Filler geschwollen, was kostet die Behandlung?",
+    "Ich habe eine Entzündung an der Wange, was kostet Hylase?",
+    "Ich bin schwanger, was kostet Botox?",
+    "Wie viel kostet es, wenn ich Medikamente nehme und Lippen machen will?",
+]
+
+
+def fold(text: str) -> str:
+    """Kleinschreibung + Umlaute ausschreiben, damit 'tränen' == 'traenen'."""
+    return text.lower().translate(_FOLD)
+
+
+def _amount(text: str):
+    m = _AMOUNT.search(text)
+    return m.group(1).replace(".", ",") if m else None
+
+
+def price_names(preise: dict) -> dict:
+    """Schlüssel → Anzeigename: ohne Listenpräfix/weiches Trennzeichen, und reine
+    Mengen ("2 ml") mit der Behandlung des Eintrags davor ("Lippen 2 ml")."""
+    names, base = {}, None
+    for key in preise:
+        name = _LIST_PREFIX.sub("", key.replace("\xad", "")).strip()
+        rest = _AMOUNT.sub("", name).strip(" /-")
+        if rest:
+            base = rest
+        elif base:
+            name = f"{base} {name}"
+        names[key] = name
+    return names
+
+
+class PriceIndex:
+    """Fuzzy-Index über Preis- und Behandlungsschlüssel einer config.json."""
+
+    def __init__(self, config: dict, aliases: dict | None = None, min_score: float = 0.85):
+        self.preise = config.get("preise", {})
+        self.behandlungen = config.get("behandlungen", {})
+        self.names = price_names(self.preise)
+        self.min_score = min_score
+
+        # Wort → Schlüssel (als ("preis"|"info", key)); Preise über den Anzeigenamen,
+        # damit "2 ml" unter "lippen" gefunden wird
+        self.words = {}
+        for kind, table in (("preis", self.names), ("info", self.behandlungen)):
+            for key, name in table.items():
+                text = name if kind == "preis" else key
+                for word in _WORD.findall(fold(text)):
+                    if len(word) >= 4 and not word.isdigit() and word not in _STOPWORDS:
+                        self.words.setdefault(word, set()).add((kind, key))
+
+        merged = {**ALIASES, **(aliases or {})}
+        for alias, target in merged.items():
+            hits = self.words.get(fold(target))
+            if hits:
+                self.words.setdefault(fold(alias), set()).update(hits)
+
+        self.vocab = sorted(self.words)
+        self._lookup = lru_cache(maxsize=4096)(self._lookup_uncached)
+
+    def _lookup_uncached(self, token: str):
+        """(Wort im Index, Score) für ein Nachrichtenwort – oder None."""
+        if token in self.words:
+            return token, 1.0
+        if len(token) < 5:
+            return None
+        # Zusammensetzungen: "botoxbehandlung", "lippenunterspritzung"
+        for word in self.vocab:
+            if len(word) >= 5 and token.startswith(word):
+                return word, 0.95
+        # Tippfehler: "bottox", "mikroneedling"
+        close = difflib.get_close_matches(token, self.vocab, n=1, cutoff=self.min_score)
+        if close:
+            return close[0], difflib.SequenceMatcher(None, token, close[0]).ratio()
+        return None
+
+    def match(self, message: str):
+        """Alle sicher erkannten Schlüssel als Menge von (kind, key)."""
+        hits = set()
+        for token in _WORD.findall(fold(message)):
+            found = self._lookup(token)
+            if found and found[1] >= self.min_score:
+                hits |= self.words[found[0]]
+        return hits
+
+    def answer(self, message: str) -> str | None:
+        """Template-Antwort für eindeutige Preis-/Behandlungsfragen, sonst None."""
+        text = fold(message)
+        tokens = set(_WORD.findall(text))
+        asks_price = bool(tokens & PRICE_WORDS) or "€" in text
+        asks_info = bool(INFO_PATTERNS.search(text))
+        if not (asks_price or asks_info) or SYMPTOM_PATTERNS.search(text):
+            return None
+
+        hits = self.match(message)
+        price_keys = [key for kind, key in hits if kind == "preis"]
+        info_keys = [key for kind, key in hits if kind == "info"]
+
+        # "lippen 1 ml" → nur die passende Menge; gibt es die nicht, weiß es das Modell besser
+        amount = _amount(text)
+        if amount and price_keys:
+            price_keys = [k for k in price_keys if _amount(fold(self.names[k])) == amount]
+            if not price_keys:
+                return None
+
+        parts = []
+        if asks_info and info_keys:
+            parts += [self.behandlungen[k] for k in sorted(info_keys)]
+        if asks_price and price_keys:
+            price_keys = sorted(price_keys, key=list(self.preise).index)
+            if len(price_keys) == 1:
+                key = price_keys[0]
+                parts.append(f"{self.names[key]}: {self.preise[key]}.")
+            else:
+                lines = [f"• {self.names[k]}: {self.preise[k]}" for k in price_keys]
+                parts.append("Unsere aktuellen Preise:\n" + "\n".join(lines))
+        if not parts:
+            return None
+
+        parts.append("Für eine persönliche Beratung oder einen Termin melde dich gern bei uns.")
+        return "\n\n".join(parts)
+
+
+if __name__ == "__main__":
+    # Schnelltest gegen die echte config.json:  python price_answers.py
+    import json
+    import os
+
+    with open(os.path.join(os.path.dirname(__file__), "config.json"), encoding="utf-8") as f:
+        index = PriceIndex(json.load(f))
+    wrong = [q for q in NOT_LOCAL if index.answer(q) is not None]
+    for q in wrong:
+        print("❌ lokal beantwortet:", q)
+    print(f"{len(NOT_LOCAL) - len(wrong)}/{len(NOT_LOCAL)} Beschwerde-Fragen gehen ans Modell")
@@ -0,0 +1,178 @@
+# prompt.py
+"""Prompt-Aufbau mit stabilem, cachebarem Präfix und Token-Budget.
+
+Alle Config-Blöcke (Praxen, Preise, Behandlungen, Praxisdaten je Standort)
+werden einmal pro Config-Version serialisiert und gezählt. Pro Anfrage wird
+nur noch zusammengesetzt: [System + statische Blöcke] → [Praxisdaten] →
+[Website-Auszüge aus retrieval.py] → [Verlauf aus sessions.py] → [User].
+Der erste Teil ist für alle Anfragen identisch, damit das Prompt-Caching des
+Providers greift; die Nutzerfrage steht immer am Ende.
+"""
+import json
+import os
+import re
+
+from metrics import LLM_TOKENS
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", 3000))
+
+_PRICE_HINT = re.compile(r"kost|preis|teuer|euro|€|angebot", re.I)
+_INFO_HINT = re.compile(r"behandl|was ist|wirk|hilft|dauer|risiko|nebenwirk", re.I)
+_PLACE_HINT = re.compile(r"standort|praxis|praxen|stadt|wo ", re.I)
+
+# Relevanz-Muster je Config-Block (zum Kürzen bei knappem Budget)
+HINTS = {"praxen": _PLACE_HINT, "preise": _PRICE_HINT, "behandlungen": _INFO_HINT}
+
+_ENCODING = None  # tiktoken wird erst beim ersten Zählen geladen (Kaltstart)
+
+
+def count_tokens(text: str) -> int:
+    """Tokens per tiktoken; ohne tiktoken grob ~4 Zeichen pro Token."""
+    global _ENCODING
+    if _ENCODING is None:
+        try:
+            import tiktoken
+
+            _ENCODING = tiktoken.get_encoding("o200k_base")
+        except Exception:  # tiktoken ist optional
+            _ENCODING = False
+    if _ENCODING:
+        return len(_ENCODING.encode(text))
+    return (len(text) + 3) // 4
+
+
+def _dump(data) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+class PromptBuilder:
+    """Vorberechnete Prompt-Blöcke für eine Config-Version."""
+
+    def __init__(self, config: dict, system_prompt: str, default_praxis: dict,
+                 version: str = "", budget: int = PROMPT_TOKEN_BUDGET):
+        self.version = version
+        self.budget = budget
+        self.system_prompt = system_prompt
+        praxen = config.get("praxen", {})
+
+        # (Name, Text) – Reihenfolge = Reihenfolge im Präfix
+        self.sections = []
+        if praxen:
+            self.sections.append(("praxen", f"Standorte: {', '.join(praxen)}"))
+        if config.get("preise"):
+            self.sections.append(("preise", f"Preise: {_dump(config['preise'])}"))
+        if config.get("behandlungen"):
+            self.sections.append(("behandlungen", f"Behandlungen: {_dump(config['behandlungen'])}"))
+        self.section_tokens = {name: count_tokens(text) for name, text in self.sections}
+        self.system_tokens = count_tokens(system_prompt)
+        self.prefix = self._join([text for _, text in self.sections])
+        self.prefix_tokens = count_tokens(self.prefix)
+
+        self.praxis_blocks = {key: f"Praxisdaten: {_dump(p)}" for key, p in praxen.items()}
+        self.praxis_blocks[None] = f"Praxisdaten: {_dump(default_praxis)}"
+        self.praxis_tokens = {key: count_tokens(text) for key, text in self.praxis_blocks.items()}
+
+    # Felder, die in den Config-Snapshot wandern (siehe config_snapshot.py)
+    _SNAPSHOT_FIELDS = (
+        "version", "system_prompt", "sections", "section_tokens", "system_tokens",
+        "prefix", "prefix_tokens", "praxis_blocks", "praxis_tokens",
+    )
+
+    def to_snapshot(self) -> dict:
+        state = {name: getattr(self, name) for name in self._SNAPSHOT_FIELDS}
+        # JSON kennt keinen None-Key: "" steht für die allgemeine Praxis
+        for name in ("praxis_blocks", "praxis_tokens"):
+            state[name] = {("" if k is None else k): v for k, v in state[name].items()}
+        return state
+
+    @classmethod
+    def from_snapshot(cls, state: dict, budget: int = PROMPT_TOKEN_BUDGET):
+        """Builder aus vorberechneten Blöcken – ohne erneutes Serialisieren/Zählen."""
+        self = cls.__new__(cls)
+        for name in cls._SNAPSHOT_FIELDS:
+            setattr(self, name, state[name])
+        self.sections = [tuple(s) for s in self.sections]
+        for name in ("praxis_blocks", "praxis_tokens"):
+            setattr(self, name, {(k or None): v for k, v in state[name].items()})
+        self.budget = budget
+        return self
+
+    def _join(self, blocks):
+        return "\n\n".join([self.system_prompt, *blocks])
+
+    def build(self, user_message: str, praxis_key: str | None = None, passages=(), history=()):
+        """(messages, geschätzte Prompt-Tokens) für eine Anfrage.
+
+        Was nach den Config-Blöcken vom Budget übrig ist, bekommt zuerst der
+        Gesprächsverlauf (`history`: [(message, tokens)], älteste zuerst –
+        aufgefüllt wird ab der neuesten Runde), danach die `passages`
+        (retrieval.Passage), bestplatzierte zuerst.
+        """
+        praxis_block = self.praxis_blocks.get(praxis_key, self.praxis_blocks[None])
+        fixed = self.praxis_tokens.get(praxis_key, self.praxis_tokens[None]) + count_tokens(user_message)
+        system, total = self.prefix, self.prefix_tokens + fixed
+
+        if total > self.budget:
+            system, total = self._trimmed(user_message, fixed)
+
+        messages = [
+            {"role": "system", "content": system},
+            {"role": "system", "content": praxis_block},
+        ]
+        recent = []
+        for message, tokens in reversed(history):
+            if total + tokens > self.budget:
+                break
+            recent.append(message)
+            total += tokens
+        recent.reverse()
+
+        excerpts = []
+        for passage in passages:
+            if total + passage.tokens > self.budget:
+                break
+            excerpts.append(passage.text)
+            total += passage.tokens
+        if excerpts:
+            messages.append({"role": "system", "content": "Auszüge von der Website:\n\n" + "\n\n".join(excerpts)})
+        messages.extend(recent)
+        messages.append({"role": "user", "content": user_message})
+        return messages, total
+
+    def _trimmed(self, user_message, fixed):
+        """Unwichtigste Config-Blöcke weglassen, bis das Budget passt."""
+        keep = list(self.sections)
+        total = self.system_tokens + fixed + sum(self.section_tokens[n] for n, _ in keep)
+        # nicht angesprochene Blöcke zuerst, innerhalb davon von hinten
+        order = sorted(
+            range(len(keep)),
+            key=lambda i: (bool(HINTS[keep[i][0]].search(user_message)), -i),
+        )
+        dropped = set()
+        for i in order:
+            if total <= self.budget:
+                break
+            dropped.add(i)
+            total -= self.section_tokens[keep[i][0]]
+        if total > self.budget:
+            print(f"⚠️ Prompt über Budget: {total} > {self.budget} Tokens")
+        names = [keep[i][0] for i in sorted(dropped)]
+        print(f"✂️ Prompt gekürzt um: {', '.join(names)}")
+        return self._join([text for i, (_, text) in enumerate(keep) if i not in dropped]), total
+
+
+def log_usage(usage, estimate: int | None = None, model: str = ""):
+    """Token-Verbrauch einer Antwort als eine Logzeile."""
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) if details else None
+    LLM_TOKENS.inc(usage.prompt_tokens, model=model, kind="prompt")
+    LLM_TOKENS.inc(usage.completion_tokens, model=model, kind="completion")
+    if cached:
+        LLM_TOKENS.inc(cached, model=model, kind="cached")
+    print(
+        f"🧮 Tokens {model}: prompt={usage.prompt_tokens}"
+        f" (cached={cached or 0}, geschätzt={estimate})"
+        f" completion={usage.completion_tokens}"
+    )
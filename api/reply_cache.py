@@ -0,0 +1,153 @@
+# reply_cache.py
+"""Antwort-Cache für wiederkehrende Chatfragen (LRU + TTL, optional SQLite)."""
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_PUNCT = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """Kleinschreibung, Satzzeichen raus, Leerraum zusammenfassen."""
+    text = _PUNCT.sub(" ", (message or "").lower())
+    return _SPACES.sub(" ", text).strip()
+
+
+def make_key(message: str, praxis_key: str | None, model: str, version: str) -> str:
+    """`version`: Hash der config.json (+ Index-Version) – jede Änderung ergibt neue Keys."""
+    raw = "\x1f".join([normalize_message(message), praxis_key or "-", model, version])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SQLiteReplyStore:
+    """Zweite Cache-Stufe in der SQLite-DB aus db.py (überlebt Neustarts).
+
+    Abgelaufene Zeilen werden beim Schreiben mitgelöscht – alle `purge_every`
+    Schreibvorgänge einmal, über den Index auf expires_at.
+    """
+
+    def __init__(self, engine=None, purge_every: int = 100):
+        from sqlalchemy import Column, Float, MetaData, String, Table, Text
+
+        if engine is None:
+            from db import engine
+        self.engine = engine
+        self.table = Table(
+            "reply_cache",
+            MetaData(),
+            Column("key", String(64), primary_key=True),
+            Column("reply", Text, nullable=False),
+            Column("expires_at", Float, nullable=False, index=True),
+        )
+        self.table.create(bind=engine, checkfirst=True)
+        self.purge_every = purge_every
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, now: float):
+        from sqlalchemy import select
+
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(self.table.c.reply).where(
+                    self.table.c.key == key, self.table.c.expires_at > now
+                )
+            ).first()
+        return row[0] if row else None
+
+    def set(self, key: str, reply: str, expires_at: float):
+        with self._lock:
+            self._writes += 1
+            purge = self._writes % self.purge_every == 0
+        with self.engine.begin() as conn:
+            conn.execute(self.table.delete().where(self.table.c.key == key))
+            conn.execute(self.table.insert().values(key=key, reply=reply, expires_at=expires_at))
+            if purge:
+                conn.execute(self.table.delete().where(self.table.c.expires_at < time.time()))
+
+    def purge(self, now: float | None = None) -> int:
+        """Abgelaufene Zeilen löschen; liefert die Anzahl."""
+        now = time.time() if now is None else now
+        with self.engine.begin() as conn:
+            return conn.execute(self.table.delete().where(self.table.c.expires_at < now)).rowcount
+
+
+class ReplyCache:
+    """In-Process-LRU mit TTL, davor optional ein persistenter Store."""
+
+    def __init__(self, maxsize: int = 512, ttl: float = 3600, store=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.store = store
+        self._data = OrderedDict()  # key -> (expires_at, reply)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and entry[0] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._data[key]
+
+        reply = None
+        if self.store is not None:
+            try:
+                reply = self.store.get(key, now)
+            except Exception as e:
+                print("⚠️ Cache-Store nicht lesbar:", e)
+        with self._lock:
+            if reply is None:
+                self.misses += 1
+                return None
+            self.store_hits += 1
+            self._put(key, reply, now + self.ttl)
+        return reply
+
+    def set(self, key: str, reply: str):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._put(key, reply, expires_at)
+        if self.store is not None:
+            try:
+                self.store.set(key, reply, expires_at)
+            except Exception as e:
+                print("⚠️ Cache-Store nicht beschreibbar:", e)
+
+    def _put(self, key, reply, expires_at):
+        self._data[key] = (expires_at, reply)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.store_hits + self.misses
+            return {
+                "hits": self.hits,
+                "store_hits": self.store_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.store_hits) / lookups, 4) if lookups else 0.0,
+                "size": len(self._data),
+                "ttl": self.ttl,
+            }
+
+
+def cache_from_env() -> ReplyCache:
+    """Cache laut ENV: REPLY_CACHE_SIZE, REPLY_CACHE_TTL, REPLY_CACHE_SQLITE=1."""
+    store = SQLiteReplyStore() if os.getenv("REPLY_CACHE_SQLITE") == "1" else None
+    return ReplyCache(
+        maxsize=int(os.getenv("REPLY_CACHE_SIZE", 512)),
+        ttl=float(os.getenv("REPLY_CACHE_TTL", 3600)),
+        store=store,
+    )
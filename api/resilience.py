@@ -0,0 +1,441 @@
+# resilience.py
+"""Robuster Modellaufruf: Deadline, Hedging auf ein Fallback-Modell, Circuit-Breaker.
+
+Pro Anfrage geht der Aufruf zuerst an das (feingetunte) Modell. Kommt bis zur
+Hedge-Schwelle kein erstes Token (Streaming) bzw. keine Antwort, startet
+parallel derselbe Aufruf an LLM_FALLBACK_MODEL; wer zuerst liefert, gewinnt,
+der andere wird abgebrochen. Die Schwelle ist das LLM_HEDGE_PERCENTILE-te
+Perzentil der letzten Antwortzeiten des Modells (begrenzt auf
+LLM_HEDGE_MIN…LLM_HEDGE_MAX) – es wird also nur bei den langsamsten paar
+Prozent doppelt angefragt. Schlägt ein Aufruf fehl, geht es sofort mit dem
+Fallback weiter. Alles endet spätestens nach LLM_DEADLINE Sekunden.
+
+Der Circuit-Breaker je Modell öffnet nach LLM_BREAKER_FAILURES Fehlern (oder
+verlorenen Rennen) in Folge; dann geht jede Anfrage direkt an das Fallback,
+nach LLM_BREAKER_COOLDOWN Sekunden darf ein Probeaufruf durch.
+
+AsyncResilientClient für main.py, ResilientClient (Threads) für chat.py.
+Testen lokal mit benchmarks/mock_openai.py (--fault-model, --spike-rate,
+--error-rate) und benchmarks/bench_hedging.py.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from metrics import REGISTRY
+
+LLM_FALLBACK_MODEL = os.getenv("LLM_FALLBACK_MODEL", "gpt-4o-mini")  # leer = kein Fallback
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", os.getenv("LLM_TIMEOUT", 20)))
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", 95))  # 0 = nur Fallback bei Fehlern
+LLM_HEDGE_MIN = float(os.getenv("LLM_HEDGE_MIN", 0.5))
+LLM_HEDGE_MAX = float(os.getenv("LLM_HEDGE_MAX", 4.0))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", 5))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", 30))
+
+ANSWERS = REGISTRY.counter(
+    "llm_answers_total", "Modellantworten nach Modell und Weg (primary/hedge/fallback)", ("model", "path"))
+HEDGES = REGISTRY.counter("llm_hedges_total", "Gestartete Hedge-Aufrufe", ("model",))
+FAILURES = REGISTRY.counter("llm_failures_total", "Fehlgeschlagene oder zu langsame Modellaufrufe", ("model",))
+BREAKER_OPENED = REGISTRY.counter("llm_breaker_opened_total", "Circuit-Breaker geöffnet", ("model",))
+
+
+class CircuitBreaker:
+    """closed → (Fehler in Folge) → open → (Cooldown) → half_open: ein Probeaufruf."""
+
+    def __init__(self, name: str, failures: int = LLM_BREAKER_FAILURES, cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.name = name
+        self.threshold = failures
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial = False  # im half_open-Zustand läuft schon ein Probeaufruf
+        self._lock = threading.Lock()
+
+    def available(self, now: float | None = None) -> bool:
+        """Wie allow(), ohne den Probeaufruf zu verbrauchen."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return self.state == "closed" or (
+                now - self.opened_at >= self.cooldown and not self._trial)
+
+    def allow(self, now: float | None = None) -> bool:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and now - self.opened_at >= self.cooldown:
+                self.state = "half_open"
+                self._trial = False
+            if self.state == "half_open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial = False
+
+    def failure(self, now: float | None = None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.state == "half_open" or self.failures >= self.threshold:
+                if self.state != "open":
+                    BREAKER_OPENED.inc(model=self.name)
+                    print(f"🔌 Circuit-Breaker offen für {self.name} ({self.failures} Fehler in Folge)")
+                self.state = "open"
+                self.opened_at = now
+
+    def release(self):
+        """Aufruf ohne Ergebnis (z. B. Hedge nicht mehr nötig) – Probeaufruf freigeben."""
+        with self._lock:
+            self._trial = False
+
+
+class LatencyWindow:
+    """Die letzten `size` Antwortzeiten eines Modells für die Hedge-Schwelle."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.samples = deque(maxlen=size)
+        self.min_samples = min_samples
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, q: float):
+        samples = list(self.samples)
+        if len(samples) < self.min_samples:
+            return None
+        samples.sort()
+        return samples[min(len(samples) - 1, int(len(samples) * q / 100))]
+
+
+class AsyncResumedStream:
+    """OpenAI-Stream, dessen erste Chunks schon gelesen wurden (für das Rennen)."""
+
+    def __init__(self, stream, head, rest):
+        self.stream = stream
+        self.head = head
+        self.rest = rest
+
+    async def __aiter__(self):
+        try:
+            for chunk in self.head:
+                yield chunk
+            async for chunk in self.rest:
+                yield chunk
+        finally:
+            await self.close()
+
+    async def close(self):
+        await self.stream.close()
+
+
+class ResumedStream:
+    def __init__(self, stream, head, rest):
+        self.stream = stream
+        self.head = head
+        self.rest = rest
+
+    def __iter__(self):
+        try:
+            yield from self.head
+            yield from self.rest
+        finally:
+            self.close()
+
+    def close(self):
+        self.stream.close()
+
+
+def _has_content(chunk) -> bool:
+    return bool(chunk.choices and chunk.choices[0].delta.content)
+
+
+class _Policy:
+    """Routing, Hedge-Schwelle und Buchführung – gemeinsam für sync und async."""
+
+    def __init__(self, fallback_model: str | None = LLM_FALLBACK_MODEL, deadline: float = LLM_DEADLINE,
+                 hedge_percentile: float = LLM_HEDGE_PERCENTILE, hedge_min: float = LLM_HEDGE_MIN,
+                 hedge_max: float = LLM_HEDGE_MAX):
+        self.fallback_model = fallback_model or None
+        self.deadline = deadline
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min = hedge_min
+        self.hedge_max = hedge_max
+        self._breakers = {}
+        self._windows = {}
+        self._lock = threading.Lock()
+        self.hedged = 0
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(model)
+            if breaker is None:
+                breaker = self._breakers[model] = CircuitBreaker(model)
+            return breaker
+
+    def window(self, model: str, kind: str) -> LatencyWindow:
+        with self._lock:
+            window = self._windows.get((model, kind))
+            if window is None:
+                window = self._windows[(model, kind)] = LatencyWindow()
+            return window
+
+    def route(self, model: str):
+        """(erstes Modell, Weg, Fallback oder None)."""
+        fallback = self.fallback_model if self.fallback_model != model else None
+        if fallback and not self.breaker(model).allow():
+            return fallback, "fallback", None  # Modell gilt als gestört → direkt zum Fallback
+        return model, "primary", fallback
+
+    def hedge_delay(self, model: str, kind: str) -> float | None:
+        if self.hedge_percentile <= 0:
+            return None
+        p = self.window(model, kind).percentile(self.hedge_percentile)
+        return self.hedge_max if p is None else min(self.hedge_max, max(self.hedge_min, p))
+
+    def won(self, model: str, path: str, kind: str, elapsed: float):
+        self.breaker(model).success()
+        self.window(model, kind).add(elapsed)
+        ANSWERS.inc(model=model, path=path)
+
+    def failed(self, model: str, kind: str | None = None, elapsed: float | None = None):
+        self.breaker(model).failure()
+        FAILURES.inc(model=model)
+        if kind and elapsed:
+            self.window(model, kind).add(elapsed)  # mindestens so lange hat es gedauert
+
+    def _settle(self, model, path, kind, t0, losers):
+        """Gewinner verbuchen; wer früher gestartet wurde und verloren hat, war zu langsam."""
+        now = time.monotonic()
+        self.won(model, path, kind, now - t0)
+        for loser, _, started in list(losers):
+            if started < t0:
+                self.failed(loser, kind, now - started)
+            else:
+                self.breaker(loser).release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            breakers = {m: b.state for m, b in self._breakers.items()}
+        return {"fallback_model": self.fallback_model, "hedged": self.hedged, "breakers": breakers}
+
+
+class AsyncResilientClient(_Policy):
+    def __init__(self, client, **kwargs):
+        super().__init__(**kwargs)
+        # Wiederholen übernimmt das Fallback – SDK-Retries würden nur die Deadline aufbrauchen
+        self.client = client.with_options(max_retries=0)
+
+    async def create(self, model: str, messages, **kwargs):
+        """Ganze Antwort: (completion, Modell, das geantwortet hat)."""
+        async def call(m, timeout):
+            return await self.client.chat.completions.create(
+                model=m, messages=messages, timeout=timeout, **kwargs)
+
+        return await self._race(model, call, "complete")
+
+    async def stream(self, model: str, messages, **kwargs):
+        """Stream ab dem ersten Token: (AsyncResumedStream, Modell); gehedgt wird auf das erste Token."""
+        async def call(m, timeout):
+            stream = await self.client.chat.completions.create(
+                model=m, messages=messages, stream=True, timeout=timeout, **kwargs)
+            rest, head = stream.__aiter__(), []
+            try:
+                async for chunk in rest:
+                    head.append(chunk)
+                    if _has_content(chunk):
+                        break
+            except BaseException:
+                await stream.close()
+                raise
+            return AsyncResumedStream(stream, head, rest)
+
+        return await self._race(model, call, "first_token")
+
+    async def _race(self, model, call, kind):
+        start = time.monotonic()
+        deadline = start + self.deadline
+        first, path, spare = self.route(model)  # spare: Fallback, solange es nicht läuft
+        running = {}  # task -> (modell, weg, startzeit)
+
+        def launch(m, p):
+            task = asyncio.ensure_future(call(m, max(0.1, deadline - time.monotonic())))
+            running[task] = (m, p, time.monotonic())
+
+        launch(first, path)
+        delay = self.hedge_delay(first, kind) if spare else None
+        hedge_at = None if delay is None else start + delay
+        error = None
+        try:
+            while running:
+                now = time.monotonic()
+                if now >= deadline:
+                    for m, _, t0 in running.values():
+                        self.failed(m, kind, now - t0)
+                    running_models = ", ".join(m for m, _, _ in running.values())
+                    raise asyncio.TimeoutError(f"Deadline {self.deadline}s überschritten ({running_models})")
+                wake = deadline if hedge_at is None else min(deadline, hedge_at)
+                done, _ = await asyncio.wait(running, timeout=wake - now, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if hedge_at is not None and time.monotonic() >= hedge_at:
+                        hedge_at = None
+                        if self.breaker(spare).allow():
+                            self.hedged += 1
+                            HEDGES.inc(model=spare)
+                            launch(spare, "hedge")
+                            spare = None
+                    continue
+                winner = None
+                for task in done:
+                    m, p, t0 = running.pop(task)
+                    if task.exception() is not None:
+                        error = task.exception()
+                        print(f"⚠️ Modell {m} fehlgeschlagen:", error)
+                        self.failed(m)
+                    elif winner is None:
+                        winner = (task.result(), m, p, t0)
+                    else:
+                        await _aclose(task.result())
+                        self.breaker(m).release()
+                if winner is not None:
+                    result, m, p, t0 = winner
+                    self._settle(m, p, kind, t0, running.values())
+                    return result, m
+                if spare and not running:
+                    # Fehler: sofort weiter mit dem Fallback statt auf die Hedge-Schwelle zu warten
+                    hedge_at = None
+                    if self.breaker(spare).allow():
+                        launch(spare, "fallback")
+                    spare = None
+            raise error
+        finally:
+            for task in running:
+                task.cancel()
+
+
+async def _aclose(result):
+    if isinstance(result, AsyncResumedStream):
+        await result.close()
+
+
+class ResilientClient(_Policy):
+    """Dasselbe für den synchronen OpenAI-Client (chat.py): Aufrufe laufen in Threads.
+
+    Ein verlorener Aufruf ohne Stream lässt sich nicht abbrechen; er läuft im
+    Hintergrund bis zu seinem Timeout weiter (höchstens LLM_HEDGE_THREADS).
+    """
+
+    def __init__(self, get_client, threads: int = int(os.getenv("LLM_HEDGE_THREADS", 8)), **kwargs):
+        super().__init__(**kwargs)
+        self._get_client = get_client
+        self._client = None
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="llm")
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self._get_client().with_options(max_retries=0)
+        return self._client
+
+    def create(self, model: str, messages, **kwargs):
+        def call(m, timeout):
+            return self.client.chat.completions.create(model=m, messages=messages, timeout=timeout, **kwargs)
+
+        return self._race(model, call, "complete")
+
+    def stream(self, model: str, messages, **kwargs):
+        def call(m, timeout):
+            stream = self.client.chat.completions.create(
+                model=m, messages=messages, stream=True, timeout=timeout, **kwargs)
+            rest, head = iter(stream), []
+            try:
+                for chunk in rest:
+                    head.append(chunk)
+                    if _has_content(chunk):
+                        break
+            except BaseException:
+                stream.close()
+                raise
+            return ResumedStream(stream, head, rest)
+
+        return self._race(model, call, "first_token")
+
+    def _race(self, model, call, kind):
+        start = time.monotonic()
+        deadline = start + self.deadline
+        first, path, spare = self.route(model)
+        running = {}  # future -> (modell, weg, startzeit)
+
+        def launch(m, p):
+            future = self._pool.submit(call, m, max(0.1, deadline - time.monotonic()))
+            running[future] = (m, p, time.monotonic())
+
+        launch(first, path)
+        delay = self.hedge_delay(first, kind) if spare else None
+        hedge_at = None if delay is None else start + delay
+        error = None
+        try:
+            while running:
+                now = time.monotonic()
+                if now >= deadline:
+                    for m, _, t0 in running.values():
+                        self.failed(m, kind, now - t0)
+                    running_models = ", ".join(m for m, _, _ in running.values())
+                    raise TimeoutError(f"Deadline {self.deadline}s überschritten ({running_models})")
+                wake = deadline if hedge_at is None else min(deadline, hedge_at)
+                done, _ = wait(running, timeout=wake - now, return_when=FIRST_COMPLETED)
+                if not done:
+                    if hedge_at is not None and time.monotonic() >= hedge_at:
+                        hedge_at = None
+                        if self.breaker(spare).allow():
+                            self.hedged += 1
+                            HEDGES.inc(model=spare)
+                            launch(spare, "hedge")
+                            spare = None
+                    continue
+                winner = None
+                for future in done:
+                    m, p, t0 = running.pop(future)
+                    if future.exception() is not None:
+                        error = future.exception()
+                        print(f"⚠️ Modell {m} fehlgeschlagen:", error)
+                        self.failed(m)
+                    elif winner is None:
+                        winner = (future.result(), m, p, t0)
+                    else:
+                        _close(future.result())
+                        self.breaker(m).release()
+                if winner is not None:
+                    result, m, p, t0 = winner
+                    self._settle(m, p, kind, t0, running.values())
+                    return result, m
+                if spare and not running:
+                    hedge_at = None
+                    if self.breaker(spare).allow():
+                        launch(spare, "fallback")
+                    spare = None
+            raise error
+        finally:
+            for future in running:
+                if not future.cancel():
+                    future.add_done_callback(_discard)
+
+
+def _close(result):
+    if isinstance(result, ResumedStream):
+        result.close()
+
+
+def _discard(future):
+    """Verlorenen Aufruf aufräumen, sobald er fertig ist (Stream schließen)."""
+    if not future.cancelled() and future.exception() is None:
+        _close(future.result())
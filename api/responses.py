@@ -0,0 +1,246 @@
+# responses.py
+"""Gemeinsame Antwort-Schicht für chat.py (BaseHTTPRequestHandler) und main.py
+(FastAPI): JSON über orjson (ohne orjson: json), Kompression nach
+Accept-Encoding (br, falls brotli installiert ist, sonst gzip) ab
+COMPRESS_MIN_BYTES und ETag/304 für GET-Antworten.
+
+Server-Sent-Events werden nie komprimiert (gzip puffert, die Deltas kämen
+sonst verspätet an). Bewusst ohne FastAPI/Starlette-Import – chat.py lädt das
+Modul beim Vercel-Kaltstart.
+"""
+import hashlib
+import json
+import os
+import zlib
+
+try:
+    import orjson
+except ImportError:  # orjson ist optional
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # brotli ist optional, gzip geht immer
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 5))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 4))
+COMPRESSIBLE = ("application/json", "application/x-ndjson", "text/")
+NEVER_COMPRESS = ("text/event-stream",)
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY if orjson else 0
+
+
+def dumps(obj) -> bytes:
+    """JSON als UTF-8-Bytes, Umlaute unescaped (wie ensure_ascii=False)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=_ORJSON_OPTIONS)
+        except TypeError:
+            pass  # Typen, die orjson nicht kennt → json mit str()
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def choose_encoding(accept_encoding: str | None) -> str | None:
+    """"br" oder "gzip", je nachdem was der Client annimmt (q=0 zählt als nein)."""
+    accepted = set()
+    for part in (accept_encoding or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if name and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(name)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compressible(content_type: str | None) -> bool:
+    content_type = (content_type or "").lower()
+    return content_type.startswith(COMPRESSIBLE) and not content_type.startswith(NEVER_COMPRESS)
+
+
+def compress(raw: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(raw, quality=BROTLI_QUALITY)
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31 = gzip-Container
+    return compressor.compress(raw) + compressor.flush()
+
+
+class StreamCompressor:
+    """Blockweise komprimieren; jeder Block wird sofort ausgeliefert (Sync-Flush)."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._c.process(data) + self._c.flush()
+        return self._c.compress(data) + self._c.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._c.finish() if self.encoding == "br" else self._c.flush()
+
+
+def etag(raw: bytes) -> str:
+    """Schwaches ETag über den unkomprimierten Inhalt (gilt für jede Kodierung)."""
+    return f'W/"{hashlib.blake2b(raw, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, tag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = tag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == bare for candidate in if_none_match.split(","))
+
+
+def encode(body, status: int = 200, *, accept_encoding: str | None = None, if_none_match: str | None = None,
+           cacheable: bool = False) -> tuple:
+    """(status, headers, raw) für eine JSON-Antwort – für chat.py.
+
+    `cacheable`: ETag setzen und bei passendem If-None-Match 304 ohne Inhalt.
+    """
+    raw = dumps(body) if body else b""
+    headers = {"Content-Type": "application/json"}
+    if cacheable and status == 200:
+        tag = etag(raw)
+        headers["ETag"] = tag
+        headers["Cache-Control"] = "no-cache"
+        if etag_matches(if_none_match, tag):
+            del headers["Content-Type"]
+            return 304, headers, b""
+    if len(raw) >= COMPRESS_MIN_BYTES:
+        headers["Vary"] = "Accept-Encoding"
+        encoding = choose_encoding(accept_encoding)
+        if encoding:
+            raw = compress(raw, encoding)
+            headers["Content-Encoding"] = encoding
+    headers["Content-Length"] = str(len(raw))
+    return status, headers, raw
+
+
+def _header(headers: list, name: bytes):
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _set_header(headers: list, name: bytes, value: str | None):
+    """Header ersetzen (None = entfernen); `headers` ist die rohe ASGI-Liste."""
+    headers[:] = [(k, v) for k, v in headers if k.lower() != name]
+    if value is not None:
+        headers.append((name, value.encode("latin-1")))
+
+
+def _add_vary(headers: list):
+    vary = _header(headers, b"vary")
+    if not vary:
+        _set_header(headers, b"vary", "Accept-Encoding")
+    elif "accept-encoding" not in vary.lower():
+        _set_header(headers, b"vary", f"{vary}, Accept-Encoding")
+
+
+class ResponseMiddleware:
+    """ASGI-Middleware: ETag/304 für GET-Antworten mit festem Inhalt, Kompression
+    für große Antworten und Streams (Exporte) – außer SSE."""
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = scope["headers"]
+        encoding = choose_encoding(_header(request_headers, b"accept-encoding"))
+        is_get = scope["method"] == "GET"
+        if encoding is None and not is_get:
+            await self.app(scope, receive, send)
+            return
+        responder = _Responder(send, encoding, _header(request_headers, b"if-none-match") if is_get else None,
+                               is_get, self.minimum_size)
+        await self.app(scope, receive, responder)
+
+
+class _Responder:
+    def __init__(self, send, encoding, if_none_match, is_get, minimum_size):
+        self.send = send
+        self.encoding = encoding
+        self.if_none_match = if_none_match
+        self.is_get = is_get
+        self.minimum_size = minimum_size
+        self.start = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+        if self.compressor is not None:
+            await self._send_compressed(message)
+            return
+
+        headers = list(self.start["headers"])
+        self.start = {**self.start, "headers": headers}
+        body, more = message.get("body", b""), message.get("more_body", False)
+        status = self.start["status"]
+        content_type = _header(headers, b"content-type")
+        can_compress = (self.encoding is not None and _header(headers, b"content-encoding") is None
+                        and compressible(content_type))
+
+        if not more:
+            # ganzer Inhalt liegt vor: ETag, ggf. 304, ggf. in einem Stück komprimieren
+            if self.is_get and status == 200 and compressible(content_type):
+                tag = _header(headers, b"etag") or etag(body)
+                _set_header(headers, b"etag", tag)
+                if _header(headers, b"cache-control") is None:
+                    _set_header(headers, b"cache-control", "no-cache")
+                if etag_matches(self.if_none_match, tag):
+                    _set_header(headers, b"content-length", None)
+                    _set_header(headers, b"content-type", None)
+                    await self.send({**self.start, "status": 304})
+                    await self.send({"type": "http.response.body", "body": b""})
+                    return
+            if len(body) >= self.minimum_size and compressible(content_type):
+                _add_vary(headers)
+                if can_compress:
+                    body = compress(body, self.encoding)
+                    _set_header(headers, b"content-encoding", self.encoding)
+                    _set_header(headers, b"content-length", str(len(body)))
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": body})
+            return
+
+        # Stream (z. B. CSV-Export): blockweise komprimieren, Länge unbekannt
+        if not can_compress:
+            self.passthrough = True
+            await self.send(self.start)
+            await self.send(message)
+            return
+        self.compressor = StreamCompressor(self.encoding)
+        _set_header(headers, b"content-length", None)
+        _set_header(headers, b"content-encoding", self.encoding)
+        _add_vary(headers)
+        await self.send(self.start)
+        await self._send_compressed(message)
+
+    async def _send_compressed(self, message):
+        data = self.compressor.chunk(message.get("body", b""))
+        if message.get("more_body", False):
+            if data:
+                await self.send({"type": "http.response.body", "body": data, "more_body": True})
+            return
+        await self.send({"type": "http.response.body", "body": data + self.compressor.finish()})
@@ -0,0 +1,307 @@
+# retrieval.py
+"""BM25-Suche über die gescrapte Website (website_data.txt) und config.json.
+
+Offline wird der Text in kurze Abschnitte zerlegt und ein kompakter Index
+geschrieben (Postings als NumPy-Arrays, Texte als ein Byte-Block). Zur
+Laufzeit werden die Arrays nur per mmap geöffnet; eine Anfrage summiert die
+vorberechneten BM25-Gewichte ihrer Wörter mit einem `bincount`.
+
+Aufbau / Aktualisieren (aus api/):  python retrieval.py [website_data.txt]
+Unveränderte Seiten werden dabei aus `chunks.jsonl` übernommen, nur geänderte
+neu zerlegt.
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+from collections import Counter
+from typing import NamedTuple
+
+from price_answers import fold
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_DIR = os.path.join(API_DIR, "retrieval_index")
+WEBSITE_PATH = os.path.join(API_DIR, "..", "website_data.txt")
+CONFIG_PATH = os.path.join(API_DIR, "config.json")
+
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", 3))
+CHUNK_WORDS = 80  # Zielgröße eines Abschnitts
+K1, B = 1.2, 0.75
+
+_WORD = re.compile(r"\w+")
+_SOURCE = re.compile(r"^### Quelle: (.+)$", re.M)
+_SUFFIXES = ("en", "er", "es", "e", "n", "s")
+_STOPWORDS = {
+    "der", "die", "das", "den", "dem", "des", "ein", "eine", "einen", "einer", "und",
+    "oder", "ist", "sind", "im", "in", "am", "an", "auf", "mit", "fuer", "von", "zu",
+    "zum", "zur", "bei", "wie", "was", "wo", "ich", "du", "wir", "ihr", "es", "sie",
+    "mir", "mich", "dir", "euch", "auch", "noch", "nur", "nicht", "kann", "man",
+}
+
+
+class Passage(NamedTuple):
+    text: str
+    source: str
+    score: float
+    tokens: int
+
+
+def _stem(word: str) -> str:
+    """Sehr grobe Endungskürzung, damit 'behandlungen' == 'behandlung' und
+    'preise' == 'preis'. Wird wiederholt, bis nichts mehr passt."""
+    while len(word) > 4:
+        suffix = next((s for s in _SUFFIXES if word.endswith(s)), None)
+        if suffix is None:
+            break
+        word = word[: -len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> list:
+    return [_stem(w) for w in _WORD.findall(fold(text)) if len(w) > 1 and w not in _STOPWORDS]
+
+
+# ---------------------------------------------------------------- Quellen
+
+def website_sources(path: str = WEBSITE_PATH) -> dict:
+    """{url: text} aus website_data.txt (Abschnitte '### Quelle: …')."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        raw = f.read()
+    parts = _SOURCE.split(raw)
+    # split liefert [vorspann, url1, text1, url2, text2, …]
+    return {url.strip(): text.strip() for url, text in zip(parts[1::2], parts[2::2])
+            if not text.strip().startswith("Fehler beim Laden")}
+
+
+def config_sources(config: dict) -> dict:
+    """Config-Abschnitte als eigene Quellen – je Praxis, Behandlung und Preis eine Zeile."""
+    sources = {}
+    for key, praxis in config.get("praxen", {}).items():
+        sources[f"config:praxen/{key}"] = "\n".join(f"{k}: {v}" for k, v in praxis.items())
+    for name, text in config.get("behandlungen", {}).items():
+        sources[f"config:behandlungen/{name}"] = f"{name}: {text}"
+    if config.get("preise"):
+        sources["config:preise"] = "\n".join(f"{k}: {v}" for k, v in config["preise"].items())
+    if config.get("socials"):
+        sources["config:socials"] = "\n".join(f"{k}: {v}" for k, v in config["socials"].items())
+    return sources
+
+
+def chunk_text(text: str, size: int = CHUNK_WORDS) -> list:
+    """Zeilen zu Abschnitten von ~`size` Wörtern bündeln; die letzte Zeile
+    eines Abschnitts wird als Kontext in den nächsten übernommen."""
+    chunks, lines, words = [], [], 0
+    for line in text.replace("\xad", "").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        lines.append(line)
+        words += len(line.split())
+        if words >= size:
+            chunks.append("\n".join(lines))
+            lines = lines[-1:] if len(lines) > 1 else []
+            words = len(lines[0].split()) if lines else 0
+    if lines and (not chunks or len(lines) > 1 or words >= size // 4):
+        chunks.append("\n".join(lines))
+    return chunks
+
+
+# ---------------------------------------------------------------- Aufbau
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _load_chunk_cache(index_dir: str) -> dict:
+    """{quelle: (hash, [chunk, …])} aus einem früheren Lauf."""
+    cached = {}
+    path = os.path.join(index_dir, "chunks.jsonl")
+    if not os.path.exists(path):
+        return cached
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            entry = cached.setdefault(row["source"], (row["hash"], []))
+            entry[1].append(row)
+    return cached
+
+
+def _save(index_dir: str, name: str, writer):
+    """Erst in eine Temp-Datei schreiben, dann atomar ersetzen."""
+    path = os.path.join(index_dir, name)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        writer(f)
+    os.replace(tmp, path)
+
+
+def build_index(sources: dict, index_dir: str = INDEX_DIR) -> dict:
+    """Index für {quelle: text} schreiben; gibt Statistik zurück."""
+    import numpy as np
+
+    from prompt import count_tokens
+
+    os.makedirs(index_dir, exist_ok=True)
+    cached = _load_chunk_cache(index_dir)
+
+    rows, reused = [], 0
+    for source in sorted(sources):
+        text = sources[source]
+        digest = _hash(text)
+        if source in cached and cached[source][0] == digest:
+            rows.extend(cached[source][1])
+            reused += 1
+            continue
+        for chunk in chunk_text(text):
+            rows.append({
+                "source": source,
+                "hash": digest,
+                "text": chunk,
+                "tokens": count_tokens(chunk),
+                "tf": Counter(tokenize(chunk)),
+            })
+
+    # Vokabular + Postings (Term → Chunks), Gewichte vorab nach BM25
+    n_docs = len(rows)
+    vocab = {term: i for i, term in enumerate(sorted({t for r in rows for t in r["tf"]}))}
+    sizes = np.array([len(r["tf"]) for r in rows], dtype=np.int64)
+    doc_ids = np.repeat(np.arange(n_docs, dtype=np.int32), sizes)
+    terms, counts = [], []
+    for r in rows:
+        terms.extend(r["tf"])
+        counts.extend(r["tf"].values())
+    term_ids = np.array([vocab[t] for t in terms], dtype=np.int64)
+    tf = np.array(counts, dtype=np.float32)
+
+    lengths = np.bincount(doc_ids, weights=tf, minlength=n_docs).astype(np.float32)
+    avgdl = float(lengths.mean()) if n_docs else 1.0
+    df = np.bincount(term_ids, minlength=len(vocab))
+    idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+    norm = K1 * (1 - B + B * lengths[doc_ids] / avgdl)
+    bm25 = idf[term_ids] * tf * (K1 + 1) / (tf + norm)
+
+    order = np.argsort(term_ids, kind="stable")  # nach Term gruppiert, darin nach Chunk
+    docs, weights = doc_ids[order], bm25[order].astype(np.float32)
+    indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(df)
+
+    texts = [r["text"].encode("utf-8") for r in rows]
+    offsets = np.zeros(n_docs + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(t) for t in texts])
+    source_names = sorted({r["source"] for r in rows})
+    source_ids = {s: i for i, s in enumerate(source_names)}
+    version = _hash("".join(f"{s}:{_hash(sources[s])}" for s in sorted(sources)))[:12]
+
+    def npy(array):
+        return lambda f: np.save(f, array)
+
+    _save(index_dir, "indptr.npy", npy(indptr))
+    _save(index_dir, "docs.npy", npy(docs))
+    _save(index_dir, "weights.npy", npy(weights))
+    _save(index_dir, "offsets.npy", npy(offsets))
+    _save(index_dir, "doc_source.npy", npy(np.array([source_ids[r["source"]] for r in rows], dtype=np.int32)))
+    _save(index_dir, "doc_tokens.npy", npy(np.array([r["tokens"] for r in rows], dtype=np.int32)))
+    _save(index_dir, "texts.bin", lambda f: [f.write(t) for t in texts])
+    _save(index_dir, "vocab.json", lambda f: f.write(json.dumps(vocab, ensure_ascii=False).encode("utf-8")))
+    _save(index_dir, "chunks.jsonl", lambda f: f.writelines(
+        (json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8") for r in rows))
+    # meta.json zuletzt: erst damit gilt der neue Index
+    meta = {"version": version, "docs": n_docs, "terms": len(vocab), "sources": source_names}
+    _save(index_dir, "meta.json", lambda f: f.write(json.dumps(meta, ensure_ascii=False).encode("utf-8")))
+    return {**meta, "sources": len(sources), "reused": reused}
+
+
+# ---------------------------------------------------------------- Suche
+
+class RetrievalIndex:
+    """Lesender Zugriff auf einen mit `build_index` geschriebenen Index.
+
+    Beim Start wird nur meta.json gelesen (Version für den Antwort-Cache);
+    NumPy, Vokabular und die mmap-Arrays kommen erst mit der ersten Suche.
+    """
+
+    def __init__(self, index_dir: str = INDEX_DIR):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.version = self.meta["version"]
+        self._arrays = None
+
+    def _load(self):
+        import numpy as np
+
+        def mmap(name):
+            return np.load(os.path.join(self.index_dir, name), mmap_mode="r")
+
+        with open(os.path.join(self.index_dir, "vocab.json"), "r", encoding="utf-8") as f:
+            vocab = json.load(f)
+        texts = np.memmap(os.path.join(self.index_dir, "texts.bin"), dtype=np.uint8, mode="r")
+        self._arrays = (
+            vocab, mmap("indptr.npy"), mmap("docs.npy"), mmap("weights.npy"),
+            mmap("offsets.npy"), mmap("doc_source.npy"), mmap("doc_tokens.npy"), texts,
+        )
+        return self._arrays
+
+    def retrieve(self, message: str, k: int = RETRIEVAL_K) -> list:
+        """Die `k` besten Abschnitte zu `message` (nur Treffer mit Score > 0)."""
+        if not self.meta["docs"] or k <= 0:
+            return []
+        import numpy as np
+
+        vocab, indptr, docs, weights, offsets, doc_source, doc_tokens, texts = self._arrays or self._load()
+        ids = [vocab[t] for t in set(tokenize(message)) if t in vocab]
+        if not ids:
+            return []
+        hit_docs = np.concatenate([docs[indptr[i]:indptr[i + 1]] for i in ids])
+        hit_weights = np.concatenate([weights[indptr[i]:indptr[i + 1]] for i in ids])
+        scores = np.bincount(hit_docs, weights=hit_weights, minlength=self.meta["docs"])
+
+        candidates = np.unique(hit_docs)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        top = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        sources = self.meta["sources"]
+        return [
+            Passage(
+                text=texts[offsets[d]:offsets[d + 1]].tobytes().decode("utf-8"),
+                source=sources[doc_source[d]],
+                score=round(float(scores[d]), 3),
+                tokens=int(doc_tokens[d]),
+            )
+            for d in top
+        ]
+
+
+_warned_missing = False  # fehlender Index: nur einmal pro Prozess melden (Mandanten laden einzeln nach)
+
+
+def load_index(index_dir: str = INDEX_DIR):
+    """Index laden – None, wenn (noch) keiner gebaut wurde oder er unlesbar ist."""
+    global _warned_missing
+    if os.getenv("RETRIEVAL", "1") != "1":
+        return None
+    if not os.path.exists(os.path.join(index_dir, "meta.json")):
+        if not _warned_missing:
+            _warned_missing = True
+            print(f"⚠️ RETRIEVAL=1, aber kein Index in {index_dir} – Antworten ohne Website-Auszüge "
+                  f"(bauen mit: python retrieval.py, dann mitcommitten)")
+        return None
+    try:
+        return RetrievalIndex(index_dir)
+    except (OSError, ValueError, KeyError) as e:
+        print("⚠️ Retrieval-Index nicht lesbar:", e)
+        return None
+
+
+if __name__ == "__main__":
+    website = sys.argv[1] if len(sys.argv) > 1 else WEBSITE_PATH
+    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    all_sources = {**website_sources(website), **config_sources(config)}
+    stats = build_index(all_sources)
+    print(f"💾 Index {stats['version']}: {stats['docs']} Abschnitte, {stats['terms']} Wörter, "
+          f"{stats['reused']}/{stats['sources']} Quellen unverändert übernommen → {INDEX_DIR}")
@@ -0,0 +1,219 @@
+# sessions.py
+"""Gesprächsverlauf pro `session_id` (LRU im Prozess, optional SQLite).
+
+Pro Runde wird nur ein Tupel (Frage, Antwort, Tokens) gespeichert, die Texte
+als UTF-8-Bytes (ein "–" macht aus einem str sonst 2 Byte pro Zeichen). Wird ein
+Verlauf länger als SESSION_TOKEN_LIMIT, fallen die ältesten Runden heraus;
+ihre Fragen bleiben als kurze Zusammenfassung erhalten. Sitzungen, die
+länger als SESSION_IDLE_TTL nicht benutzt wurden, werden verworfen – das
+LRU ist nach letzter Nutzung sortiert, abgelaufene liegen also vorne.
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from prompt import count_tokens
+
+SESSION_MAX = int(os.getenv("SESSION_MAX", 10000))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", 1800))
+SESSION_TOKEN_LIMIT = int(os.getenv("SESSION_TOKEN_LIMIT", 1000))
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", 12))
+SUMMARY_QUESTIONS = 4  # so viele frühere Fragen bleiben in der Zusammenfassung
+SUMMARY_CHARS = 80
+
+_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+
+def valid_session_id(session_id) -> bool:
+    return isinstance(session_id, str) and bool(_SESSION_ID.match(session_id))
+
+
+class Session:
+    __slots__ = ("turns", "summary", "praxis", "tokens", "last_seen")
+
+    def __init__(self, turns=(), summary=(), praxis=None, last_seen=0.0):
+        self.turns = list(turns)  # [(frage, antwort, tokens)] – Texte als UTF-8-Bytes
+        self.summary = tuple(summary)  # gekürzte Fragen herausgefallener Runden
+        self.praxis = praxis  # zuletzt erkannter Standort
+        self.tokens = sum(t[2] for t in self.turns)
+        self.last_seen = last_seen
+
+    def to_json(self) -> str:
+        turns = [(q.decode("utf-8"), a.decode("utf-8"), t) for q, a, t in self.turns]
+        return json.dumps(
+            {"turns": turns, "summary": self.summary, "praxis": self.praxis},
+            ensure_ascii=False, separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_json(cls, raw: str, last_seen: float):
+        data = json.loads(raw)
+        turns = [(q.encode("utf-8"), a.encode("utf-8"), t) for q, a, t in data["turns"]]
+        return cls(turns, data.get("summary", ()), data.get("praxis"), last_seen)
+
+
+class SQLiteSessionStore:
+    """Zweite Stufe in der SQLite-DB aus db.py (überlebt Neustarts/Worker-Wechsel).
+
+    Abgelaufene Zeilen räumt SessionStore.append alle `purge_every` Runden mit ab.
+    """
+
+    def __init__(self, engine=None):
+        from sqlalchemy import Column, Float, MetaData, String, Table, Text
+
+        if engine is None:
+            from db import engine
+        self.engine = engine
+        self.table = Table(
+            "chat_sessions",
+            MetaData(),
+            Column("id", String(100), primary_key=True),
+            Column("data", Text, nullable=False),
+            Column("updated_at", Float, nullable=False, index=True),
+        )
+        self.table.create(bind=engine, checkfirst=True)
+
+    def get(self, session_id: str, newer_than: float):
+        from sqlalchemy import select
+
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(self.table.c.data, self.table.c.updated_at).where(
+                    self.table.c.id == session_id, self.table.c.updated_at > newer_than
+                )
+            ).first()
+        return (row[0], row[1]) if row else None
+
+    def set(self, session_id: str, data: str, updated_at: float):
+        with self.engine.begin() as conn:
+            conn.execute(self.table.delete().where(self.table.c.id == session_id))
+            conn.execute(self.table.insert().values(id=session_id, data=data, updated_at=updated_at))
+
+    def purge(self, older_than: float):
+        with self.engine.begin() as conn:
+            return conn.execute(self.table.delete().where(self.table.c.updated_at <= older_than)).rowcount
+
+
+class SessionStore:
+    """LRU der aktiven Sitzungen mit Idle-Timeout, davor optional ein persistenter Store."""
+
+    def __init__(self, maxsize: int = SESSION_MAX, idle_ttl: float = SESSION_IDLE_TTL,
+                 token_limit: int = SESSION_TOKEN_LIMIT, max_turns: int = SESSION_MAX_TURNS, store=None,
+                 purge_every: int = 200):
+        self.maxsize = maxsize
+        self.idle_ttl = idle_ttl
+        self.token_limit = token_limit
+        self.max_turns = max_turns
+        self.store = store
+        self.purge_every = purge_every
+        self._appends = 0
+        self._data = OrderedDict()  # id -> Session, älteste Nutzung vorne
+        self._lock = threading.Lock()
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+
+    def _evict(self, now):
+        """Abgelaufene vorne abräumen, dann auf maxsize kürzen (Lock wird gehalten)."""
+        while self._data:
+            key, session = next(iter(self._data.items()))
+            if session.last_seen > now - self.idle_ttl:
+                break
+            del self._data[key]
+            self.evicted_idle += 1
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evicted_lru += 1
+
+    def _load(self, session_id, now):
+        with self._lock:
+            session = self._data.get(session_id)
+            if session is not None and session.last_seen > now - self.idle_ttl:
+                return session
+        if self.store is None:
+            return None
+        try:
+            row = self.store.get(session_id, now - self.idle_ttl)
+        except Exception as e:
+            print("⚠️ Session-Store nicht lesbar:", e)
+            return None
+        return Session.from_json(row[0], row[1]) if row else None
+
+    def history(self, session_id: str):
+        """(Verlauf als [(message, tokens)], letzter Standort) – ältestes zuerst."""
+        session = self._load(session_id, time.time())
+        if session is None:
+            return [], None
+        with self._lock:
+            turns, summary, praxis = list(session.turns), session.summary, session.praxis
+        messages = []
+        if summary:
+            text = "Früher im Gespräch gefragt: " + " | ".join(summary)
+            messages.append(({"role": "system", "content": text}, count_tokens(text)))
+        for question, answer, tokens in turns:
+            # Token-Zahl gilt für die ganze Runde; beim Kürzen werden Paare entfernt
+            messages.append(({"role": "user", "content": question.decode("utf-8")}, 0))
+            messages.append(({"role": "assistant", "content": answer.decode("utf-8")}, tokens))
+        return messages, praxis
+
+    def append(self, session_id: str, question: str, answer: str, praxis: str | None = None):
+        """Runde anhängen, alte Runden bei Bedarf in die Zusammenfassung schieben."""
+        now = time.time()
+        session = self._load(session_id, now) or Session(last_seen=now)
+        tokens = count_tokens(question) + count_tokens(answer)
+        with self._lock:
+            session.turns.append((question.encode("utf-8"), answer.encode("utf-8"), tokens))
+            session.tokens += tokens
+            if praxis:
+                session.praxis = praxis
+            dropped = []
+            while len(session.turns) > 1 and (
+                    session.tokens > self.token_limit or len(session.turns) > self.max_turns):
+                old = session.turns.pop(0)
+                session.tokens -= old[2]
+                dropped.append(old[0].decode("utf-8")[:SUMMARY_CHARS])
+            if dropped:
+                session.summary = (session.summary + tuple(dropped))[-SUMMARY_QUESTIONS:]
+            session.last_seen = now
+            self._data[session_id] = session
+            self._data.move_to_end(session_id)
+            self._evict(now)
+            data = session.to_json() if self.store is not None else None
+            self._appends += 1
+            purge = self._appends % self.purge_every == 0
+        if data is not None:
+            try:
+                self.store.set(session_id, data, now)
+                if purge:
+                    self.store.purge(now - self.idle_ttl)
+            except Exception as e:
+                print("⚠️ Session-Store nicht beschreibbar:", e)
+
+    def purge(self) -> int:
+        """Abgelaufene Sitzungen auch im persistenten Store löschen."""
+        now = time.time()
+        with self._lock:
+            before = len(self._data)
+            self._evict(now)
+            removed = before - len(self._data)
+        if self.store is not None:
+            removed += self.store.purge(now - self.idle_ttl) or 0
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "active": len(self._data),
+                "maxsize": self.maxsize,
+                "idle_ttl": self.idle_ttl,
+                "evicted_idle": self.evicted_idle,
+                "evicted_lru": self.evicted_lru,
+            }
+
+
+def sessions_from_env() -> SessionStore:
+    """Store laut ENV: SESSION_MAX, SESSION_IDLE_TTL, SESSION_TOKEN_LIMIT, SESSION_SQLITE=1."""
+    store = SQLiteSessionStore() if os.getenv("SESSION_SQLITE") == "1" else None
+    return SessionStore(store=store)
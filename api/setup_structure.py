@@ -1,35 +1,26 @@
+# setup_structure.py
+"""Neuen Kunden anlegen.
+
+Standard: nur ein Mandanten-Eintrag `api/tenants/<name>.json`, den main.py
+(TenantRegistry) beim ersten Aufruf lädt – kein eigenes Projekt, keine eigene
+Serverless-Funktion.
+
+    python setup_structure.py pureaesthetics --host chat.pureaesthetics.de
+    python setup_structure.py pureaesthetics --projekt   # altes Einzelprojekt
+"""
+import argparse
 import os
 import json
+import re
 import subprocess
 
-print("🧠 Chatbot Setup – Automatische Projektstruktur mit GitHub-Link")
-
-# === Kundennamen abfragen ===
-client_name = input("Bitte Kundennamen eingeben (z. B. liquid, pureaesthetics): ").strip().lower()
-if not client_name:
-    print("❌ Kein Name eingegeben – Abbruch.")
-    exit()
-
-github_user = input("GitHub-Benutzernamen eingeben (z. B. bareenalhimkah-ui): ").strip()
-if not github_user:
-    print("❌ Kein GitHub-Benutzername angegeben – Abbruch.")
-    exit()
+TENANTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tenants")
 
-# === Ordnerstruktur ===
-BASE_DIR = os.getcwd()
-project_path = os.path.join(BASE_DIR, f"{client_name}-chatbot")
-api_path = os.path.join(project_path, "api")
-os.makedirs(api_path, exist_ok=True)
-
-# === Root .gitignore ===
-root_gitignore = """.vercel/
+ROOT_GITIGNORE = """.vercel/
 .env.local
 """
-with open(os.path.join(project_path, ".gitignore"), "w", encoding="utf-8") as f:
-    f.write(root_gitignore)
 
-# === API .gitignore ===
-api_gitignore = """# Python Cache & Virtualenvs
+API_GITIGNORE = """# Python Cache & Virtualenvs
 __pycache__/
 *.pyc
 *.pyo
@@ -45,11 +36,8 @@ env/
 # Schutz: Frontend bleibt auf GitHub
 !../index.html
 """
-with open(os.path.join(api_path, ".gitignore"), "w", encoding="utf-8") as f:
-    f.write(api_gitignore)
 
-# === Backend chat.py ===
-chat_py = """from http.server import BaseHTTPRequestHandler
+CHAT_PY = """from http.server import BaseHTTPRequestHandler
 import os, json
 from datetime import datetime
 from openai import OpenAI
@@ -103,12 +91,10 @@ class handler(BaseHTTPRequestHandler):
         except Exception as e:
             self._send(500, {"error": str(e)})
 """
-with open(os.path.join(api_path, "chat.py"), "w", encoding="utf-8") as f:
-    f.write(chat_py)
 
-# === config.json Vorlage ===
-config = {
-    "praxis": {
+
+def praxis_template(client_name):
+    return {
         "name": client_name.capitalize() + " Aesthetik",
         "adresse": "Adresse einfügen",
         "telefon": "Telefonnummer einfügen",
@@ -116,12 +102,64 @@ config = {
         "beschreibung": "Praxisbeschreibung hier einfügen",
         "slogan": "Für natürliche Schönheit.",
     }
-}
-with open(os.path.join(api_path, "config.json"), "w", encoding="utf-8") as f:
-    json.dump(config, f, indent=2, ensure_ascii=False)
 
-# === index.html (Frontend) ===
-index_html = f"""<!DOCTYPE html>
+
+def create_tenant(client_name, hosts=()):
+    """Mandanten-Eintrag im Schema von config.json schreiben."""
+    if not re.match(r"^[a-z0-9][a-z0-9_-]{0,62}$", client_name):
+        print("❌ Name nur aus a–z, 0–9, - und _ – Abbruch.")
+        return None
+    os.makedirs(TENANTS_DIR, exist_ok=True)
+    path = os.path.join(TENANTS_DIR, f"{client_name}.json")
+    if os.path.exists(path):
+        print(f"❌ Mandant '{client_name}' existiert bereits: {path}")
+        return None
+
+    config = {
+        "tenant": {
+            "name": client_name.capitalize() + " Aesthetik",
+            "hosts": list(hosts),
+        },
+        "praxen": {client_name: praxis_template(client_name)},
+        "preise": {},
+        "behandlungen": {},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2, ensure_ascii=False)
+
+    print(f"\n✅ Mandant '{client_name}' angelegt: {path}")
+    print(f"👉 Erreichbar über Header 'X-Tenant: {client_name}' oder /t/{client_name}/api/chat", end="")
+    print(f" und {', '.join(hosts)}" if hosts else "")
+    return path
+
+
+def create_project(client_name, github_user):
+    """Eigenständiges <client>-chatbot-Projekt (bisheriges Verhalten)."""
+    # === Ordnerstruktur ===
+    BASE_DIR = os.getcwd()
+    project_path = os.path.join(BASE_DIR, f"{client_name}-chatbot")
+    api_path = os.path.join(project_path, "api")
+    os.makedirs(api_path, exist_ok=True)
+
+    # === Root .gitignore ===
+    with open(os.path.join(project_path, ".gitignore"), "w", encoding="utf-8") as f:
+        f.write(ROOT_GITIGNORE)
+
+    # === API .gitignore ===
+    with open(os.path.join(api_path, ".gitignore"), "w", encoding="utf-8") as f:
+        f.write(API_GITIGNORE)
+
+    # === Backend chat.py ===
+    with open(os.path.join(api_path, "chat.py"), "w", encoding="utf-8") as f:
+        f.write(CHAT_PY)
+
+    # === config.json Vorlage ===
+    config = {"praxis": praxis_template(client_name)}
+    with open(os.path.join(api_path, "config.json"), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2, ensure_ascii=False)
+
+    # === index.html (Frontend) ===
+    index_html = f"""<!DOCTYPE html>
 <html lang='de'>
 <head>
   <meta charset='UTF-8'>
@@ -157,20 +195,46 @@ index_html = f"""<!DOCTYPE html>
 </body>
 </html>
 """
-with open(os.path.join(project_path, "index.html"), "w", encoding="utf-8") as f:
-    f.write(index_html)
-
-# === Git Initialisierung ===
-os.chdir(project_path)
-subprocess.run(["git", "init"])
-subprocess.run(["git", "branch", "-M", "main"])
-subprocess.run(["git", "add", "."])
-subprocess.run(["git", "commit", "-m", "Initial commit – " + client_name])
-
-remote_url = f"https://github.com/{github_user}/{client_name}-chatbot.git"
-subprocess.run(["git", "remote", "add", "origin", remote_url])
-print(f"\n📦 Git-Repository vorbereitet: {remote_url}")
-print("❗ Falls das Repo auf GitHub noch nicht existiert, bitte dort manuell anlegen und dann:")
-print("👉 git push -u origin main")
-
-print(f"\n✅ Fertig! Struktur für '{client_name}-chatbot' erstellt unter:\n{project_path}")
+    with open(os.path.join(project_path, "index.html"), "w", encoding="utf-8") as f:
+        f.write(index_html)
+
+    # === Git Initialisierung ===
+    os.chdir(project_path)
+    subprocess.run(["git", "init"])
+    subprocess.run(["git", "branch", "-M", "main"])
+    subprocess.run(["git", "add", "."])
+    subprocess.run(["git", "commit", "-m", "Initial commit – " + client_name])
+
+    remote_url = f"https://github.com/{github_user}/{client_name}-chatbot.git"
+    subprocess.run(["git", "remote", "add", "origin", remote_url])
+    print(f"\n📦 Git-Repository vorbereitet: {remote_url}")
+    print("❗ Falls das Repo auf GitHub noch nicht existiert, bitte dort manuell anlegen und dann:")
+    print("👉 git push -u origin main")
+
+    print(f"\n✅ Fertig! Struktur für '{client_name}-chatbot' erstellt unter:\n{project_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Neuen Chatbot-Kunden anlegen")
+    parser.add_argument("name", nargs="?", help="Kundenname, z. B. pureaesthetics")
+    parser.add_argument("--host", action="append", default=[], help="Domain des Kunden (mehrfach möglich)")
+    parser.add_argument("--projekt", action="store_true", help="eigenständiges Projekt statt Mandant")
+    args = parser.parse_args()
+
+    print("🧠 Chatbot Setup")
+
+    # === Kundennamen abfragen ===
+    client_name = (args.name or input("Bitte Kundennamen eingeben (z. B. liquid, pureaesthetics): ")).strip().lower()
+    if not client_name:
+        print("❌ Kein Name eingegeben – Abbruch.")
+        exit()
+
+    if not args.projekt:
+        create_tenant(client_name, args.host)
+        exit()
+
+    github_user = input("GitHub-Benutzernamen eingeben (z. B. bareenalhimkah-ui): ").strip()
+    if not github_user:
+        print("❌ Kein GitHub-Benutzername angegeben – Abbruch.")
+        exit()
+    create_project(client_name, github_user)
@@ -0,0 +1,85 @@
+# streaming.py
+"""Server-Sent-Events-Helfer für das optionale Streaming von /api/chat."""
+import json
+
+
+def wants_stream(accept: str | None, data: dict) -> bool:
+    """Streaming nur auf Wunsch: `Accept: text/event-stream` oder `"stream": true`."""
+    if data.get("stream") is True:
+        return True
+    return "text/event-stream" in (accept or "").lower()
+
+
+def sse_event(payload: dict, event: str | None = None) -> bytes:
+    """Ein SSE-Event als UTF-8-Bytes (`event:`-Zeile optional)."""
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(payload, ensure_ascii=False))
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+def iter_deltas(stream, on_usage=None):
+    """Text-Deltas aus einem OpenAI-Stream (`stream=True`) herausziehen.
+
+    Mit `stream_options={"include_usage": True}` kommt zum Schluss ein Chunk
+    mit `usage`; der geht an `on_usage`.
+    """
+    for chunk in stream:
+        if on_usage and getattr(chunk, "usage", None):
+            on_usage(chunk.usage)
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+
+
+def iter_sse(deltas, on_done=None, meta=None):
+    """Deltas als SSE weiterreichen, am Ende ein `done`-Event mit der ganzen Antwort.
+
+    `on_done(reply)` wird nach erfolgreichem Abschluss aufgerufen (z. B. zum Cachen),
+    `meta` landet zusätzlich im `done`-Event (z. B. `{"source": "local"}`).
+    """
+    parts = []
+    try:
+        for delta in deltas:
+            parts.append(delta)
+            yield sse_event({"delta": delta})
+    except Exception as e:
+        print("❌ Stream-Fehler:", e)
+        yield sse_event({"error": str(e)}, event="error")
+        return
+    reply = "".join(parts).strip()
+    if on_done:
+        on_done(reply)
+    yield sse_event({"reply": reply, **(meta or {})}, event="done")
+
+
+async def aiter_deltas(stream, on_usage=None):
+    """Wie iter_deltas, für AsyncOpenAI-Streams."""
+    async for chunk in stream:
+        if on_usage and getattr(chunk, "usage", None):
+            on_usage(chunk.usage)
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+
+
+async def aiter_sse(deltas, on_done=None, meta=None):
+    """Wie iter_sse, für async Delta-Quellen."""
+    parts = []
+    try:
+        async for delta in deltas:
+            parts.append(delta)
+            yield sse_event({"delta": delta})
+    except Exception as e:
+        print("❌ Stream-Fehler:", e)
+        yield sse_event({"error": str(e)}, event="error")
+        return
+    reply = "".join(parts).strip()
+    if on_done:
+        on_done(reply)
+    yield sse_event({"reply": reply, **(meta or {})}, event="done")
@@ -0,0 +1,192 @@
+# tenants.py
+"""Mandanten: ein Prozess bedient alle Praxen aus `tenants/<id>.json`.
+
+Jede Datei hat dasselbe Schema wie config.json plus einen Abschnitt
+`"tenant": {"name", "hosts", "model", "system_prompt"}` (alles optional).
+Beim Start wird nur die Zuordnung Host → Mandant gelesen; Config, Prompt-
+Blöcke und Matcher eines Mandanten entstehen erst bei seiner ersten Anfrage
+und liegen dann in einem größenbegrenzten LRU – jeweils in einem
+ConfigProvider, Änderungen an der Datei gelten also ohne Neustart.
+OpenAI-Client, DB und Antwort-Cache teilen sich alle Mandanten (der
+Cache-Key enthält den Mandanten).
+
+Neuer Mandant:  python setup_structure.py <name>
+"""
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from config_snapshot import ConfigProvider
+from locations import LocationMatcher
+from price_answers import PriceIndex
+from prompt import PromptBuilder
+from retrieval import INDEX_DIR, load_index
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+TENANTS_DIR = os.getenv("TENANTS_DIR", os.path.join(API_DIR, "tenants"))
+TENANT_CACHE_SIZE = int(os.getenv("TENANT_CACHE_SIZE", 32))
+TENANT_HEADER = "x-tenant"
+
+_TENANT_ID = re.compile(r"^[a-z0-9][a-z0-9_-]{0,62}$")
+
+SYSTEM_PROMPT_TEMPLATE = (
+    "Du bist die freundliche, professionelle Assistentin von {name}. "
+    "Sprich in Du-Form, antworte warm, ruhig und kompetent. "
+    "Wenn Preise, Öffnungszeiten oder Kontaktdaten bekannt sind, verwende sie direkt aus den Praxisdaten. "
+    "Wenn eine Stadt genannt wird, nutze die passenden Informationen dieser Praxis. "
+    "Wenn etwas nicht in den Daten steht, sag höflich, dass du dazu leider keine Information hast. "
+    "Gib niemals vertrauliche oder interne Informationen weiter. "
+    "Erfinde nichts. Bei Unsicherheit: 'Dazu liegen mir leider keine verlässlichen Informationen vor.' "
+    "Keine individuellen medizinischen Diagnosen. Verweise freundlich auf Beratung in der Praxis."
+)
+
+
+class Tenant:
+    """Alles, was eine Anfrage für einen Mandanten braucht – nach dem Aufbau unveränderlich."""
+
+    def __init__(self, tenant_id, config, version, system_prompt, default_praxis, model,
+                 location_matcher=None, price_index=None, prompt_builder=None, retrieval_index=None):
+        self.id = tenant_id
+        self.config = config
+        self.version = version
+        self.model = model
+        self.location_matcher = location_matcher or LocationMatcher(
+            config.get("praxen", {}), config.get("standort_aliase"))
+        self.price_index = price_index or PriceIndex(config, aliases=config.get("preis_aliase"))
+        self.prompt_builder = prompt_builder or PromptBuilder(
+            config, system_prompt, default_praxis, version=version)
+        self.retrieval_index = retrieval_index
+        index_version = retrieval_index.version if retrieval_index else "-"
+        # Antwort-Cache-Version: Mandant + Config + Website-Index
+        self.cache_version = f"{tenant_id}:{version}:{index_version}"
+
+    @classmethod
+    def from_config(cls, tenant_id, config, version, default_model):
+        """Mandant aus einer Datei unter tenants/ (Prompt und Praxisdaten aus `tenant`)."""
+        meta = config.get("tenant", {})
+        praxen = config.get("praxen", {})
+        name = meta.get("name") or tenant_id.capitalize()
+        if len(praxen) == 1:
+            default_praxis = next(iter(praxen.values()))
+        else:
+            default_praxis = {"name": name, "adresse": f"Standorte: {', '.join(p.get('name', k) for k, p in praxen.items())}"}
+        return cls(
+            tenant_id,
+            config,
+            version,
+            meta.get("system_prompt") or SYSTEM_PROMPT_TEMPLATE.format(name=name),
+            default_praxis,
+            meta.get("model") or default_model,
+            retrieval_index=load_index(os.path.join(INDEX_DIR, tenant_id)),
+        )
+
+
+class TenantRegistry:
+    """Mandant auflösen (Header → Pfad → Host) und lazy in einem LRU halten."""
+
+    def __init__(self, default: ConfigProvider, tenants_dir: str = TENANTS_DIR,
+                 maxsize: int = TENANT_CACHE_SIZE):
+        self.default_provider = default
+        self.tenants_dir = tenants_dir
+        self.maxsize = maxsize
+        self._loaded = OrderedDict()  # id -> ConfigProvider
+        self._lock = threading.Lock()
+        self._loading = {}  # id -> Lock, damit ein Mandant nur einmal gebaut wird
+        self.loads = 0
+        self.evictions = 0
+        self.hosts = self._scan_hosts()
+
+    @property
+    def default(self) -> Tenant:
+        return self.default_provider.current()
+
+    def _path(self, tenant_id):
+        return os.path.join(self.tenants_dir, f"{tenant_id}.json")
+
+    def _scan_hosts(self) -> dict:
+        """Host → Mandant aus allen Dateien (nur der kleine `tenant`-Abschnitt bleibt)."""
+        hosts = {}
+        if not os.path.isdir(self.tenants_dir):
+            return hosts
+        for name in sorted(os.listdir(self.tenants_dir)):
+            tenant_id, ext = os.path.splitext(name)
+            if ext != ".json" or not _TENANT_ID.match(tenant_id):
+                continue
+            try:
+                with open(os.path.join(self.tenants_dir, name), "r", encoding="utf-8") as f:
+                    meta = json.load(f).get("tenant", {})
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Mandant {tenant_id} nicht lesbar:", e)
+                continue
+            for host in meta.get("hosts", []):
+                hosts[host.lower()] = tenant_id
+        return hosts
+
+    def known(self, tenant_id: str) -> bool:
+        return tenant_id == self.default.id or (
+            bool(_TENANT_ID.match(tenant_id)) and os.path.exists(self._path(tenant_id)))
+
+    def get(self, tenant_id: str | None):
+        """Tenant oder None, wenn es den Mandanten nicht gibt."""
+        if not tenant_id or tenant_id == self.default.id:
+            return self.default
+        tenant_id = tenant_id.lower()
+        with self._lock:
+            provider = self._loaded.get(tenant_id)
+            if provider is not None:
+                self._loaded.move_to_end(tenant_id)
+        if provider is not None:
+            return provider.current()  # evtl. Neuladen – außerhalb des Registry-Locks
+        if not self.known(tenant_id):
+            return None
+        with self._lock:
+            loading = self._loading.setdefault(tenant_id, threading.Lock())
+
+        with loading:
+            with self._lock:  # evtl. hat ein anderer Thread ihn inzwischen gebaut
+                provider = self._loaded.get(tenant_id)
+            if provider is None:
+                model = self.default.model
+                provider = ConfigProvider(
+                    self._path(tenant_id),
+                    lambda config, version, _: Tenant.from_config(tenant_id, config, version, model),
+                    snapshot_path=None,
+                )
+                with self._lock:
+                    self.loads += 1
+                    self._loaded[tenant_id] = provider
+                    while len(self._loaded) > self.maxsize:
+                        self._loaded.popitem(last=False)
+                        self.evictions += 1
+        with self._lock:
+            self._loading.pop(tenant_id, None)
+        return provider.current()
+
+    def resolve(self, host: str | None = None, header: str | None = None):
+        """Header `X-Tenant` vor Host-Zuordnung vor Subdomain; sonst der Standard-Mandant.
+
+        Ein ausdrücklich per Header genannter, unbekannter Mandant ergibt None.
+        """
+        if header:
+            return self.get(header.strip())
+        host = (host or "").split(":")[0].lower()
+        if host in self.hosts:
+            return self.get(self.hosts[host]) or self.default
+        sub = host.split(".")[0] if host.count(".") >= 2 else ""
+        if sub and sub != "www" and self.known(sub):
+            return self.get(sub) or self.default
+        return self.default
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "default": self.default.id,
+                "config": self.default_provider.stats(),
+                "loaded": len(self._loaded),
+                "maxsize": self.maxsize,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "hosts": len(self.hosts),
+            }
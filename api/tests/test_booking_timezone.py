@@ -0,0 +1,67 @@
+# tests/test_booking_timezone.py
+"""Buchung mit Zeitzonen-Offset: wird in Ortszeit umgerechnet, Überschneidung → 409 statt 500.
+
+Aufruf (aus api/):  python -m pytest tests
+"""
+import os
+import sys
+import time
+from datetime import datetime
+
+os.environ["TZ"] = "Europe/Berlin"
+time.tzset()
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from booking.models import Appointment, Base  # noqa: E402
+from booking.routes import get_db, router  # noqa: E402
+from db import make_engine  # noqa: E402
+
+EXISTING = datetime(2030, 1, 7, 12, 0)  # B. Botox, 30 Minuten
+
+
+@pytest.fixture
+def client(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path}/booking.db")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(Appointment(service="B. Botox", praxis="mannheim", date=EXISTING, status="gebucht"))
+        db.commit()
+
+    def session():
+        with Session() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api/booking")
+    app.dependency_overrides[get_db] = session
+    yield TestClient(app), Session
+    engine.dispose()
+
+
+def book(client, when: str):
+    return client.post("/api/booking/book", json={
+        "service": "B. Botox", "praxis": "mannheim", "date": when,
+        "customer": {"name": "Max Muster", "email": "max@example.com"},
+    })
+
+
+@pytest.mark.parametrize("when", ["2030-01-07T12:15:00+01:00", "2030-01-07T11:15:00Z"])
+def test_aware_date_overlapping_existing_is_conflict(client, when):
+    http, _ = client
+    assert book(http, when).status_code == 409
+
+
+def test_aware_date_is_stored_in_local_time(client):
+    http, Session = client
+    response = book(http, "2030-01-07T13:00:00+00:00")
+    assert response.status_code == 200
+    with Session() as db:
+        stored = db.get(Appointment, response.json()["id"]).date
+    assert stored == datetime(2030, 1, 7, 14, 0)
+    assert stored.tzinfo is None
@@ -1,5 +1,26 @@
+"""Website-Texte für den Chatbot laden.
+
+Standard: die festen `PAGES` laden. Mit `--crawl` werden die Seiten über die
+sitemap.xml (oder über Links) gefunden und parallel über eine gemeinsame
+Session geladen. Jede Seite landet als eigene Zeile im JSONL-Store; beim
+nächsten Lauf werden ETag/Last-Modified mitgeschickt, unveränderte Seiten
+(304) also nicht neu geladen. website_data.txt wird aus dem Store erzeugt.
+
+    python save_all_pages.py
+    python save_all_pages.py --crawl https://www.liquid-aesthetik.de/ --workers 8
+"""
+import argparse
+import json
+import os
+import time
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urldefrag, urljoin, urlparse
+
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 
 PAGES = [
     "https://www.liquid-aesthetik.de/",
@@ -13,20 +34,31 @@ HEADERS = {
                   "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15"
 }
 
+STORE_PATH = "website_pages.jsonl"
+OUTPUT_PATH = "website_data.txt"
+SKIP_SUFFIXES = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".zip", ".mp4", ".css", ".js")
+
+
+def extract_text(html):
+    """Reinen Text einer Seite plus ihre Links."""
+    soup = BeautifulSoup(html, "lxml")
+    links = [a["href"] for a in soup.find_all("a", href=True)]
+
+    # Unwichtige Elemente entfernen
+    for tag in soup(["script", "style", "noscript", "svg", "footer", "nav", "form", "iframe"]):
+        tag.decompose()
+
+    text = soup.get_text(separator="\n", strip=True)
+    text = "\n".join(line for line in text.splitlines() if line.strip())
+    return text, links
+
 
 def scrape_page(url):
     """Extrahiert reinen Text einer Seite."""
     try:
         response = requests.get(url, headers=HEADERS, timeout=10)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # Unwichtige Elemente entfernen
-        for tag in soup(["script", "style", "noscript", "svg", "footer", "nav", "form", "iframe"]):
-            tag.decompose()
-
-        text = soup.get_text(separator="\n", strip=True)
-        text = "\n".join(line for line in text.splitlines() if line.strip())
+        text, _ = extract_text(response.text)
         print(f"✅ {url} geladen ({len(text)} Zeichen)")
         return f"\n\n### Quelle: {url}\n{text}\n"
     except Exception as e:
@@ -34,12 +66,182 @@ def scrape_page(url):
         return f"\n\n### Quelle: {url}\nFehler beim Laden: {e}\n"
 
 
+def make_session(workers=8):
+    """Eine Session mit Connection-Pool für alle Threads."""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def load_store(path):
+    """{url: datensatz} aus einem früheren Lauf."""
+    records = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    records[record["url"]] = record
+    return records
+
+
+def fetch_page(session, url, previous=None, timeout=10):
+    """Eine Seite laden – mit If-None-Match/If-Modified-Since aus `previous`.
+
+    Liefert einen Store-Datensatz; bei 304 den alten mit status "unchanged".
+    """
+    headers = {}
+    if previous:
+        if previous.get("etag"):
+            headers["If-None-Match"] = previous["etag"]
+        if previous.get("last_modified"):
+            headers["If-Modified-Since"] = previous["last_modified"]
+    try:
+        response = session.get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304 and previous:
+            return {**previous, "status": "unchanged", "checked_at": time.time()}
+        response.raise_for_status()
+        if "html" not in response.headers.get("Content-Type", "html"):
+            return {"url": url, "status": "skipped", "checked_at": time.time()}
+        text, links = extract_text(response.content)
+        return {
+            "url": url,
+            "status": "fetched",
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "checked_at": time.time(),
+            "text": text,
+            "links": links,
+        }
+    except requests.RequestException as e:
+        # alten Text behalten, damit ein Aussetzer die Seite nicht aus dem Index wirft
+        return {**(previous or {"url": url}), "status": "error", "error": str(e), "checked_at": time.time()}
+
+
+def sitemap_urls(session, sitemap_url, limit=10000):
+    """Seiten-URLs aus einer sitemap.xml (auch Sitemap-Index); [] wenn keine da ist."""
+    urls, pending, seen = [], [sitemap_url], set()
+    while pending and len(urls) < limit:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        try:
+            response = session.get(current, timeout=10)
+            if response.status_code != 200:
+                continue
+            root = ET.fromstring(response.content)
+        except (requests.RequestException, ET.ParseError):
+            continue
+        for loc in root.iter():
+            if loc.tag.endswith("loc") and loc.text:
+                target = loc.text.strip()
+                if root.tag.endswith("sitemapindex"):
+                    pending.append(target)
+                else:
+                    urls.append(target)
+    return urls[:limit]
+
+
+def _normalize(base, href, host):
+    url, _ = urldefrag(urljoin(base, href))
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or parsed.netloc != host:
+        return None
+    if parsed.path.lower().endswith(SKIP_SUFFIXES):
+        return None
+    return url
+
+
+def crawl(start_urls, store_path=STORE_PATH, workers=8, max_pages=500,
+          discover=True, sitemap=True, session=None):
+    """Seiten parallel laden und Datensatz für Datensatz in den Store schreiben.
+
+    Mit `sitemap` werden zuerst die URLs aus /sitemap.xml genommen; mit
+    `discover` kommen Links auf derselben Domain dazu (Breitensuche).
+    Gibt eine Statistik zurück.
+    """
+    session = session or make_session(workers)
+    previous = load_store(store_path)
+    host = urlparse(start_urls[0]).netloc
+
+    frontier = deque()
+    seen = set()
+
+    def enqueue(url):
+        if url and url not in seen and len(seen) < max_pages:
+            seen.add(url)
+            frontier.append(url)
+
+    for url in start_urls:
+        enqueue(url)
+    if sitemap:
+        root = urlparse(start_urls[0])
+        for url in sitemap_urls(session, f"{root.scheme}://{root.netloc}/sitemap.xml", max_pages):
+            enqueue(_normalize(url, url, host))
+
+    counts = {"fetched": 0, "unchanged": 0, "skipped": 0, "error": 0}
+    started = time.perf_counter()
+    tmp_path = f"{store_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as store, ThreadPoolExecutor(workers) as pool:
+        running = set()
+        while frontier or running:
+            # höchstens `workers` Anfragen gleichzeitig unterwegs
+            while frontier and len(running) < workers:
+                url = frontier.popleft()
+                running.add(pool.submit(fetch_page, session, url, previous.get(url)))
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                record = future.result()
+                counts[record["status"]] += 1
+                store.write(json.dumps(record, ensure_ascii=False) + "\n")
+                if discover:
+                    for href in record.get("links", ()):
+                        enqueue(_normalize(record["url"], href, host))
+                icon = {"fetched": "✅", "unchanged": "♻️", "skipped": "⏭️"}.get(record["status"], "❌")
+                print(f"{icon} {record['url']} ({record['status']})")
+    os.replace(tmp_path, store_path)
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    return {**counts, "pages": total, "seconds": round(elapsed, 3),
+            "pages_per_sec": round(total / elapsed, 1) if elapsed else 0.0}
+
+
+def export_text(store_path=STORE_PATH, output_path=OUTPUT_PATH):
+    """website_data.txt (Format '### Quelle: …') Seite für Seite aus dem Store schreiben."""
+    pages = 0
+    with open(store_path, "r", encoding="utf-8") as src, open(output_path, "w", encoding="utf-8") as out:
+        for line in src:
+            record = json.loads(line)
+            if record.get("text"):
+                out.write(f"\n\n### Quelle: {record['url']}\n{record['text']}\n")
+                pages += 1
+    return pages
+
+
 if __name__ == "__main__":
-    full_text = ""
-    for url in PAGES:
-        full_text += scrape_page(url)
+    parser = argparse.ArgumentParser(description="Website-Texte für den Chatbot laden")
+    parser.add_argument("--crawl", nargs="*", metavar="URL",
+                        help="Crawler-Modus ab diesen URLs (Standard: Startseite aus PAGES)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--max-pages", type=int, default=500)
+    parser.add_argument("--no-sitemap", action="store_true")
+    parser.add_argument("--store", default=STORE_PATH)
+    parser.add_argument("--out", default=OUTPUT_PATH)
+    args = parser.parse_args()
 
-    with open("website_data.txt", "w", encoding="utf-8") as f:
-        f.write(full_text)
+    if args.crawl is None:
+        # feste Seitenliste, aber ebenfalls inkrementell über den Store
+        stats = crawl(PAGES, args.store, workers=args.workers, discover=False, sitemap=False)
+    else:
+        stats = crawl(args.crawl or PAGES[:1], args.store, workers=args.workers,
+                      max_pages=args.max_pages, sitemap=not args.no_sitemap)
+    pages = export_text(args.store, args.out)
 
-    print("\n💾 Fertig! Alle Seiten wurden in website_data.txt gespeichert.")
+    print(f"\n📊 {stats['pages']} Seiten in {stats['seconds']} s ({stats['pages_per_sec']}/s): "
+          f"{stats['fetched']} neu, {stats['unchanged']} unverändert, {stats['error']} Fehler")
+    print(f"💾 Fertig! {pages} Seiten wurden in {args.out} gespeichert.")